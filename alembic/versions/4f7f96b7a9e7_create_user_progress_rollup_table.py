@@ -0,0 +1,61 @@
+"""create user progress rollup table
+
+Populate it after upgrading with `python -m src.cli.rebuild_progress_rollups`.
+
+Revision ID: 4f7f96b7a9e7
+Revises: 6d1f7bc1d94d
+Create Date: 2026-10-18 11:04:19.552870
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4f7f96b7a9e7"
+down_revision: Union[str, None] = "6d1f7bc1d94d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_progress_rollup",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "scope_type",
+            sa.Enum("BOOK", "UNIT", "SUBUNIT", name="progressscope"),
+            nullable=False,
+        ),
+        sa.Column("scope_id", sa.Integer(), nullable=False),
+        sa.Column("total_attempted", sa.Integer(), nullable=False),
+        sa.Column("total_correct", sa.Integer(), nullable=False),
+        sa.Column("last_unit_id", sa.Integer(), nullable=True),
+        sa.Column("last_sub_unit_id", sa.Integer(), nullable=True),
+        sa.Column("last_question_id", sa.Integer(), nullable=True),
+        sa.Column(
+            "last_status",
+            postgresql.ENUM(
+                "READ", "SUBMITTED", name="questionstatus", create_type=False
+            ),
+            nullable=True,
+        ),
+        sa.Column("last_touched_at", sa.DateTime(), nullable=True),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("user_id", "scope_type", "scope_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_progress_rollup")
+    sa.Enum(name="progressscope").drop(op.get_bind(), checkfirst=True)
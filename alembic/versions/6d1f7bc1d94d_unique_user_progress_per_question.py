@@ -0,0 +1,43 @@
+"""unique user progress per question
+
+Revision ID: 6d1f7bc1d94d
+Revises: a7c3e9d1f5b2
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6d1f7bc1d94d"
+down_revision: Union[str, None] = "a7c3e9d1f5b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep only the latest row per (user_id, question_id) before adding the constraint
+    op.execute(
+        """
+        DELETE FROM user_progress a
+        USING user_progress b
+        WHERE a.user_id = b.user_id
+          AND a.question_id = b.question_id
+          AND a.id < b.id
+        """
+    )
+    op.create_unique_constraint(
+        "uq_user_progress_user_question",
+        "user_progress",
+        ["user_id", "question_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        "uq_user_progress_user_question", "user_progress", type_="unique"
+    )
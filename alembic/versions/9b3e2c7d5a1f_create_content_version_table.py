@@ -0,0 +1,39 @@
+"""create content version table
+
+Revision ID: 9b3e2c7d5a1f
+Revises: 4f7f96b7a9e7
+Create Date: 2026-10-18 15:12:40.118032
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9b3e2c7d5a1f"
+down_revision: Union[str, None] = "4f7f96b7a9e7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "content_version",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute("INSERT INTO content_version (id, version) VALUES (1, 1)")
+
+
+def downgrade() -> None:
+    op.drop_table("content_version")
@@ -0,0 +1,217 @@
+"""create content and subscription tables
+
+These tables used to be created by `create_all` when the app started. Statements use
+IF NOT EXISTS, so databases created that way upgrade through this revision unchanged.
+
+Revision ID: a7c3e9d1f5b2
+Revises: 556651e1ea39
+Create Date: 2026-10-18 17:22:31.904417
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7c3e9d1f5b2"
+down_revision: Union[str, None] = "556651e1ea39"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        DO $$ BEGIN
+            CREATE TYPE questionstatus AS ENUM ('READ', 'SUBMITTED');
+        EXCEPTION WHEN duplicate_object THEN NULL;
+        END $$
+        """
+    )
+    op.create_index("ix_user_id", "user", ["id"], if_not_exists=True)
+
+    op.create_table(
+        "book",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("title_en", sa.String(), nullable=True),
+        sa.Column("title_hi", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_book_id", "book", ["id"], if_not_exists=True)
+    op.create_index("ix_book_title_en", "book", ["title_en"], if_not_exists=True)
+
+    op.create_table(
+        "unit",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("title_en", sa.String(), nullable=True),
+        sa.Column("title_hi", sa.String(), nullable=True),
+        sa.Column("unit_number", sa.Integer(), nullable=True),
+        sa.Column("book_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["book_id"], ["book.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_unit_id", "unit", ["id"], if_not_exists=True)
+
+    op.create_table(
+        "sub_unit",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("title_en", sa.String(), nullable=True),
+        sa.Column("title_hi", sa.String(), nullable=True),
+        sa.Column("content_en", sa.Text(), nullable=True),
+        sa.Column("content_hi", sa.Text(), nullable=True),
+        sa.Column("subunit_number", sa.Integer(), nullable=True),
+        sa.Column("unit_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["unit_id"], ["unit.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_sub_unit_id", "sub_unit", ["id"], if_not_exists=True)
+
+    op.create_table(
+        "preview_subunit",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("subunit_id", sa.Integer(), nullable=False),
+        sa.Column("available_for_preview", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(["subunit_id"], ["sub_unit.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_preview_subunit_id", "preview_subunit", ["id"], if_not_exists=True
+    )
+
+    op.create_table(
+        "question",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("text_en", sa.Text(), nullable=True),
+        sa.Column("text_hi", sa.Text(), nullable=True),
+        sa.Column("active", sa.Boolean(), nullable=True),
+        sa.Column("reported", sa.Boolean(), nullable=True),
+        sa.Column("subunit_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["subunit_id"], ["sub_unit.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_question_id", "question", ["id"], if_not_exists=True)
+
+    op.create_table(
+        "choice",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("text_en", sa.String(), nullable=True),
+        sa.Column("text_hi", sa.String(), nullable=True),
+        sa.Column("is_correct", sa.Boolean(), nullable=True),
+        sa.Column("question_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["question_id"], ["question.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_choice_id", "choice", ["id"], if_not_exists=True)
+    op.create_index("ix_choice_text_en", "choice", ["text_en"], if_not_exists=True)
+
+    op.create_table(
+        "reported_question",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("explanation_en", sa.Text(), nullable=True),
+        sa.Column("explanation_hi", sa.Text(), nullable=True),
+        sa.Column("resolved", sa.Boolean(), nullable=True),
+        sa.Column("question_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["question_id"], ["question.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_reported_question_id", "reported_question", ["id"], if_not_exists=True
+    )
+
+    op.create_table(
+        "user_progress",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("book_id", sa.Integer(), nullable=False),
+        sa.Column("unit_id", sa.Integer(), nullable=False),
+        sa.Column("sub_unit_id", sa.Integer(), nullable=False),
+        sa.Column("question_id", sa.Integer(), nullable=False),
+        sa.Column("selected_choice", sa.Integer(), nullable=True),
+        sa.Column("is_correct", sa.Boolean(), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM(
+                "READ", "SUBMITTED", name="questionstatus", create_type=False
+            ),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.ForeignKeyConstraint(["book_id"], ["book.id"]),
+        sa.ForeignKeyConstraint(["unit_id"], ["unit.id"]),
+        sa.ForeignKeyConstraint(["sub_unit_id"], ["sub_unit.id"]),
+        sa.ForeignKeyConstraint(["question_id"], ["question.id"]),
+        sa.ForeignKeyConstraint(["selected_choice"], ["choice.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_user_progress_id", "user_progress", ["id"], if_not_exists=True)
+
+    op.create_table(
+        "subscription_type",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("code", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("cost", sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("code"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_subscription_type_id", "subscription_type", ["id"], if_not_exists=True
+    )
+    op.create_index(
+        "ix_subscription_type_name", "subscription_type", ["name"], if_not_exists=True
+    )
+
+    op.create_table(
+        "subscription",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("book_id", sa.Integer(), nullable=True),
+        sa.Column("subscription_type_id", sa.Integer(), nullable=False),
+        sa.Column("start_date", sa.DateTime(), nullable=True),
+        sa.Column("end_date", sa.DateTime(), nullable=True),
+        sa.Column("active", sa.Boolean(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.ForeignKeyConstraint(["book_id"], ["book.id"]),
+        sa.ForeignKeyConstraint(["subscription_type_id"], ["subscription_type.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_subscription_id", "subscription", ["id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    for table in (
+        "subscription",
+        "subscription_type",
+        "user_progress",
+        "reported_question",
+        "choice",
+        "question",
+        "preview_subunit",
+        "sub_unit",
+        "unit",
+        "book",
+    ):
+        op.drop_table(table)
+    op.execute("DROP TYPE IF EXISTS questionstatus")
+    op.drop_index("ix_user_id", table_name="user", if_exists=True)
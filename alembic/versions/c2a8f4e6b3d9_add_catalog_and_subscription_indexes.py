@@ -0,0 +1,60 @@
+"""add catalog and subscription indexes
+
+Indexes the foreign keys the catalog and quiz queries filter on, and the active
+subscriptions of a user. They are built concurrently, outside a transaction, so the
+tables stay writable during the upgrade.
+
+Revision ID: c2a8f4e6b3d9
+Revises: 9b3e2c7d5a1f
+Create Date: 2026-10-18 16:40:05.271644
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c2a8f4e6b3d9"
+down_revision: Union[str, None] = "9b3e2c7d5a1f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, partial index condition)
+INDEXES = (
+    ("ix_question_subunit_id_id", "question", ["subunit_id", "id"], None),
+    ("ix_choice_question_id", "choice", ["question_id"], None),
+    ("ix_unit_book_id", "unit", ["book_id"], None),
+    ("ix_sub_unit_unit_id", "sub_unit", ["unit_id"], None),
+    ("ix_preview_subunit_subunit_id", "preview_subunit", ["subunit_id"], None),
+    ("ix_subscription_user_id", "subscription", ["user_id"], None),
+    (
+        "ix_subscription_active_user_id_book_id",
+        "subscription",
+        ["user_id", "book_id"],
+        sa.text("active"),
+    ),
+)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_where=where,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
@@ -0,0 +1,47 @@
+"""bump content version on catalog writes
+
+Revision ID: d5f9a2c8e1b7
+Revises: c2a8f4e6b3d9
+Create Date: 2026-10-18 17:40:12.502317
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d5f9a2c8e1b7"
+down_revision: Union[str, None] = "c2a8f4e6b3d9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CONTENT_TABLES = ("book", "unit", "sub_unit", "preview_subunit", "question", "choice")
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_content_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE content_version SET version = version + 1, updated_at = now()
+            WHERE id = 1;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table in CONTENT_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_bump_content_version ON {table}")
+        op.execute(
+            f"CREATE TRIGGER {table}_bump_content_version "
+            f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION bump_content_version()"
+        )
+
+
+def downgrade() -> None:
+    for table in CONTENT_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_bump_content_version ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS bump_content_version()")
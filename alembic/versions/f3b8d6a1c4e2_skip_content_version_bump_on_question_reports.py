@@ -0,0 +1,42 @@
+"""skip content version bump on question reports
+
+Reporting a question only updates its `reported` flag, which isn't served in the
+catalog: the question trigger no longer bumps the content version for it, so a report
+doesn't drop every worker's cached catalog.
+
+Revision ID: f3b8d6a1c4e2
+Revises: d5f9a2c8e1b7
+Create Date: 2026-10-19 10:12:44.318062
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3b8d6a1c4e2"
+down_revision: Union[str, None] = "d5f9a2c8e1b7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Every column of `question` but `reported`
+QUESTION_CONTENT_COLUMNS = ("id", "text_en", "text_hi", "active", "subunit_id")
+
+
+def _replace_question_trigger(update: str) -> None:
+    op.execute("DROP TRIGGER IF EXISTS question_bump_content_version ON question")
+    op.execute(
+        "CREATE TRIGGER question_bump_content_version "
+        f"AFTER INSERT OR {update} OR DELETE OR TRUNCATE ON question "
+        "FOR EACH STATEMENT EXECUTE FUNCTION bump_content_version()"
+    )
+
+
+def upgrade() -> None:
+    _replace_question_trigger(f"UPDATE OF {', '.join(QUESTION_CONTENT_COLUMNS)}")
+
+
+def downgrade() -> None:
+    _replace_question_trigger("UPDATE")
@@ -1,6 +1,10 @@
 from src.main import app
 
 if __name__ == "__main__":
+    import logging
     import uvicorn
 
+    # Logging is configured by the process running the app, never on import
+    logging.basicConfig(level=logging.INFO)
+
     uvicorn.run(app, host="127.0.0.1", port=8000)
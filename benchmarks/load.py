@@ -0,0 +1,437 @@
+"""
+Load test of the API, run in-process against a local database.
+
+The app from `src/main.py` is started with its lifespan and driven through an ASGI
+client by concurrent virtual users, each picking scenarios (browse the catalog, open a
+question, submit an answer, check progress) at random. Firebase is replaced by a fake
+verifier (see `benchmarks.stand_ins`).
+
+For every route it reports latency percentiles, throughput, status codes and SQL
+statements per request (from the `Server-Timing` header), plus the peak RSS of the
+process, as JSON: diff two result files to spot regressions.
+
+Usage:
+    APP_ENV=test DATABASE_URL=... python -m benchmarks.load --seed --duration 30 \\
+        --concurrency 16 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import resource
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from benchmarks.stand_ins import ASGIClient, install_fake_firebase, token_for
+
+# Before the app is imported: the access log would otherwise print every request
+os.environ.setdefault("ACCESS_LOG_SAMPLE_RATE", "0")
+install_fake_firebase()
+
+from sqlalchemy import text
+from benchmarks.seed import SeedConfig, seed
+from src.db.database import engine
+from src.main import app
+
+STATEMENTS = re.compile(r"(\d+) statements")
+
+
+@dataclass
+class RouteStats:
+    latencies: List[float] = field(default_factory=list)
+    statements: List[int] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+
+
+class Recorder:
+    def __init__(self):
+        self.routes: Dict[str, RouteStats] = {}
+        self.enabled = True
+
+    def record(
+        self, route: str, status: int, seconds: float, headers: Dict[str, str]
+    ) -> None:
+        if not self.enabled:
+            return
+        stats = self.routes.setdefault(route, RouteStats())
+        stats.latencies.append(seconds)
+        stats.statuses[status] += 1
+        match = STATEMENTS.search(headers.get("server-timing", ""))
+        if match:
+            stats.statements.append(int(match.group(1)))
+
+
+@dataclass
+class QuestionRef:
+    id: int
+    book_id: int
+    choice_ids: List[int]
+
+
+@dataclass
+class Catalog:
+    book_ids: List[int]
+    units_by_book: Dict[int, List[int]]
+    questions: List[QuestionRef]
+    preview_questions: List[QuestionRef]
+
+
+@dataclass
+class VirtualUser:
+    email: str
+    full_access: bool
+    book_ids: List[int]
+    # ETags of the catalog responses already received, sent back on revalidation
+    etags: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {token_for(self.email)}"}
+
+
+async def load_catalog() -> Catalog:
+    async with engine.connect() as conn:
+        units = (await conn.execute(text("SELECT id, book_id FROM unit"))).all()
+        rows = (
+            await conn.execute(
+                text(
+                    "SELECT q.id, u.book_id, "
+                    "EXISTS (SELECT 1 FROM preview_subunit p "
+                    "WHERE p.subunit_id = s.id) AS preview, "
+                    "array_agg(c.id ORDER BY c.id) AS choice_ids "
+                    "FROM question q "
+                    "JOIN sub_unit s ON s.id = q.subunit_id "
+                    "JOIN unit u ON u.id = s.unit_id "
+                    "JOIN choice c ON c.question_id = q.id "
+                    "GROUP BY q.id, u.book_id, s.id"
+                )
+            )
+        ).all()
+
+    units_by_book: Dict[int, List[int]] = {}
+    for unit_id, book_id in units:
+        units_by_book.setdefault(book_id, []).append(unit_id)
+
+    questions = [QuestionRef(row.id, row.book_id, row.choice_ids) for row in rows]
+    preview = [q for q, row in zip(questions, rows) if row.preview]
+    if not questions:
+        raise RuntimeError("The database has no questions: run with --seed")
+    return Catalog(sorted(units_by_book), units_by_book, questions, preview)
+
+
+async def load_users() -> List[VirtualUser]:
+    async with engine.connect() as conn:
+        rows = (
+            await conn.execute(
+                text(
+                    "SELECT u.email, bool_or(s.book_id IS NULL AND s.id IS NOT NULL), "
+                    "array_remove(array_agg(s.book_id), NULL) "
+                    'FROM "user" u '
+                    "LEFT JOIN subscription s ON s.user_id = u.id AND s.active "
+                    "GROUP BY u.email"
+                )
+            )
+        ).all()
+    return [VirtualUser(email, bool(full), list(books)) for email, full, books in rows]
+
+
+class Session:
+    """
+    One virtual user's view of the API: issues requests and records them under their
+    route template.
+    """
+
+    def __init__(
+        self,
+        client: ASGIClient,
+        recorder: Recorder,
+        catalog: Catalog,
+        user: VirtualUser,
+        rng: random.Random,
+    ):
+        self.client = client
+        self.recorder = recorder
+        self.catalog = catalog
+        self.user = user
+        self.rng = rng
+
+    async def call(
+        self,
+        route: str,
+        method: str,
+        url: str,
+        json_body: Any = None,
+        revalidate: bool = False,
+    ) -> bytes:
+        headers = self.user.headers
+        if revalidate and url in self.user.etags:
+            headers["If-None-Match"] = self.user.etags[url]
+
+        started = time.perf_counter()
+        status, response_headers, body = await self.client.request(
+            method, url, headers, json_body
+        )
+        self.recorder.record(
+            route, status, time.perf_counter() - started, response_headers
+        )
+        if revalidate and "etag" in response_headers:
+            self.user.etags[url] = response_headers["etag"]
+        return body
+
+    def pick_question(self) -> QuestionRef:
+        """
+        A question the user can open: in one of their books, or in a preview subunit.
+        """
+        if self.user.full_access:
+            return self.rng.choice(self.catalog.questions)
+        if self.user.book_ids and self.rng.random() < 0.8:
+            book_id = self.rng.choice(self.user.book_ids)
+            for _ in range(20):
+                question = self.rng.choice(self.catalog.questions)
+                if question.book_id == book_id:
+                    return question
+        return self.rng.choice(self.catalog.preview_questions or self.catalog.questions)
+
+    async def browse_catalog(self) -> None:
+        book_id = self.rng.choice(self.catalog.book_ids)
+        unit_id = self.rng.choice(self.catalog.units_by_book[book_id])
+        # Mobile clients poll the catalog and revalidate what they already have
+        await self.call("GET /books/", "GET", "/books/", revalidate=True)
+        await self.call(
+            "GET /books/book/{book_id}",
+            "GET",
+            f"/books/book/{book_id}",
+            revalidate=True,
+        )
+        await self.call(
+            "GET /books/book/{book_id}/units",
+            "GET",
+            f"/books/book/{book_id}/units",
+            revalidate=True,
+        )
+        await self.call(
+            "GET /books/book/unit/{unit_id}/subunits",
+            "GET",
+            f"/books/book/unit/{unit_id}/subunits",
+            revalidate=True,
+        )
+
+    async def open_question(self) -> QuestionRef:
+        question = self.pick_question()
+        await self.call(
+            "GET /quiz/question/{question_id}", "GET", f"/quiz/question/{question.id}"
+        )
+        return question
+
+    async def submit_answer(self) -> None:
+        question = await self.open_question()
+        await self.call(
+            "POST /quiz/question/{question_id}/submit",
+            "POST",
+            f"/quiz/question/{question.id}/submit",
+            json_body={"choice_id": self.rng.choice(question.choice_ids)},
+        )
+
+    async def check_progress(self) -> None:
+        book_id = self.rng.choice(self.user.book_ids or self.catalog.book_ids)
+        await self.call(
+            "GET /user/progress",
+            "GET",
+            f"/user/progress?type=book&type_id={book_id}",
+        )
+
+
+# Scenario name -> relative weight
+SCENARIOS: Dict[str, int] = {
+    "browse_catalog": 3,
+    "open_question": 3,
+    "submit_answer": 3,
+    "check_progress": 1,
+}
+
+
+async def virtual_user_loop(
+    client: ASGIClient,
+    recorder: Recorder,
+    catalog: Catalog,
+    users: List[VirtualUser],
+    deadline: Callable[[], bool],
+    rng: random.Random,
+) -> None:
+    names, weights = list(SCENARIOS), list(SCENARIOS.values())
+    while not deadline():
+        session = Session(client, recorder, catalog, rng.choice(users), rng)
+        scenario: Callable[[], Awaitable[Any]] = getattr(
+            session, rng.choices(names, weights)[0]
+        )
+        await scenario()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of sorted `values`.
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+
+def summarize(stats: RouteStats, elapsed: float) -> Dict[str, Any]:
+    latencies = sorted(stats.latencies)
+    count = len(latencies)
+    return {
+        "requests": count,
+        "throughput_rps": round(count / elapsed, 2),
+        "errors": sum(n for status, n in stats.statuses.items() if status >= 500),
+        "statuses": {str(status): n for status, n in sorted(stats.statuses.items())},
+        "latency_ms": {
+            "mean": round(sum(latencies) / count * 1000, 3) if count else 0.0,
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if count else 0.0,
+        },
+        "statements_per_request": {
+            "mean": (
+                round(sum(stats.statements) / len(stats.statements), 2)
+                if stats.statements
+                else None
+            ),
+            "max": max(stats.statements, default=None),
+        },
+    }
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux, in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    seeded: Optional[Dict[str, Any]] = None
+    if args.seed:
+        seeded = await seed(
+            SeedConfig(
+                books=args.books,
+                units=args.units,
+                subunits=args.subunits,
+                questions=args.questions,
+                users=args.users,
+            )
+        )
+
+    catalog = await load_catalog()
+    users = await load_users()
+    rss_before = peak_rss_mb()
+
+    recorder = Recorder()
+    client = ASGIClient(app)
+    rng = random.Random(args.random_seed)
+
+    async with app.router.lifespan_context(app):
+        for phase, seconds in (("warmup", args.warmup), ("measure", args.duration)):
+            recorder.enabled = phase == "measure"
+            ends_at = time.perf_counter() + seconds
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    virtual_user_loop(
+                        client,
+                        recorder,
+                        catalog,
+                        users,
+                        lambda: time.perf_counter() >= ends_at,
+                        random.Random(rng.random()),
+                    )
+                    for _ in range(args.concurrency)
+                )
+            )
+            elapsed = time.perf_counter() - started
+
+    total = RouteStats()
+    for stats in recorder.routes.values():
+        total.latencies += stats.latencies
+        total.statements += stats.statements
+        total.statuses.update(stats.statuses)
+
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "random_seed": args.random_seed,
+            "scenarios": SCENARIOS,
+            "seed": seeded,
+            "catalog": {
+                "books": len(catalog.book_ids),
+                "questions": len(catalog.questions),
+                "users": len(users),
+            },
+        },
+        "total": summarize(total, elapsed),
+        "routes": {
+            route: summarize(stats, elapsed)
+            for route, stats in sorted(recorder.routes.items())
+        },
+        "memory": {"rss_before_mb": rss_before, "peak_rss_mb": peak_rss_mb()},
+    }
+
+
+def print_table(results: Dict[str, Any]) -> None:
+    header = f"{'route':<44} {'reqs':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'sql':>5}"
+    print(header, file=sys.stderr)
+    rows = list(results["routes"].items()) + [("total", results["total"])]
+    for route, summary in rows:
+        latency = summary["latency_ms"]
+        statements = summary["statements_per_request"]["mean"]
+        print(
+            f"{route:<44} {summary['requests']:>7} {summary['throughput_rps']:>8} "
+            f"{latency['p50']:>8} {latency['p95']:>8} {latency['p99']:>8} "
+            f"{statements if statements is not None else '-':>5}",
+            file=sys.stderr,
+        )
+    print(f"peak RSS: {results['memory']['peak_rss_mb']} MB", file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="In-process load test of the API.")
+    parser.add_argument(
+        "--seed",
+        action="store_true",
+        help="Reset the database and seed a synthetic catalog (needs APP_ENV=test).",
+    )
+    parser.add_argument("--books", type=int, default=5)
+    parser.add_argument("--units", type=int, default=8, help="Units per book.")
+    parser.add_argument("--subunits", type=int, default=6, help="Subunits per unit.")
+    parser.add_argument(
+        "--questions", type=int, default=40, help="Questions per subunit."
+    )
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds.")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--random-seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON results to this file.")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_table(results)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
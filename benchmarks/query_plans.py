@@ -0,0 +1,312 @@
+"""
+Query-plan regression check for the service layer.
+
+Every statement issued by `QuizService`, `BookService`, `UserProgressService` and
+`SubscriptionService` (and the answer-key fallback) is captured while the service
+methods run against a seeded database, then explained with the same parameters. The
+check fails when a plan sequentially scans a large table (more than `--min-rows`
+estimated rows), unless the case explicitly allows it.
+
+Writes run inside a transaction that is rolled back at the end.
+
+Usage:
+    APP_ENV=test DATABASE_URL=... python -m benchmarks.query_plans --seed
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Tuple
+from benchmarks.stand_ins import install_fake_firebase
+
+install_fake_firebase()
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from benchmarks.seed import SeedConfig, seed
+from src.db.database import engine
+from src.enums import ContentLanguage, SubscriptionTypeEnum
+from src.models import User
+from src.services import BookService, QuizService, SubscriptionService
+from src.services import UserProgressService
+from src.services.answer_keys import AnswerKeyIndex
+from src.services.content import content_version_cache
+from src.services.subscription import entitlement_cache
+
+# Statements worth explaining; transaction control and the like are skipped
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable[[AsyncSession, Dict[str, int]], Awaitable[Any]]
+    # Tables this case may scan sequentially, e.g. whole-catalog aggregates
+    allow_seq_scan: FrozenSet[str] = frozenset()
+
+
+@dataclass
+class Finding:
+    case: str
+    statement: str
+    seq_scans: List[Tuple[str, float]] = field(default_factory=list)
+
+
+async def _first_page_then_next(db: AsyncSession, ids: Dict[str, int]) -> None:
+    quiz = QuizService(db)
+    _, cursor = await quiz.get_questions_page_by_subunit_id(ids["subunit_id"], 10)
+    await quiz.get_questions_page_by_subunit_id(ids["subunit_id"], 10, cursor)
+
+
+async def _stream(db: AsyncSession, ids: Dict[str, int]) -> None:
+    async def open_session():
+        return AsyncSession(bind=db.bind, join_transaction_mode="create_savepoint")
+
+    async for _ in QuizService.stream_questions_by_subunit_id(
+        ids["subunit_id"], open_session=open_session
+    ):
+        pass
+
+
+async def _progress(db: AsyncSession, ids: Dict[str, int]) -> None:
+    service = UserProgressService(db)
+    service.associate_user(await db.get(User, ids["user_id"]))
+    await service.record_submitted_answers(
+        [
+            {
+                "book_id": ids["book_id"],
+                "unit_id": ids["unit_id"],
+                "sub_unit_id": ids["subunit_id"],
+                "question_id": ids["question_id"],
+                "selected_choice": ids["choice_id"],
+                "is_correct": True,
+            }
+        ]
+    )
+    for scope in ("book", "unit", "subunit"):
+        await service.get_user_progress_by_type(scope, ids[f"{scope}_id"])
+
+
+async def _subscriptions(db: AsyncSession, ids: Dict[str, int]) -> None:
+    service = SubscriptionService(db)
+    entitlement_cache.clear()
+    user_id = ids["subscriber_id"]
+    await service.get_entitlements(user_id)
+    await service.check_user_has_a_full_subscription(user_id)
+    await service.check_user_subscription_for_book(user_id, ids["book_id"])
+    await service.get_all_user_subscriptions(user_id)
+    await service.get_active_subscription(user_id)
+    await service.get_all_subscription_types()
+
+
+async def _create_subscription(db: AsyncSession, ids: Dict[str, int]) -> None:
+    await SubscriptionService(db).create_subscription(
+        ids["user_id"], SubscriptionTypeEnum.BASE_SUBSCRIPTION, ids["book_id"]
+    )
+
+
+async def _content_version(db: AsyncSession, ids: Dict[str, int]) -> None:
+    content_version_cache.invalidate()
+    await BookService(db).get_content_version()
+
+
+CASES = (
+    # The whole catalog counts every question: scanning them is the cheapest plan
+    Case(
+        "BookService.get_all_books",
+        lambda db, ids: BookService(db).get_all_books(),
+        frozenset({"question"}),
+    ),
+    Case(
+        "BookService.get_book_by_id",
+        lambda db, ids: BookService(db).get_book_by_id(ids["book_id"]),
+    ),
+    Case(
+        "BookService.get_units_by_book_id",
+        lambda db, ids: BookService(db).get_units_by_book_id(ids["book_id"]),
+    ),
+    Case(
+        "BookService.get_book_by_unit_id",
+        lambda db, ids: BookService(db).get_book_by_unit_id(ids["unit_id"]),
+    ),
+    Case("BookService.get_content_version", _content_version),
+    Case(
+        "BookService.get_subunit_content",
+        lambda db, ids: BookService(db).get_subunit_content(
+            ids["subunit_id"], ContentLanguage.HI
+        ),
+    ),
+    Case(
+        "QuizService.get_question_with_choices",
+        lambda db, ids: QuizService(db).get_question_with_choices(ids["question_id"]),
+    ),
+    Case(
+        "QuizService.get_questions_by_subunit_id",
+        lambda db, ids: QuizService(db).get_questions_by_subunit_id(ids["subunit_id"]),
+    ),
+    Case("QuizService.get_questions_page_by_subunit_id", _first_page_then_next),
+    Case("QuizService.stream_questions_by_subunit_id", _stream),
+    Case(
+        "QuizService.get_preview_subunit_ids",
+        lambda db, ids: QuizService(db).get_preview_subunit_ids(
+            [ids["subunit_id"], ids["subunit_id"] + 1]
+        ),
+    ),
+    Case(
+        "AnswerKeyIndex.get_many (miss)",
+        lambda db, ids: AnswerKeyIndex().get_many(
+            [ids["question_id"], ids["question_id"] + 1], db
+        ),
+    ),
+    Case("UserProgressService", _progress),
+    Case("SubscriptionService", _subscriptions),
+    Case("SubscriptionService.create_subscription", _create_subscription),
+)
+
+
+async def sample_ids(conn) -> Dict[str, int]:
+    row = (
+        await conn.execute(
+            text(
+                "SELECT q.id AS question_id, c.id AS choice_id, s.id AS subunit_id, "
+                "u.id AS unit_id, u.book_id "
+                "FROM question q "
+                "JOIN choice c ON c.question_id = q.id "
+                "JOIN sub_unit s ON s.id = q.subunit_id "
+                "JOIN unit u ON u.id = s.unit_id "
+                "ORDER BY q.id DESC LIMIT 1"
+            )
+        )
+    ).one()
+    # A user with an active subscription, and one without
+    subscriber_id = await conn.scalar(
+        text("SELECT user_id FROM subscription WHERE active ORDER BY id LIMIT 1")
+    )
+    user_id = await conn.scalar(
+        text(
+            'SELECT id FROM "user" u WHERE NOT EXISTS '
+            "(SELECT 1 FROM subscription s WHERE s.user_id = u.id) "
+            "ORDER BY id LIMIT 1"
+        )
+    )
+    if subscriber_id is None or user_id is None:
+        raise RuntimeError("Seed users with and without subscriptions first: --seed")
+    return {**row._asdict(), "subscriber_id": subscriber_id, "user_id": user_id}
+
+
+def seq_scans(plan: Dict[str, Any]) -> List[Tuple[str, float]]:
+    scans = []
+    if plan.get("Node Type") == "Seq Scan":
+        scans.append((plan["Relation Name"], plan.get("Plan Rows", 0)))
+    for child in plan.get("Plans", []):
+        scans += seq_scans(child)
+    return scans
+
+
+async def check(min_rows: int) -> Tuple[List[Finding], int]:
+    captured: List[Tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(EXPLAINABLE):
+            # Only the first parameter set of an executemany
+            captured.append(
+                (statement, parameters[0] if executemany else parameters or ())
+            )
+
+    findings: List[Finding] = []
+    explained = 0
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        await conn.execute(text("ANALYZE"))
+        large_tables = set(
+            (
+                await conn.execute(
+                    text(
+                        "SELECT relname FROM pg_class "
+                        "WHERE relkind = 'r' AND reltuples >= :min_rows"
+                    ),
+                    {"min_rows": min_rows},
+                )
+            )
+            .scalars()
+            .all()
+        )
+        ids = await sample_ids(conn)
+        driver = (await conn.get_raw_connection()).driver_connection
+
+        for case in CASES:
+            # Commits inside the services only release a savepoint
+            db = AsyncSession(
+                bind=conn,
+                join_transaction_mode="create_savepoint",
+                expire_on_commit=False,
+            )
+            captured.clear()
+            event.listen(engine.sync_engine, "before_cursor_execute", capture)
+            try:
+                await case.run(db, ids)
+            finally:
+                event.remove(engine.sync_engine, "before_cursor_execute", capture)
+                await db.close()
+
+            for statement, parameters in list(captured):
+                plan = await driver.fetchval(
+                    "EXPLAIN (FORMAT JSON) " + statement, *parameters
+                )
+                # The engine registers a JSON codec on its connections
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                explained += 1
+                scans = [
+                    (table, rows)
+                    for table, rows in seq_scans(plan[0]["Plan"])
+                    if table in large_tables and table not in case.allow_seq_scan
+                ]
+                if scans:
+                    findings.append(Finding(case.name, statement, scans))
+
+        await transaction.rollback()
+
+    return findings, explained
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fail on sequential scans.")
+    parser.add_argument(
+        "--seed",
+        action="store_true",
+        help="Reset the database and seed a synthetic catalog (needs APP_ENV=test).",
+    )
+    parser.add_argument(
+        "--min-rows",
+        type=int,
+        default=1000,
+        help="Tables with at least this many rows must not be scanned sequentially.",
+    )
+    args = parser.parse_args()
+
+    async def run():
+        if args.seed:
+            await seed(SeedConfig(books=8, questions=60, users=5000))
+        return await check(args.min_rows)
+
+    findings, explained = asyncio.run(run())
+    for finding in findings:
+        scans = ", ".join(
+            f"{table} (~{rows:.0f} rows returned)" for table, rows in finding.seq_scans
+        )
+        print(f"FAIL {finding.case}: sequential scan of {scans}", file=sys.stderr)
+        print(f"     {' '.join(finding.statement.split())[:300]}", file=sys.stderr)
+
+    print(
+        f"{explained} statements explained, {len(findings)} with sequential scans "
+        f"of large tables",
+        file=sys.stderr,
+    )
+    sys.exit(1 if findings else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Synthetic catalog and user base for the benchmark harness.
+
+The database is reset (every table of the models is dropped and recreated), so this
+refuses to run unless APP_ENV=test.
+"""
+
+import json
+import random
+import tempfile
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict
+from sqlalchemy import insert, text
+from src.cli.import_content import import_bundle
+from src.db.database import Base, engine
+from src.enums import SubscriptionTypeEnum
+from src.models import Subscription, SubscriptionType, User
+from src.settings import get_settings
+
+
+@dataclass
+class SeedConfig:
+    books: int = 5
+    units: int = 8
+    subunits: int = 6
+    questions: int = 40
+    choices: int = 4
+    users: int = 200
+    # Share of the users with a full subscription, and with a single book one
+    full_fraction: float = 0.2
+    book_fraction: float = 0.3
+    # Every n-th subunit is open for preview
+    preview_every: int = 5
+    random_seed: int = 42
+
+
+def user_email(index: int) -> str:
+    return f"bench-user-{index}@example.com"
+
+
+def _write_jsonl(path: Path, records) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def write_bundle(config: SeedConfig, bundle: Path) -> None:
+    """
+    Writes the synthetic catalog as a content bundle (see `src.cli.import_content`).
+    """
+    rng = random.Random(config.random_seed)
+    (bundle / "manifest.json").write_text(
+        json.dumps({"name": "benchmark", "version": "synthetic"})
+    )
+
+    books = [f"b{book}" for book in range(config.books)]
+    units = [(f"{b}u{unit}", b) for b in books for unit in range(config.units)]
+    subunits = [(f"{u}s{sub}", u) for u, _ in units for sub in range(config.subunits)]
+    questions = [
+        (f"{s}q{question}", s)
+        for s, _ in subunits
+        for question in range(config.questions)
+    ]
+
+    _write_jsonl(
+        bundle / "books.jsonl",
+        (
+            {"key": key, "title_en": f"Book {i}", "title_hi": f"पुस्तक {i}"}
+            for i, key in enumerate(books)
+        ),
+    )
+    _write_jsonl(
+        bundle / "units.jsonl",
+        (
+            {
+                "key": key,
+                "book_key": book,
+                "unit_number": i % config.units + 1,
+                "title_en": f"Unit {key}",
+                "title_hi": f"इकाई {key}",
+            }
+            for i, (key, book) in enumerate(units)
+        ),
+    )
+    _write_jsonl(
+        bundle / "subunits.jsonl",
+        (
+            {
+                "key": key,
+                "unit_key": unit,
+                "subunit_number": i % config.subunits + 1,
+                "title_en": f"Subunit {key}",
+                "title_hi": f"उप-इकाई {key}",
+                "content_en": f"Reading material of {key}. " * 40,
+                "content_hi": f"{key} की पाठ्य सामग्री। " * 40,
+                "preview": i % config.preview_every == 0,
+            }
+            for i, (key, unit) in enumerate(subunits)
+        ),
+    )
+    _write_jsonl(
+        bundle / "questions.jsonl",
+        (
+            {
+                "key": key,
+                "subunit_key": subunit,
+                "text_en": f"Which statement about {key} is true?",
+                "text_hi": f"{key} के बारे में कौन सा कथन सत्य है?",
+            }
+            for key, subunit in questions
+        ),
+    )
+
+    def choices():
+        for key, _ in questions:
+            correct = rng.randrange(config.choices)
+            for choice in range(config.choices):
+                yield {
+                    "question_key": key,
+                    "text_en": f"Option {choice} of {key}",
+                    "text_hi": f"{key} का विकल्प {choice}",
+                    "is_correct": choice == correct,
+                }
+
+    _write_jsonl(bundle / "choices.jsonl", choices())
+
+
+async def seed(config: SeedConfig) -> Dict[str, Any]:
+    """
+    Resets the database and loads the synthetic catalog and users.
+    Returns the row counts of the catalog.
+    """
+    if not get_settings().is_test:
+        raise RuntimeError("Seeding resets the database: set APP_ENV=test to allow it")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    with tempfile.TemporaryDirectory(prefix="bench-bundle-") as directory:
+        write_bundle(config, Path(directory))
+        report = await import_bundle(Path(directory))
+
+    rng = random.Random(config.random_seed)
+    now = datetime.now()
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(User),
+            [
+                {
+                    "id": index + 1,
+                    "first_name": "Bench",
+                    "last_name": str(index),
+                    "email": user_email(index),
+                    "phone": f"+91{index:010d}",
+                    "verified": True,
+                    "active": True,
+                }
+                for index in range(config.users)
+            ],
+        )
+        await conn.execute(
+            insert(SubscriptionType),
+            [
+                {
+                    "id": 1,
+                    "name": "Full",
+                    "code": SubscriptionTypeEnum.FULL_SUBSCRIPTION.value,
+                    "cost": 999,
+                },
+                {
+                    "id": 2,
+                    "name": "Base",
+                    "code": SubscriptionTypeEnum.BASE_SUBSCRIPTION.value,
+                    "cost": 199,
+                },
+            ],
+        )
+        book_ids = (await conn.execute(text("SELECT id FROM book"))).scalars().all()
+
+        subscriptions = []
+        for index in range(config.users):
+            draw = rng.random()
+            if draw < config.full_fraction:
+                book_id, type_id = None, 1
+            elif draw < config.full_fraction + config.book_fraction:
+                book_id, type_id = rng.choice(book_ids), 2
+            else:
+                continue
+            subscriptions.append(
+                {
+                    "user_id": index + 1,
+                    "book_id": book_id,
+                    "subscription_type_id": type_id,
+                    "start_date": now,
+                    "end_date": now + timedelta(days=30),
+                    "active": True,
+                }
+            )
+        if subscriptions:
+            await conn.execute(insert(Subscription), subscriptions)
+
+        for table in ("user", "subscription_type"):
+            await conn.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+                    f'(SELECT max(id) FROM "{table}"))'
+                )
+            )
+
+    return {**asdict(config), "rows": report.rows, "subscriptions": len(subscriptions)}
@@ -0,0 +1,163 @@
+"""
+Micro-benchmark of catalog and question serialization: the previous per-request path
+(fresh TypeAdapter, validation, `is_preview` loops, then FastAPI's `response_model`
+validation and JSON rendering) against the pre-encoded fast path of
+`src.serialization`, cold (encoding both variants) and warm (cached bytes).
+
+Usage:
+    python -m benchmarks.serialization [--books 20] [--units 10] [--subunits 10]
+"""
+
+import argparse
+import timeit
+from typing import Any, Callable, Dict, List
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter
+from src.cache import Entitlements
+from src.schemas import Question
+from src.schemas.book import BookBase
+from src.serialization import (
+    BOOK_ADAPTER,
+    QUESTION_LIST_ADAPTER,
+    encode,
+    encode_catalog,
+    json_array,
+)
+
+
+def build_catalog(books: int, units: int, subunits: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": book,
+            "title_en": f"Book {book}",
+            "title_hi": f"पुस्तक {book}",
+            "units": [
+                {
+                    "id": book * units + unit,
+                    "title_en": f"Unit {unit}",
+                    "title_hi": f"इकाई {unit}",
+                    "question_count": subunits * 20,
+                    "subunits": [
+                        {
+                            "id": (book * units + unit) * subunits + subunit,
+                            "title_en": f"Subunit {subunit}",
+                            "title_hi": f"उप-इकाई {subunit}",
+                            "question_count": 20,
+                            "is_preview": subunit == 0,
+                        }
+                        for subunit in range(subunits)
+                    ],
+                }
+                for unit in range(units)
+            ],
+        }
+        for book in range(books)
+    ]
+
+
+def build_questions(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": question,
+            "text_en": f"Question {question}?",
+            "text_hi": f"प्रश्न {question}?",
+            "choices": [
+                {
+                    "id": question * 4 + choice,
+                    "text_en": f"Choice {choice}",
+                    "text_hi": f"विकल्प {choice}",
+                }
+                for choice in range(4)
+            ],
+        }
+        for question in range(count)
+    ]
+
+
+def render(field, content: Any) -> bytes:
+    """
+    What FastAPI does with a route's return value when it has a `response_model`.
+    """
+    # Nothing is awaited for a coroutine endpoint: drive the coroutine without a loop
+    coroutine = serialize_response(field=field, response_content=content)
+    try:
+        coroutine.send(None)
+    except StopIteration as result:
+        return JSONResponse(result.value).body
+    raise RuntimeError("serialize_response suspended")
+
+
+def run(name: str, fn: Callable[[], Any], number: int) -> float:
+    seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"  {name:<34} {seconds * 1e6:>10.1f} µs")
+    return seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serialization micro-benchmark.")
+    parser.add_argument("--books", type=int, default=20)
+    parser.add_argument("--units", type=int, default=10)
+    parser.add_argument("--subunits", type=int, default=10)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    catalog = build_catalog(args.books, args.units, args.subunits)
+    # Half of the books unlocked
+    entitlements = Entitlements(user_id=1, book_ids=frozenset(range(0, args.books, 2)))
+    books_field = create_model_field("books", List[BookBase], mode="serialization")
+
+    def previous_catalog() -> bytes:
+        books = TypeAdapter(List[BookBase]).validate_python(catalog)
+        for book in books:
+            if entitlements.can_access_book(book.id):
+                for unit in book.units:
+                    for subunit in unit.subunits:
+                        subunit.is_preview = True
+        return render(books_field, books)
+
+    def cold_catalog() -> bytes:
+        payloads = [encode_catalog(book["id"], BOOK_ADAPTER, book) for book in catalog]
+        return json_array(
+            payload.for_entitlements(entitlements) for payload in payloads
+        )
+
+    payloads = [encode_catalog(book["id"], BOOK_ADAPTER, book) for book in catalog]
+
+    def warm_catalog() -> bytes:
+        return json_array(
+            payload.for_entitlements(entitlements) for payload in payloads
+        )
+
+    assert previous_catalog() == cold_catalog() == warm_catalog()
+
+    print(
+        f"Catalog: {args.books} books x {args.units} units x {args.subunits} "
+        f"subunits, {len(warm_catalog()):,} bytes"
+    )
+    previous = run("previous path", previous_catalog, args.number)
+    cold = run("fast path, cold", cold_catalog, args.number)
+    warm = run("fast path, warm", warm_catalog, args.number * 10)
+    print(f"  speedup: {previous / cold:.1f}x cold, {previous / warm:.0f}x warm")
+
+    questions = build_questions(args.questions)
+    questions_field = create_model_field(
+        "questions", List[Question], mode="serialization"
+    )
+    body = encode(QUESTION_LIST_ADAPTER, questions)
+    assert render(questions_field, questions) == body
+
+    print(f"Questions: {args.questions} questions x 4 choices, {len(body):,} bytes")
+    previous = run(
+        "previous path", lambda: render(questions_field, questions), args.number
+    )
+    cold = run(
+        "fast path, cold", lambda: encode(QUESTION_LIST_ADAPTER, questions), args.number
+    )
+    print(f"  speedup: {previous / cold:.1f}x cold (warm is a cache lookup)")
+
+
+if __name__ == "__main__":
+    main()
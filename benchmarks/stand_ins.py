@@ -0,0 +1,104 @@
+"""
+Local stand-ins for the benchmark harness: a fake Firebase token verifier and an
+in-process ASGI client.
+"""
+
+import json
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Tokens accepted by the fake verifier: TOKEN_PREFIX + the user's email
+TOKEN_PREFIX = "bench-"
+
+
+def token_for(email: str) -> str:
+    return TOKEN_PREFIX + email
+
+
+def install_fake_firebase() -> None:
+    """
+    Replaces the Firebase Admin SDK setup and token verification, so the app can be
+    imported and authenticated against without credentials or network access.
+
+    Must run before the first token is verified.
+    """
+    import firebase_admin
+    from firebase_admin import auth, credentials
+
+    def verify_id_token(token: str, *args, **kwargs) -> Dict[str, Any]:
+        if not token.startswith(TOKEN_PREFIX):
+            raise ValueError("Not a benchmark token")
+        return {"email": token[len(TOKEN_PREFIX) :], "exp": time.time() + 3600}
+
+    credentials.Certificate = lambda *args, **kwargs: None
+    firebase_admin.initialize_app = lambda *args, **kwargs: None
+    auth.verify_id_token = verify_id_token
+
+
+class ASGIClient:
+    """
+    Minimal HTTP client calling an ASGI app in-process, without sockets.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        json_body: Any = None,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        parts = urlsplit(url)
+        body = b"" if json_body is None else json.dumps(json_body).encode()
+        raw_headers = [
+            (name.lower().encode(), value.encode())
+            for name, value in (headers or {}).items()
+        ]
+        if json_body is not None:
+            raw_headers.append((b"content-type", b"application/json"))
+        raw_headers.append((b"content-length", str(len(body)).encode()))
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": parts.path,
+            "raw_path": parts.path.encode(),
+            "query_string": parts.query.encode(),
+            "root_path": "",
+            "headers": raw_headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("bench", 80),
+        }
+
+        sent = False
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return {"type": "http.disconnect"}
+
+        status = 500
+        response_headers: Dict[str, str] = {}
+        chunks = []
+
+        async def send(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers.update(
+                    (name.decode().lower(), value.decode())
+                    for name, value in message.get("headers", [])
+                )
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return status, response_headers, b"".join(chunks)
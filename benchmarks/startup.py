@@ -0,0 +1,139 @@
+"""
+Cold-start report: how long a fresh worker takes to import the app, and optionally to
+run its startup (lifespan) and answer a first request.
+
+Imports are measured with `python -X importtime` in a fresh interpreter, grouped by
+top-level package, so a dependency that creeps onto the import path shows up as a
+diff between two result files.
+
+Usage:
+    python -m benchmarks.startup [--startup] [--output results.json]
+
+`--startup` needs the database; run it with APP_ENV=production to measure the
+fast-start mode (no schema creation).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Runs in a fresh interpreter: import, lifespan startup, first request
+STARTUP_SNIPPET = """
+import asyncio, json, time
+started = time.perf_counter()
+from src.main import app
+imported = time.perf_counter()
+
+async def main():
+    from benchmarks.stand_ins import ASGIClient
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        status, _, _ = await ASGIClient(app).request("GET", "/health")
+        answered = time.perf_counter()
+    print(json.dumps({
+        "import_s": imported - started,
+        "lifespan_s": ready - imported,
+        "first_request_s": answered - ready,
+        "total_s": answered - started,
+        "health_status": status,
+    }))
+
+asyncio.run(main())
+"""
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": str(ROOT)},
+        capture_output=True,
+        text=True,
+    )
+
+
+def import_report(top: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    result = _run(["-X", "importtime", "-c", "import src.main"])
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing the app failed:\n{result.stderr}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in modules:
+        by_package[name.split(".")[0]] += self_us
+
+    return {
+        "wall_ms": round(wall * 1000, 1),
+        "import_ms": round(sum(self_us for _, self_us, _ in modules) / 1000, 1),
+        "modules": len(modules),
+        "by_package_ms": {
+            package: round(us / 1000, 1)
+            for package, us in sorted(by_package.items(), key=lambda item: -item[1])[
+                :top
+            ]
+        },
+        "slowest_modules_ms": {
+            name: round(self_us / 1000, 1)
+            for name, self_us, _ in sorted(modules, key=lambda module: -module[1])[:top]
+        },
+    }
+
+
+def startup_report() -> Dict[str, Any]:
+    result = _run(["-c", STARTUP_SNIPPET])
+    if result.returncode != 0:
+        raise RuntimeError(f"Starting the app failed:\n{result.stderr}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return {
+        (key[: -len("_s")] + "_ms" if key.endswith("_s") else key): (
+            round(value * 1000, 1) if key.endswith("_s") else value
+        )
+        for key, value in timings.items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold-start report.")
+    parser.add_argument(
+        "--startup",
+        action="store_true",
+        help="Also time the lifespan startup and a first request (needs the database).",
+    )
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="Write the JSON results to this file.")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {
+        "python": sys.version.split()[0],
+        "app_env": os.getenv("APP_ENV", "development"),
+        "imports": import_report(args.top),
+    }
+    if args.startup:
+        results["startup"] = startup_report()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
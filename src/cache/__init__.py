@@ -0,0 +1,18 @@
+from .token import VerifiedTokenCache
+from .entitlements import Entitlements, EntitlementCache
+from .request_memo import RequestMemo
+from .content_version import ContentVersionCache
+from .payloads import PayloadCache
+from .singleflight import SingleFlight
+from .snapshot import CatalogSnapshot
+
+__all__ = [
+    "VerifiedTokenCache",
+    "Entitlements",
+    "EntitlementCache",
+    "RequestMemo",
+    "ContentVersionCache",
+    "PayloadCache",
+    "SingleFlight",
+    "CatalogSnapshot",
+]
@@ -0,0 +1,104 @@
+import asyncio
+import contextvars
+import logging
+import time
+from typing import Awaitable, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ContentVersionCache:
+    """
+    Process-wide copy of the catalog content version, with stale-while-revalidate.
+
+    The version is fresh for `ttl` seconds. After that, the last known version keeps
+    being served (flagged as stale) while a single background task re-reads it, so a
+    slow or unreachable database doesn't hold up catalog requests. A publish is picked
+    up within about `ttl` seconds; a failed re-read is retried after `retry_interval`.
+
+    `on_change` is called with the new version whenever a different one is set, also
+    when the previous one was dropped by `invalidate` meanwhile.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 2.0,
+        retry_interval: float = 1.0,
+        timeout: float = 5.0,
+        on_change: Optional[Callable[[int], None]] = None,
+    ):
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self.on_change = on_change
+        self._version: Optional[int] = None
+        # Last version set, kept through `invalidate` to detect changes
+        self._last_set: Optional[int] = None
+        self._expires_at = 0.0
+        self._retry_at = 0.0
+        self._refresh: Optional[asyncio.Task] = None
+
+    def get(self) -> Optional[int]:
+        """
+        The version, if it is still fresh.
+        """
+        version, stale = self.peek()
+        return None if stale else version
+
+    def peek(self) -> Tuple[Optional[int], bool]:
+        """
+        The last known version (None if it was never read), and whether it is stale.
+        """
+        return self._version, self._expires_at <= time.monotonic()
+
+    def set(self, version: int) -> None:
+        previous = self._last_set
+        self._version = self._last_set = version
+        self._expires_at = time.monotonic() + self.ttl
+        if self.on_change is not None and previous not in (None, version):
+            self.on_change(version)
+
+    def invalidate(self) -> None:
+        self._version = None
+
+    def revalidate(self, load: Callable[[], Awaitable[int]]) -> None:
+        """
+        Re-reads the version with `load` in the background, unless a re-read is already
+        running or the last one failed less than `retry_interval` seconds ago.
+        """
+        running = self._refresh
+        if (
+            running is not None
+            and not running.done()
+            and running.get_loop() is asyncio.get_running_loop()
+        ):
+            return
+        if self._retry_at > time.monotonic():
+            return
+        # Outside the calling request's context, so its statements aren't counted there
+        self._refresh = asyncio.create_task(
+            self._revalidate(load), context=contextvars.Context()
+        )
+
+    async def _revalidate(self, load: Callable[[], Awaitable[int]]) -> None:
+        try:
+            self.set(await asyncio.wait_for(load(), self.timeout))
+        except Exception:
+            self._retry_at = time.monotonic() + self.retry_interval
+            logger.warning(
+                "Failed to re-read the content version, serving version %s",
+                self._version,
+                exc_info=True,
+            )
+
+    async def stop(self) -> None:
+        """
+        Cancels a running re-read, at shutdown.
+        """
+        if self._refresh is not None and not self._refresh.done():
+            self._refresh.cancel()
+            try:
+                await self._refresh
+            except asyncio.CancelledError:
+                pass
+        self._refresh = None
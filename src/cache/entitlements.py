@@ -0,0 +1,74 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import FrozenSet, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Entitlements:
+    """
+    Immutable snapshot of what a user's active subscriptions give access to.
+    """
+
+    user_id: int
+    full_access: bool = False
+    book_ids: FrozenSet[int] = frozenset()
+
+    def can_access_book(self, book_id: int) -> bool:
+        return self.full_access or book_id in self.book_ids
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Identifies what the user can access, independently of who the user is: users
+        with the same entitlements get the same fingerprint.
+        """
+        if self.full_access:
+            return "full"
+        return "books:" + ",".join(str(book_id) for book_id in sorted(self.book_ids))
+
+
+class EntitlementCache:
+    """
+    Per-user cache of entitlement snapshots.
+
+    Entries are dropped explicitly when a user's subscriptions change, and otherwise
+    expire after `ttl` seconds so subscriptions ending in the database are picked up.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, Tuple[float, Entitlements]]" = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[Entitlements]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+
+        expires_at, entitlements = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            return None
+
+        self._entries.move_to_end(user_id)
+        return entitlements
+
+    def set(self, entitlements: Entitlements) -> None:
+        self._entries[entitlements.user_id] = (
+            time.monotonic() + self.ttl,
+            entitlements,
+        )
+        self._entries.move_to_end(entitlements.user_id)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
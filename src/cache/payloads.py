@@ -0,0 +1,70 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class PayloadCache:
+    """
+    LRU cache of encoded response payloads.
+
+    Keys start with the catalog content version, so publishing content makes every
+    older entry unreachable; `retain_version` then drops them, so memory stays bounded
+    by `maxsize` entries of the current version.
+
+    With `max_bytes`, the entries are also bounded by their total size, as measured by
+    `sizeof`; a payload larger than `max_bytes` on its own isn't kept.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 4096,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = len,
+    ):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            self._discard(key)
+            return
+
+        self._discard(key)
+        self._entries[key] = value
+        self._sizes[key] = size
+        self.nbytes += size
+
+        while len(self._entries) > self.maxsize or (
+            self.max_bytes is not None and self.nbytes > self.max_bytes
+        ):
+            self._discard(next(iter(self._entries)))
+
+    def _discard(self, key: Hashable) -> None:
+        if key in self._entries:
+            del self._entries[key]
+            self.nbytes -= self._sizes.pop(key)
+
+    def retain_version(self, version: int) -> None:
+        """
+        Drops the entries of every other content version.
+        """
+        for key in [key for key in self._entries if key[0] != version]:
+            self._discard(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._sizes.clear()
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
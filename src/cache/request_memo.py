@@ -0,0 +1,55 @@
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, Optional, Tuple
+from src.db import instrumentation
+
+
+class RequestMemo:
+    """
+    Objects already loaded during the current request (questions, subunits, users),
+    shared by the dependencies and services of that request.
+
+    Each entry records which relationship paths were eagerly loaded with it (see
+    `load_profiles.profile_paths`), so a lookup only hits when everything the caller
+    is going to access is already there.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, Hashable], Tuple[Any, FrozenSet[str]]] = {}
+        self.hits = 0
+
+    def get(self, kind: str, key: Hashable, paths: Iterable[str] = ()) -> Optional[Any]:
+        """
+        Returns the memoized object if it was loaded with at least `paths`.
+        """
+        value, loaded = self.peek(kind, key)
+        if value is None or not loaded.issuperset(paths):
+            return None
+
+        self.record_hit()
+        return value
+
+    def peek(self, kind: str, key: Hashable) -> Tuple[Optional[Any], FrozenSet[str]]:
+        """
+        Returns the memoized object and its loaded paths, without counting a hit.
+        """
+        return self._entries.get((kind, key), (None, frozenset()))
+
+    def put(
+        self, kind: str, key: Hashable, value: Any, paths: Iterable[str] = ()
+    ) -> None:
+        existing, loaded = self.peek(kind, key)
+        paths = frozenset(paths)
+        if existing is value:
+            paths |= loaded
+        self._entries[(kind, key)] = (value, paths)
+
+    def discard(self, kind: str, key: Hashable) -> None:
+        self._entries.pop((kind, key), None)
+
+    def record_hit(self) -> None:
+        """
+        Counts a database load avoided thanks to the memo.
+        """
+        self.hits += 1
+        stats = instrumentation.current_request_stats()
+        if stats is not None:
+            stats.memo_hits += 1
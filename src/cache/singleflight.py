@@ -0,0 +1,65 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+from src import metrics
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent loads of the same key: the first caller (the leader) runs its
+    load, and callers arriving while it is in flight await it and share its result or
+    exception instead of running their own. Nothing is kept once the load completes.
+
+    The load runs in the leader's own task, so it uses the leader's database session and
+    its statements are counted in the leader's request. Callers share the very same
+    result object and must not modify it.
+
+    Cancellation: a cancelled follower just stops waiting. When the leader is cancelled,
+    its load is abandoned and one of the followers takes over with its own load.
+    """
+
+    def __init__(self, name: str):
+        # Label of the `singleflight_calls_total` metric
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            call = self._calls.get(key)
+            if call is None:
+                return await self._lead(key, load)
+
+            metrics.singleflight_calls_total.inc(self.name, "coalesced")
+            try:
+                # Shielded: a follower's cancellation must not cancel the shared call
+                return await asyncio.shield(call)
+            except asyncio.CancelledError:
+                # Only the leader was cancelled: take over the load
+                if call.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+
+    async def _lead(self, key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        call = asyncio.get_running_loop().create_future()
+        self._calls[key] = call
+        metrics.singleflight_calls_total.inc(self.name, "load")
+        try:
+            result = await load()
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except BaseException as exc:
+            call.set_exception(exc)
+            # Marks it retrieved, so an unshared failure isn't logged as never retrieved
+            call.exception()
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,277 @@
+"""
+Binary snapshot of the catalog content graph, shared by the workers of a host.
+
+A builder writes the file once; every worker maps it read-only with `mmap`, and reads
+its columns through memoryviews, without copying them into the process.
+
+Layout (native byte order: a snapshot is built and read on the same host):
+
+    header    magic | format version | section count | content version | source
+    sections  one entry per column: name | offset | length in bytes | typecode
+    data      the columns, each aligned on 8 bytes
+
+Columns (int32 unless noted), in catalog order: books by id, units by unit number
+within their book, subunits by subunit number within their unit.
+
+    books.id, books.title_en, books.title_hi, books.unit_start
+    units.id, units.book_id, units.title_en, units.title_hi, units.subunit_start,
+        units.by_id (unit positions, sorted by unit id)
+    subunits.id, subunits.unit_id, subunits.title_en, subunits.title_hi,
+        subunits.question_count, subunits.preview (uint8), subunits.by_id
+    questions.id (sorted), questions.subunit_id, questions.correct_choice_id (0 when
+        none), questions.choice_start
+    choices.id
+    strings.offsets (uint32), strings.data (uint8, UTF-8)
+
+Titles are indexes into the string table (-1 for NULL). The children of book i are
+the units `unit_start[i]:unit_start[i + 1]`, and likewise for the subunits of a unit
+and the choices of a question.
+"""
+
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+MAGIC = b"GKCATSNP"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("=8sIIQ16s")
+_SECTION = struct.Struct("=32sQQc7x")
+_ALIGNMENT = 8
+
+
+class SnapshotError(Exception):
+    """
+    The file is not a snapshot this code can read.
+    """
+
+
+class StringTable:
+    """
+    Collects the strings of a snapshot being built.
+    """
+
+    def __init__(self):
+        self.offsets = array("I", [0])
+        self.data = bytearray()
+
+    def add(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        self.data += value.encode()
+        self.offsets.append(len(self.data))
+        return len(self.offsets) - 2
+
+
+def write_snapshot(
+    path: Union[str, Path],
+    content_version: int,
+    source: bytes,
+    columns: Dict[str, Union[array, bytes, bytearray]],
+) -> int:
+    """
+    Writes a snapshot and atomically replaces `path` with it: a worker mapping the file
+    sees either the previous snapshot or the new one, never a partial write.
+    Returns the size of the file.
+    """
+    path = Path(path)
+    entries = []
+    offset = _HEADER.size + _SECTION.size * len(columns)
+    for name, column in columns.items():
+        if len(name.encode()) > 32:
+            raise ValueError(f"Column name {name!r} is longer than 32 bytes")
+        offset += -offset % _ALIGNMENT
+        typecode = column.typecode if isinstance(column, array) else "B"
+        length = len(column) * (column.itemsize if isinstance(column, array) else 1)
+        entries.append((name, offset, length, typecode, column))
+        offset += length
+    size = offset
+
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(temporary, "wb") as f:
+            f.write(
+                _HEADER.pack(
+                    MAGIC, FORMAT_VERSION, len(entries), content_version, source
+                )
+            )
+            for name, offset, length, typecode, _ in entries:
+                f.write(_SECTION.pack(name.encode(), offset, length, typecode.encode()))
+            for _, offset, _, _, column in entries:
+                f.write(b"\0" * (offset - f.tell()))
+                f.write(column)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+    finally:
+        if temporary.exists():
+            temporary.unlink()
+
+    # Make the rename itself durable
+    directory = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+    return size
+
+
+class CatalogSnapshot:
+    """
+    A snapshot file mapped read-only. The columns are memoryviews over the mapping, so
+    they are shared with every other worker mapping the same file.
+
+    The mapping is never closed explicitly: it is released once the snapshot and every
+    view taken from it are garbage collected, so a swapped-out snapshot stays valid for
+    the requests still using it.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size < _HEADER.size:
+                raise SnapshotError(f"{self.path} is too short to be a snapshot")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # Identifies the file, so a replaced one is noticed
+        self.file_id = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+
+        buffer = memoryview(self._mmap)
+        magic, format_version, count, self.content_version, self.source = (
+            _HEADER.unpack_from(buffer)
+        )
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise SnapshotError(
+                f"{self.path} is not a version {FORMAT_VERSION} snapshot"
+            )
+
+        self._columns: Dict[str, memoryview] = {}
+        for i in range(count):
+            name, offset, length, typecode = _SECTION.unpack_from(
+                buffer, _HEADER.size + i * _SECTION.size
+            )
+            if offset + length > len(buffer):
+                raise SnapshotError(f"{self.path} is truncated")
+            self._columns[name.rstrip(b"\0").decode()] = buffer[
+                offset : offset + length
+            ].cast(typecode.decode())
+
+        self.book_ids = self.column("books.id")
+        self.unit_ids = self.column("units.id")
+        self.subunit_ids = self.column("subunits.id")
+        self._strings = self.column("strings.data")
+        self._string_offsets = self.column("strings.offsets")
+
+    def column(self, name: str) -> memoryview:
+        try:
+            return self._columns[name]
+        except KeyError:
+            raise SnapshotError(f"{self.path} has no {name} column") from None
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._mmap)
+
+    def string(self, index: int) -> Optional[str]:
+        if index < 0:
+            return None
+        start, end = self._string_offsets[index], self._string_offsets[index + 1]
+        return str(self._strings[start:end], "utf-8")
+
+    def _position(self, ids: memoryview, by_id: memoryview, id: int) -> Optional[int]:
+        """
+        Position of `id` in a column that isn't sorted by id, through its by_id index.
+        """
+        i = bisect_left(by_id, id, key=lambda position: ids[position])
+        if i == len(by_id) or ids[by_id[i]] != id:
+            return None
+        return by_id[i]
+
+    def subunit_parents(self) -> Dict[int, Tuple[int, int]]:
+        """
+        Subunit id -> (unit id, book id).
+        """
+        unit_book_ids = self.column("units.book_id")
+        unit_start = self.column("units.subunit_start")
+        parents = {}
+        for unit in range(len(self.unit_ids)):
+            parent = (self.unit_ids[unit], unit_book_ids[unit])
+            for subunit in range(unit_start[unit], unit_start[unit + 1]):
+                parents[self.subunit_ids[subunit]] = parent
+        return parents
+
+    def preview_subunit_ids(self, subunit_ids: Iterable[int]) -> Set[int]:
+        """
+        Which of the given subunits are open for preview.
+        """
+        by_id, preview = self.column("subunits.by_id"), self.column("subunits.preview")
+        previewed = set()
+        for subunit_id in subunit_ids:
+            position = self._position(self.subunit_ids, by_id, subunit_id)
+            if position is not None and preview[position]:
+                previewed.add(subunit_id)
+        return previewed
+
+    def materialize(
+        self, book_id: Optional[int] = None, unit_id: Optional[int] = None
+    ) -> List[Dict[str, any]]:
+        """
+        The catalog tree, in the shape and order of `CatalogMaterializer.materialize`.
+        """
+        book_unit_start = self.column("books.unit_start")
+        if unit_id is not None:
+            unit = self._position(self.unit_ids, self.column("units.by_id"), unit_id)
+            if unit is None:
+                return []
+            book = bisect_left(self.book_ids, self.column("units.book_id")[unit])
+            scopes = [(book, range(unit, unit + 1))]
+        elif book_id is not None:
+            book = bisect_left(self.book_ids, book_id)
+            if book == len(self.book_ids) or self.book_ids[book] != book_id:
+                return []
+            scopes = [(book, range(book_unit_start[book], book_unit_start[book + 1]))]
+        else:
+            scopes = [
+                (book, range(book_unit_start[book], book_unit_start[book + 1]))
+                for book in range(len(self.book_ids))
+            ]
+
+        book_titles = self.column("books.title_en"), self.column("books.title_hi")
+        return [
+            {
+                "id": self.book_ids[book],
+                "title_en": self.string(book_titles[0][book]),
+                "title_hi": self.string(book_titles[1][book]),
+                "units": [self._unit(unit) for unit in units],
+            }
+            for book, units in scopes
+        ]
+
+    def _unit(self, unit: int) -> Dict[str, any]:
+        start = self.column("units.subunit_start")
+        title_en = self.column("subunits.title_en")
+        title_hi = self.column("subunits.title_hi")
+        question_count = self.column("subunits.question_count")
+        preview = self.column("subunits.preview")
+
+        subunits = [
+            {
+                "id": self.subunit_ids[subunit],
+                "title_en": self.string(title_en[subunit]),
+                "title_hi": self.string(title_hi[subunit]),
+                "question_count": question_count[subunit],
+                "is_preview": bool(preview[subunit]),
+            }
+            for subunit in range(start[unit], start[unit + 1])
+        ]
+        return {
+            "id": self.unit_ids[unit],
+            "title_en": self.string(self.column("units.title_en")[unit]),
+            "title_hi": self.string(self.column("units.title_hi")[unit]),
+            "question_count": sum(subunit["question_count"] for subunit in subunits),
+            "subunits": subunits,
+        }
@@ -0,0 +1,61 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of verified ID token claims.
+
+    Entries are keyed by a SHA-256 digest of the token (the raw token is never stored)
+    and expire at the token's own `exp` claim, so a cached entry can never outlive the
+    token it was verified from.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, any]]]" = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, any]]:
+        """
+        Returns the cached claims for the token, or None if missing or expired.
+        """
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return claims
+
+    def set(self, token: str, claims: Dict[str, any]) -> None:
+        """
+        Caches verified claims until the token's `exp`. Claims without `exp` are not cached.
+        """
+        expires_at = claims.get("exp")
+        if not expires_at or expires_at <= time.time():
+            return
+
+        key = self._key(token)
+        self._entries[key] = (float(expires_at), claims)
+        self._entries.move_to_end(key)
+
+        # Evict the least recently used entries once the bound is reached
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
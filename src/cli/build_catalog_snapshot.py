@@ -0,0 +1,46 @@
+"""
+Build the catalog snapshot shared by the workers of a host (see
+`src.services.catalog_snapshot`), e.g. right after publishing content or before
+starting the workers, so none of them has to build it.
+
+Usage:
+    python -m src.cli.build_catalog_snapshot [--path PATH]
+
+The path defaults to CATALOG_SNAPSHOT_PATH.
+"""
+
+import argparse
+import asyncio
+from src.services.catalog_snapshot import CatalogSnapshotStore
+from src.settings import get_settings
+
+
+async def build(path: str) -> None:
+    store = CatalogSnapshotStore(path)
+    # Same lock as the workers, so a worker building at the same time waits
+    lock = await asyncio.get_running_loop().run_in_executor(None, store.lock)
+    try:
+        snapshot = await store.build()
+    finally:
+        lock.close()
+
+    print(
+        f"Catalog snapshot of content version {snapshot.content_version} written to "
+        f"{snapshot.path}: {len(snapshot.book_ids)} books, {len(snapshot.unit_ids)} "
+        f"units, {len(snapshot.subunit_ids)} subunits, "
+        f"{len(snapshot.column('questions.id'))} questions, {snapshot.nbytes} bytes"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the catalog snapshot.")
+    parser.add_argument("--path", default=get_settings().catalog_snapshot_path)
+    args = parser.parse_args()
+    if not args.path:
+        parser.error("Set CATALOG_SNAPSHOT_PATH or pass --path")
+
+    asyncio.run(build(args.path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Bulk-load a content bundle (books -> units -> subunits -> questions -> choices).
+
+A bundle is a directory holding a `manifest.json` ({"name": ..., "version": ...}) and
+one file per entity, as JSON lines or CSV with a header row:
+
+    books.jsonl      key, title_en, title_hi
+    units.jsonl      key, book_key | book_id, unit_number, title_en, title_hi
+    subunits.jsonl   key, unit_key | unit_id, subunit_number, title_en, title_hi,
+                     content_en, content_hi, preview
+    questions.jsonl  key, subunit_key | subunit_id, text_en, text_hi
+    choices.jsonl    question_key | question_id, text_en, text_hi, is_correct
+
+`key` is local to the bundle and only used to link children to their parent; a child
+may instead point at a row already in the database with `<parent>_id`. A record with
+an `id` updates that existing row, every other record gets a new id. Choices have no
+key to match them with, so those of a question that already has choices need their
+`id`: re-imported without it, they would be added next to the existing ones.
+
+All files are copied into temporary staging tables with COPY, then merged into the
+content tables in a single transaction: either the whole bundle is imported, or none
+of it. The catalog content version is bumped in the same transaction, so clients
+holding a catalog ETag see the new content once it is committed, and the running
+workers are notified on commit.
+
+Usage:
+    python -m src.cli.import_content path/to/bundle
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import asyncpg
+from src.db.database import engine
+from src.services.invalidation import CHANNEL, ContentVersionBumped, encode_event
+
+
+@dataclass(frozen=True)
+class _Entity:
+    # Bundle file stem, e.g. "units"
+    name: str
+    # Content table the rows are merged into
+    table: str
+    # Bundle fields copied to the content table, with their SQL types
+    columns: Tuple[Tuple[str, str], ...]
+    # Parent reference: `<parent>_key` (bundle key) or `<parent>_id` (existing row)
+    parent: Optional[str] = None
+    parent_entity: Optional[str] = None
+    # Whether records carry a bundle-local key that children refer to
+    keyed: bool = True
+    # Bundle fields only used while staging
+    extra: Tuple[Tuple[str, str], ...] = ()
+
+    @property
+    def staging_table(self) -> str:
+        return f"staging_{self.name}"
+
+    @property
+    def staging_columns(self) -> List[Tuple[str, str]]:
+        columns = [("key", "text")] if self.keyed else []
+        columns.append(("id", "integer"))
+        if self.parent:
+            columns += [
+                (f"{self.parent}_key", "text"),
+                (f"{self.parent}_id", "integer"),
+            ]
+        return columns + list(self.columns) + list(self.extra)
+
+
+# In dependency order: parents are merged before their children
+ENTITIES = (
+    _Entity("books", "book", (("title_en", "text"), ("title_hi", "text"))),
+    _Entity(
+        "units",
+        "unit",
+        (("unit_number", "integer"), ("title_en", "text"), ("title_hi", "text")),
+        parent="book",
+        parent_entity="books",
+    ),
+    _Entity(
+        "subunits",
+        "sub_unit",
+        (
+            ("subunit_number", "integer"),
+            ("title_en", "text"),
+            ("title_hi", "text"),
+            ("content_en", "text"),
+            ("content_hi", "text"),
+        ),
+        parent="unit",
+        parent_entity="units",
+        extra=(("preview", "boolean"),),
+    ),
+    _Entity(
+        "questions",
+        "question",
+        (("text_en", "text"), ("text_hi", "text")),
+        parent="subunit",
+        parent_entity="subunits",
+    ),
+    _Entity(
+        "choices",
+        "choice",
+        (("text_en", "text"), ("text_hi", "text"), ("is_correct", "boolean")),
+        parent="question",
+        parent_entity="questions",
+        keyed=False,
+    ),
+)
+
+
+class BundleError(Exception):
+    """
+    The bundle is malformed or inconsistent; nothing was imported.
+    """
+
+
+@dataclass
+class ImportReport:
+    name: str
+    version: str
+    rows: Dict[str, int] = field(default_factory=dict)
+    copy_seconds: float = 0.0
+    merge_seconds: float = 0.0
+    content_version: Optional[int] = None
+
+    @property
+    def total_rows(self) -> int:
+        return sum(self.rows.values())
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.copy_seconds + self.merge_seconds
+        return self.total_rows / elapsed if elapsed else 0.0
+
+
+def _coerce(value: Any, sql_type: str, source: str) -> Any:
+    if value is None or value == "":
+        return None
+    try:
+        if sql_type == "integer":
+            return int(value)
+        if sql_type == "boolean":
+            if isinstance(value, bool):
+                return value
+            return str(value).strip().lower() in ("1", "true", "t", "yes", "y")
+    except ValueError:
+        raise BundleError(f"{source}: expected {sql_type}, got {value!r}") from None
+    return str(value)
+
+
+def _bundle_file(bundle: Path, entity: _Entity) -> Optional[Path]:
+    for suffix in (".jsonl", ".csv"):
+        path = bundle / f"{entity.name}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def _read_records(path: Path) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Yields (line number, record) from a JSON lines or CSV file.
+    """
+    with path.open(newline="", encoding="utf-8") as f:
+        if path.suffix == ".csv":
+            # Line 1 is the header
+            for line, record in enumerate(csv.DictReader(f), start=2):
+                yield line, record
+        else:
+            for line, text in enumerate(f, start=1):
+                if text.strip():
+                    try:
+                        yield line, json.loads(text)
+                    except json.JSONDecodeError as e:
+                        raise BundleError(f"{path.name}:{line}: {e}") from None
+
+
+def _staging_records(path: Path, entity: _Entity) -> Iterator[Tuple]:
+    columns = entity.staging_columns
+    for line, record in _read_records(path):
+        source = f"{path.name}:{line}"
+        if entity.keyed and record.get("key") in (None, ""):
+            raise BundleError(f"{source}: missing key")
+        yield tuple(
+            _coerce(record.get(name), sql_type, source) for name, sql_type in columns
+        )
+
+
+def _merge_statements(entity: _Entity) -> List[str]:
+    """
+    SQL assigning ids to an entity's staged rows and upserting them into its table.
+    """
+    staging, table = entity.staging_table, entity.table
+    statements = [
+        f"UPDATE {staging} SET new_id = "
+        f"COALESCE(id, nextval(pg_get_serial_sequence('{table}', 'id')))"
+    ]
+
+    target = ["id"] + [name for name, _ in entity.columns]
+    source = ["s.new_id"] + [f"s.{name}" for name, _ in entity.columns]
+    joins = ""
+    if entity.parent:
+        target.append(f"{entity.parent}_id")
+        source.append(f"COALESCE(p.new_id, s.{entity.parent}_id)")
+        parent_staging = f"staging_{entity.parent_entity}"
+        joins = f" LEFT JOIN {parent_staging} p ON p.key = s.{entity.parent}_key"
+
+    updates = ", ".join(f"{name} = EXCLUDED.{name}" for name in target[1:])
+    statements.append(
+        f"INSERT INTO {table} ({', '.join(target)}) "
+        f"SELECT {', '.join(source)} FROM {staging} s{joins} "
+        f"ON CONFLICT (id) DO UPDATE SET {updates}"
+    )
+    return statements
+
+
+async def _validate(conn, entity: _Entity) -> None:
+    staging = entity.staging_table
+    if entity.keyed:
+        duplicate = await conn.fetchval(
+            f"SELECT key FROM {staging} GROUP BY key HAVING count(*) > 1 LIMIT 1"
+        )
+        if duplicate is not None:
+            raise BundleError(f"{entity.name}: duplicate key {duplicate!r}")
+
+    if entity.parent:
+        parent_key, parent_id = f"{entity.parent}_key", f"{entity.parent}_id"
+        parent_staging = f"staging_{entity.parent_entity}"
+        orphan = await conn.fetchrow(
+            f"SELECT s.{parent_key}, s.{parent_id} FROM {staging} s "
+            f"LEFT JOIN {parent_staging} p ON p.key = s.{parent_key} "
+            f"WHERE (s.{parent_key} IS NOT NULL AND p.key IS NULL) "
+            f"OR (s.{parent_key} IS NULL AND s.{parent_id} IS NULL) LIMIT 1"
+        )
+        if orphan is not None:
+            raise BundleError(
+                f"{entity.name}: unknown or missing {entity.parent} "
+                f"(key={orphan[0]!r}, id={orphan[1]!r})"
+            )
+
+        if not entity.keyed:
+            # Parents are merged first, so p.new_id is the parent's id in the database.
+            # min() rather than LIMIT 1, which leads the planner to nested loops
+            parent = await conn.fetchval(
+                f"SELECT min(n.parent_id) FROM (SELECT COALESCE(p.new_id, "
+                f"s.{parent_id}) AS parent_id FROM {staging} s "
+                f"LEFT JOIN {parent_staging} p ON p.key = s.{parent_key} "
+                f"WHERE s.id IS NULL) n WHERE EXISTS "
+                f"(SELECT 1 FROM {entity.table} t WHERE t.{parent_id} = n.parent_id)"
+            )
+            if parent is not None:
+                raise BundleError(
+                    f"{entity.name}: {entity.parent} {parent} already has "
+                    f"{entity.name}, records for it need their id"
+                )
+
+
+async def import_bundle(bundle: Path) -> ImportReport:
+    """
+    Imports a content bundle in one transaction and returns what was loaded.
+    Raises BundleError, without importing anything, if the bundle is invalid.
+    """
+    manifest_path = bundle / "manifest.json"
+    if not manifest_path.exists():
+        raise BundleError(f"{bundle}: manifest.json not found")
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if not manifest.get("version"):
+        raise BundleError("manifest.json: missing version")
+
+    report = ImportReport(
+        name=manifest.get("name", bundle.name), version=str(manifest["version"])
+    )
+
+    async with engine.connect() as sa_conn:
+        # COPY is only available on the driver connection
+        conn = (await sa_conn.get_raw_connection()).driver_connection
+
+        async with conn.transaction():
+            started = time.perf_counter()
+            for entity in ENTITIES:
+                columns = entity.staging_columns
+                await conn.execute(
+                    f"CREATE TEMPORARY TABLE {entity.staging_table} ("
+                    + ", ".join(f"{name} {sql_type}" for name, sql_type in columns)
+                    + ", new_id integer) ON COMMIT DROP"
+                )
+
+                path = _bundle_file(bundle, entity)
+                if path is None:
+                    report.rows[entity.name] = 0
+                    continue
+
+                await conn.copy_records_to_table(
+                    entity.staging_table,
+                    records=_staging_records(path, entity),
+                    columns=[name for name, _ in columns],
+                )
+                report.rows[entity.name] = await conn.fetchval(
+                    f"SELECT count(*) FROM {entity.staging_table}"
+                )
+            report.copy_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for entity in ENTITIES:
+                # Statistics first: the validation joins staging tables too
+                if report.rows[entity.name]:
+                    await conn.execute(f"ANALYZE {entity.staging_table}")
+                await _validate(conn, entity)
+                if report.rows[entity.name]:
+                    for statement in _merge_statements(entity):
+                        await conn.execute(statement)
+
+            # Subunits flagged for preview
+            await conn.execute(
+                "INSERT INTO preview_subunit (subunit_id, available_for_preview) "
+                "SELECT s.new_id, true FROM staging_subunits s WHERE s.preview "
+                "AND NOT EXISTS "
+                "(SELECT 1 FROM preview_subunit p WHERE p.subunit_id = s.new_id)"
+            )
+
+            # Explicit ids must never be handed out again by the sequences
+            for entity in ENTITIES:
+                sequence = f"pg_get_serial_sequence('{entity.table}', 'id')"
+                await conn.execute(
+                    f"SELECT setval({sequence}, GREATEST(max_id, nextval({sequence}))) "
+                    f"FROM (SELECT max(id) AS max_id FROM {entity.staging_table}) s "
+                    f"WHERE max_id IS NOT NULL"
+                )
+
+            # New catalog ETags (see `check_catalog_etag`). The catalog triggers only
+            # bump an existing counter row: this also creates it
+            report.content_version = await conn.fetchval(
+                "INSERT INTO content_version (id, version) VALUES (1, 1) "
+                "ON CONFLICT (id) DO UPDATE SET "
+                "version = content_version.version + 1, updated_at = now() "
+                "RETURNING version"
+            )
+            # Tell the workers, once committed (see `src.services.invalidation`)
+            await conn.execute(
+                "SELECT pg_notify($1, $2)",
+                CHANNEL,
+                encode_event(ContentVersionBumped(report.content_version)),
+            )
+            report.merge_seconds = time.perf_counter() - started
+
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import a content bundle.")
+    parser.add_argument("bundle", type=Path, help="Directory holding the bundle.")
+    args = parser.parse_args()
+
+    try:
+        report = asyncio.run(import_bundle(args.bundle))
+    except (BundleError, asyncpg.PostgresError) as e:
+        parser.exit(1, f"Import failed, nothing was imported: {e}\n")
+
+    print(
+        f"Imported {report.name} version {report.version} "
+        f"(content version {report.content_version})"
+    )
+    for name, rows in report.rows.items():
+        print(f"  {name}: {rows} rows")
+    print(
+        f"{report.total_rows} rows in {report.copy_seconds:.2f}s copy + "
+        f"{report.merge_seconds:.2f}s merge ({report.rows_per_second:,.0f} rows/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Recompute the `user_progress_rollup` table from `user_progress` in bulk.
+
+Usage:
+    python -m src.cli.rebuild_progress_rollups [--user-id ID]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Optional
+from sqlalchemy import and_, delete, func, literal, text, true
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.future import select
+from src.db.database import async_session
+from src.models import UserProgress, UserProgressRollup
+from src.enums.enums import QuestionStatus
+from src.services.progress_writer import ROLLUP_SCOPES, SUBMISSION_LOCK_NAMESPACE
+
+
+def build_rollup_rebuild(scope, column: str, user_id: Optional[int] = None):
+    """
+    INSERT ... SELECT computing every rollup row of one scope type: the counters from a
+    GROUP BY, and the last-touched question from a DISTINCT ON over `updated_at`.
+    """
+    scope_id = getattr(UserProgress, column)
+    user_filter = UserProgress.user_id == user_id if user_id is not None else true()
+
+    counts = (
+        select(
+            UserProgress.user_id,
+            scope_id.label("scope_id"),
+            func.count()
+            .filter(UserProgress.status == QuestionStatus.SUBMITTED)
+            .label("total_attempted"),
+            func.count().filter(UserProgress.is_correct).label("total_correct"),
+        )
+        .filter(user_filter)
+        .group_by(UserProgress.user_id, scope_id)
+        .subquery()
+    )
+    latest = (
+        select(
+            UserProgress.user_id,
+            scope_id.label("scope_id"),
+            UserProgress.unit_id,
+            UserProgress.sub_unit_id,
+            UserProgress.question_id,
+            UserProgress.status,
+            UserProgress.updated_at,
+        )
+        .filter(user_filter)
+        .distinct(UserProgress.user_id, scope_id)
+        .order_by(
+            UserProgress.user_id,
+            scope_id,
+            UserProgress.updated_at.desc().nulls_last(),
+        )
+        .subquery()
+    )
+
+    return insert(UserProgressRollup).from_select(
+        [
+            "user_id",
+            "scope_type",
+            "scope_id",
+            "total_attempted",
+            "total_correct",
+            "last_unit_id",
+            "last_sub_unit_id",
+            "last_question_id",
+            "last_status",
+            "last_touched_at",
+        ],
+        select(
+            counts.c.user_id,
+            literal(scope, UserProgressRollup.scope_type.type),
+            counts.c.scope_id,
+            counts.c.total_attempted,
+            counts.c.total_correct,
+            latest.c.unit_id,
+            latest.c.sub_unit_id,
+            latest.c.question_id,
+            latest.c.status,
+            latest.c.updated_at,
+        ).join(
+            latest,
+            and_(
+                latest.c.user_id == counts.c.user_id,
+                latest.c.scope_id == counts.c.scope_id,
+            ),
+        ),
+    )
+
+
+async def rebuild_progress_rollups(user_id: Optional[int] = None) -> int:
+    """
+    Replaces the rollups (of one user, or of everyone) in a single transaction, while
+    progress writes of those users wait.
+    Returns the number of rollup rows written.
+    """
+    async with async_session() as db:
+        # Submissions committed meanwhile would be counted twice, or lost: wait for the
+        # ones in progress and hold back new ones until the rebuild commits
+        if user_id is not None:
+            await db.execute(
+                select(func.pg_advisory_xact_lock(SUBMISSION_LOCK_NAMESPACE, user_id))
+            )
+        else:
+            await db.execute(text("LOCK TABLE user_progress IN SHARE MODE"))
+
+        query = delete(UserProgressRollup)
+        if user_id is not None:
+            query = query.filter(UserProgressRollup.user_id == user_id)
+        await db.execute(query)
+
+        total = 0
+        for scope, column in ROLLUP_SCOPES:
+            result = await db.execute(build_rollup_rebuild(scope, column, user_id))
+            total += result.rowcount
+
+        await db.commit()
+
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Rebuild user progress rollups from user_progress."
+    )
+    parser.add_argument(
+        "--user-id", type=int, default=None, help="Only rebuild this user's rollups."
+    )
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    total = asyncio.run(rebuild_progress_rollups(args.user_id))
+    print(
+        f"Rebuilt {total} rollup rows in {time.perf_counter() - started:.2f}s",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,44 @@
 # src/db/database.py
+import logging
+from typing import Optional
+from fastapi import Depends
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
+from src.db import instrumentation
+from src.db.replicas import ReplicaSet
+from src.settings import get_settings
+
+logger = logging.getLogger(__name__)
 
 # Define the base class for the models
 Base = declarative_base()
 
-# Create the async engine
-SQLALCHEMY_DATABASE_URL = "postgresql+asyncpg://postgres:#@localhost/gk_books"
-engine = create_async_engine(SQLALCHEMY_DATABASE_URL, echo=True)
+
+def _create_engine(url: str) -> AsyncEngine:
+    """
+    Engine with the configured pool and asyncpg options, and per-request instrumentation.
+    """
+    created = create_async_engine(
+        url,
+        poolclass=instrumentation.InstrumentedAsyncAdaptedQueuePool,
+        **db_settings.engine_kwargs(),
+    )
+    # Count and time statements per request
+    instrumentation.install(created)
+    return created
+
+
+# Create the async engine (URL, pool sizing and asyncpg options come from the settings)
+db_settings = get_settings().database
+SQLALCHEMY_DATABASE_URL = db_settings.url
+engine = _create_engine(SQLALCHEMY_DATABASE_URL)
+
+# Read replicas, used by read-only routes through `get_read_db`
+replicas = ReplicaSet(
+    [_create_engine(url) for url in db_settings.replica_urls],
+    retry_interval=db_settings.replica_retry_interval,
+)
 
 # Session configuration
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
@@ -18,3 +48,68 @@ async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False
 async def get_db():
     async with async_session() as session:
         yield session
+
+
+async def open_replica_session() -> Optional[AsyncSession]:
+    """
+    Session bound to the next healthy replica, or None when none is available.
+    """
+    for replica in replicas.candidates():
+        session = async_session(bind=replica)
+        try:
+            # Connect now, so an unavailable replica is skipped instead of failing the request
+            await session.connection()
+        except Exception:
+            await session.close()
+            replicas.mark_failed(replica)
+            logger.warning("Read replica %s is unavailable", replica.url, exc_info=True)
+            continue
+        replicas.mark_healthy(replica)
+        return session
+
+    return None
+
+
+async def open_read_session() -> AsyncSession:
+    """
+    Session bound to the next healthy replica, or to the primary when none is available.
+    """
+    session = await open_replica_session()
+    return session if session is not None else async_session()
+
+
+# Dependency to get a session for read-only routes. Without an available replica, it's
+# the request's primary session, so a request doesn't hold two primary connections
+async def get_read_db(db: AsyncSession = Depends(get_db)):
+    session = await open_replica_session()
+    if session is None:
+        yield db
+        return
+
+    async with session:
+        yield session
+
+
+def _pool_status(pool) -> dict:
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # Connections opened beyond `size`
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": db_settings.max_overflow,
+        "waiters": getattr(pool, "waiters", 0),
+    }
+
+
+def pool_status() -> dict:
+    """
+    Current utilisation of this worker's connection pools.
+    """
+    status = _pool_status(engine.pool)
+    if replicas:
+        status["replicas"] = [
+            {"healthy": replicas.is_healthy(index), **_pool_status(replica.pool)}
+            for index, replica in enumerate(replicas.engines)
+        ]
+    return status
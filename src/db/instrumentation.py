@@ -0,0 +1,114 @@
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+@dataclass
+class RequestStats:
+    """
+    Database activity of a single request.
+    """
+
+    statements: int = 0
+    # Seconds spent executing statements
+    db_time: float = 0.0
+    # Rows returned or affected, as reported by the driver
+    rows: int = 0
+    # Seconds spent waiting to check a connection out of the pool
+    pool_wait: float = 0.0
+    # Loads served from the request memo instead of the database
+    memo_hits: int = 0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+def start_request_stats() -> Tuple[RequestStats, Optional[Token]]:
+    """
+    Starts collecting stats for the current request, or joins the collection already
+    started by an outer middleware. Pass the returned token to `end_request_stats`.
+    """
+    stats = _request_stats.get()
+    if stats is not None:
+        return stats, None
+
+    stats = RequestStats()
+    return stats, _request_stats.set(stats)
+
+
+def end_request_stats(token: Optional[Token]) -> None:
+    if token is not None:
+        _request_stats.reset(token)
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool recording how long each checkout waited, and how many checkouts
+    are queued because every connection (overflow included) is checked out.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiters = 0
+
+    def _exhausted(self) -> bool:
+        # A negative max_overflow means no limit: checkouts never queue
+        return (
+            self._max_overflow >= 0
+            and self.checkedout() >= self.size() + self._max_overflow
+        )
+
+    def connect(self):
+        started = time.perf_counter()
+        waiting = self._exhausted()
+        if waiting:
+            self.waiters += 1
+        try:
+            return super().connect()
+        finally:
+            if waiting:
+                self.waiters -= 1
+            stats = _request_stats.get()
+            if stats is not None:
+                stats.pool_wait += time.perf_counter() - started
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    if stats is not None and conn.info.get("query_started"):
+        stats.db_time += time.perf_counter() - conn.info["query_started"].pop()
+        if cursor.rowcount and cursor.rowcount > 0:
+            stats.rows += cursor.rowcount
+
+
+def _handle_error(exception_context):
+    # Drop the start time of a statement that failed, so timings stay paired
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def install(engine: AsyncEngine) -> None:
+    """
+    Registers the statement counting and timing hooks on an engine.
+    """
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
@@ -0,0 +1,47 @@
+import itertools
+import time
+from typing import Dict, List, Sequence
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class ReplicaSet:
+    """
+    Round-robin selection over read replica engines.
+
+    A replica that fails to connect is skipped for `retry_interval` seconds, after which
+    it's offered again. When no replica is available, callers fall back to the primary.
+    """
+
+    def __init__(self, engines: Sequence[AsyncEngine], retry_interval: float = 30.0):
+        self.engines = list(engines)
+        self.retry_interval = retry_interval
+        self._next = itertools.count()
+        # Engine index -> monotonic time until which it's skipped
+        self._failed_until: Dict[int, float] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def is_healthy(self, index: int) -> bool:
+        return self._failed_until.get(index, 0.0) <= time.monotonic()
+
+    def candidates(self) -> List[AsyncEngine]:
+        """
+        Healthy replicas in the order to try them, starting from the next one in turn.
+        """
+        if not self.engines:
+            return []
+
+        start = next(self._next) % len(self.engines)
+        order = self.engines[start:] + self.engines[:start]
+        return [
+            engine for engine in order if self.is_healthy(self.engines.index(engine))
+        ]
+
+    def mark_failed(self, engine: AsyncEngine) -> None:
+        self._failed_until[self.engines.index(engine)] = (
+            time.monotonic() + self.retry_interval
+        )
+
+    def mark_healthy(self, engine: AsyncEngine) -> None:
+        self._failed_until.pop(self.engines.index(engine), None)
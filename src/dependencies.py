@@ -1,9 +1,10 @@
-from fastapi import Depends, HTTPException, Header
+import hashlib
+from fastapi import Depends, HTTPException, Header, Request, Response
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.db.database import get_db
+from src.db.database import get_db, get_read_db
 from src.models import User, SubUnit, Question
-from src.enums import SubscriptionTypeEnum
+from src.enums import SubscriptionTypeEnum, ContentLanguage
 from src.services import (
     QuizService,
     UserService,
@@ -12,25 +13,65 @@ from src.services import (
     SubscriptionService,
 )
 
-from firebase_admin import auth
-from src.firebase import firebase_admin
+from src.services.load_profiles import load_profile, profile_paths
+from src.cache import Entitlements, RequestMemo
+from src.firebase import verify_id_token
 from typing import Optional
 
 
-async def get_subscription_service(db: AsyncSession = Depends(get_db)) -> BookService:
-    return SubscriptionService(db)
+async def get_request_memo() -> RequestMemo:
+    """
+    Memo of the objects loaded during this request. FastAPI resolves a dependency once
+    per request, so every dependency and service of the request shares it.
+    """
+    return RequestMemo()
+
+
+async def get_subscription_service(
+    db: AsyncSession = Depends(get_db),
+    memo: RequestMemo = Depends(get_request_memo),
+) -> SubscriptionService:
+    return SubscriptionService(db, memo)
+
+
+# Services of read-only routes run on a read replica (see `get_read_db`)
+async def get_read_subscription_service(
+    db: AsyncSession = Depends(get_read_db),
+    memo: RequestMemo = Depends(get_request_memo),
+) -> SubscriptionService:
+    return SubscriptionService(db, memo)
 
 
-async def get_book_service(db: AsyncSession = Depends(get_db)) -> BookService:
+async def get_book_service(db: AsyncSession = Depends(get_read_db)) -> BookService:
     return BookService(db)
 
 
-async def get_quiz_service(db: AsyncSession = Depends(get_db)) -> QuizService:
-    return QuizService(db)
+async def get_quiz_service(
+    db: AsyncSession = Depends(get_db),
+    memo: RequestMemo = Depends(get_request_memo),
+) -> QuizService:
+    return QuizService(db, memo)
+
+
+async def get_read_quiz_service(
+    db: AsyncSession = Depends(get_read_db),
+    memo: RequestMemo = Depends(get_request_memo),
+) -> QuizService:
+    return QuizService(db, memo)
+
+
+async def get_user_service(
+    db: AsyncSession = Depends(get_db),
+    memo: RequestMemo = Depends(get_request_memo),
+) -> UserService:
+    return UserService(db, memo)
 
 
-async def get_user_service(db: AsyncSession = Depends(get_db)) -> UserService:
-    return UserService(db)
+async def get_read_user_service(
+    db: AsyncSession = Depends(get_read_db),
+    memo: RequestMemo = Depends(get_request_memo),
+) -> UserService:
+    return UserService(db, memo)
 
 
 async def get_user_progress_service(
@@ -54,35 +95,89 @@ async def get_user_email_from_token(authorization: Optional[str] = Header(None))
         raise HTTPException(status_code=401, detail="Bearer token missing or malformed")
 
     try:
-        # Verify the Firebase token
-        decoded_token = auth.verify_id_token(token)
-        # Extract the email from the decoded token
-        user_email = decoded_token.get("email")
-        if not user_email:
-            raise HTTPException(status_code=401, detail="Email not found in the token")
-        return user_email
-
+        # Verify the Firebase token (cached until it expires, verified off the event loop)
+        decoded_token = await verify_id_token(token)
     except Exception as e:
         # If verification fails, raise an HTTPException
         raise HTTPException(status_code=401, detail="Invalid token or token expired")
 
+    # Extract the email from the decoded token
+    user_email = decoded_token.get("email")
+    if not user_email:
+        raise HTTPException(status_code=401, detail="Email not found in the token")
+    return user_email
+
 
 async def get_current_user(
+    request: Request,
     user_email: str = Depends(get_user_email_from_token),
-    user_service: UserService = Depends(get_user_service),
+    user_service: UserService = Depends(get_read_user_service),
 ) -> User:
     user = await user_service.get_user_by_email(user_email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    # Picked up by the access log
+    request.state.user_id = user.id
     return user
 
 
+async def get_user_entitlements(
+    current_user: User = Depends(get_current_user),
+    subscription_service: SubscriptionService = Depends(get_subscription_service),
+) -> Entitlements:
+    """
+    Resolve the current user's entitlement snapshot once per request.
+
+    Entitlements are read from the primary: they are cached across requests, and a
+    lagging replica would keep a just-bought subscription out of the cache.
+    """
+    return await subscription_service.get_entitlements(current_user.id)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Weak comparison of `If-None-Match` against an ETag, as RFC 9110 requires for it.
+    """
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+async def check_catalog_etag(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    book_service: BookService = Depends(get_book_service),
+    entitlements: Entitlements = Depends(get_user_entitlements),
+) -> str:
+    """
+    Computes the catalog ETag from the content version and the caller's entitlements
+    (which decide the preview flags), and answers 304 Not Modified, before the catalog
+    is built, when the client already has it.
+    """
+    version = await book_service.get_content_version()
+    digest = hashlib.blake2b(
+        f"{version}:{entitlements.fingerprint}".encode(), digest_size=8
+    ).hexdigest()
+    etag = f'"{version}-{digest}"'
+
+    # Responses depend on the caller, so shared caches must not store them
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and _etag_matches(if_none_match, etag):
+        raise HTTPException(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return etag
+
+
 async def check_user_subscription_and_preview(
     question_id: int = None,
     subunit_id: int = None,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
-    subscription_service: SubscriptionService = Depends(get_subscription_service),
+    db: AsyncSession = Depends(get_read_db),
+    entitlements: Entitlements = Depends(get_user_entitlements),
+    memo: RequestMemo = Depends(get_request_memo),
 ) -> bool:
     """
     Check if the current user has a subscription (full or specific book) and if the subunit is previewed.
@@ -90,22 +185,39 @@ async def check_user_subscription_and_preview(
 
     # If subunit_id is provided, directly use it
     if subunit_id:
-        # Await the execution of the query
-        subunit_result = await db.execute(
-            select(SubUnit).filter(SubUnit.id == subunit_id)
-        )
-        subunit = subunit_result.scalars().first()
+        subunit = memo.get("subunit", subunit_id, profile_paths("subunit+access"))
+        if subunit is None:
+            # Await the execution of the query
+            subunit_result = await db.execute(
+                select(SubUnit)
+                .filter(SubUnit.id == subunit_id)
+                .options(*load_profile("subunit+access"))
+            )
+            subunit = subunit_result.unique().scalars().first()
+            if subunit:
+                memo.put(
+                    "subunit", subunit_id, subunit, profile_paths("subunit+access")
+                )
 
     # If question_id is provided, fetch the subunit_id from the Question table
     elif question_id:
-        # Await the execution of the query
-        question_result = await db.execute(
-            select(Question).filter(Question.id == question_id)
-        )
-        question = question_result.scalars().first()
+        question = memo.get("question", question_id, profile_paths("question+access"))
+        if question is None:
+            # Await the execution of the query
+            question_result = await db.execute(
+                select(Question)
+                .filter(Question.id == question_id)
+                .options(*load_profile("question+access"))
+            )
+            question = question_result.unique().scalars().first()
+
+            if not question:
+                raise HTTPException(status_code=404, detail="Question not found")
 
-        if not question:
-            raise HTTPException(status_code=404, detail="Question not found")
+            # Later loads of this question in the request reuse it (see QuizService)
+            memo.put(
+                "question", question_id, question, profile_paths("question+access")
+            )
 
         subunit = (
             question.subunit
@@ -123,16 +235,39 @@ async def check_user_subscription_and_preview(
     if subunit.preview:
         return True  # Subunit is previewed, no need for subscription check
 
-    # Check if the user has full subscription
-    subscription = await subscription_service.check_user_has_a_full_subscription(
-        user_id=current_user.id
-    )
-    if subscription:
-        return True
+    # Check if the user has a full subscription or a subscription for the book
+    return entitlements.can_access_book(subunit.unit.book_id)
 
-    # Check if the user has a subscription
-    subscription = await subscription_service.check_user_subscription_for_book(
-        user_id=current_user.id, book_id=subunit.unit.book_id
-    )
 
-    return True if subscription else False
+async def check_subunit_content_etag(
+    subunit_id: int,
+    response: Response,
+    lang: ContentLanguage = ContentLanguage.EN,
+    if_none_match: Optional[str] = Header(None),
+    book_service: BookService = Depends(get_book_service),
+    has_access: bool = Depends(check_user_subscription_and_preview),
+) -> Optional[str]:
+    """
+    Computes the ETag of a subunit's content once access to it is granted, and answers
+    304 Not Modified, before the content is read, when the client already has it.
+    Returns None without access.
+
+    The content only changes with the content version. The ETag is weak, since every
+    content coding of the body shares it.
+    """
+    if not has_access:
+        return None
+
+    version = await book_service.get_content_version()
+    etag = f'"{version}-{subunit_id}-{lang.value}"'
+
+    headers = {
+        "ETag": f"W/{etag}",
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if if_none_match and _etag_matches(if_none_match, etag):
+        raise HTTPException(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return etag
@@ -1,6 +1,8 @@
-from .enums import SubscriptionTypeEnum, QuestionStatus
+from .enums import SubscriptionTypeEnum, QuestionStatus, ProgressScope, ContentLanguage
 
 __all__ = [
     "SubscriptionTypeEnum",
     "QuestionStatus",
+    "ProgressScope",
+    "ContentLanguage",
 ]
@@ -9,3 +9,14 @@ class QuestionStatus(str, Enum):
 class SubscriptionTypeEnum(str, Enum):
     FULL_SUBSCRIPTION = "full_subscription"
     BASE_SUBSCRIPTION = "base_subscription"
+
+
+class ProgressScope(str, Enum):
+    BOOK = "book"
+    UNIT = "unit"
+    SUBUNIT = "subunit"
+
+
+class ContentLanguage(str, Enum):
+    EN = "en"
+    HI = "hi"
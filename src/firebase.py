@@ -1,6 +1,62 @@
-import firebase_admin
-from firebase_admin import credentials, auth
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
 
-# Initialize the Firebase Admin SDK with the service account key
-cred = credentials.Certificate("path/to/your/serviceAccountKey.json")
-firebase_admin.initialize_app(cred)
+from src.cache import VerifiedTokenCache
+from src.settings import get_settings
+
+# Verification is synchronous (signature check, and a key fetch when the key cache is cold),
+# so it runs in a small dedicated pool instead of on the event loop.
+_verify_executor = ThreadPoolExecutor(
+    max_workers=4, thread_name_prefix="firebase-verify"
+)
+
+# Verified claims, reused until the token expires
+token_cache = VerifiedTokenCache(maxsize=10000)
+
+_initialized = False
+_init_lock = threading.Lock()
+
+
+def _initialize() -> None:
+    """
+    Initializes the Firebase Admin SDK with the service account key, on the first
+    verification rather than at import time, so workers start without loading the SDK
+    or reading credentials.
+    """
+    global _initialized
+    with _init_lock:
+        if _initialized:
+            return
+
+        import firebase_admin
+        from firebase_admin import credentials
+
+        cred = credentials.Certificate(get_settings().firebase_credentials)
+        firebase_admin.initialize_app(cred)
+        _initialized = True
+
+
+def _verify(token: str) -> Dict[str, any]:
+    if not _initialized:
+        _initialize()
+
+    from firebase_admin import auth
+
+    return auth.verify_id_token(token)
+
+
+async def verify_id_token(token: str) -> Dict[str, any]:
+    """
+    Verifies a Firebase ID token and returns its decoded claims.
+    Claims are served from the cache when the same token was verified before.
+    """
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+
+    loop = asyncio.get_running_loop()
+    claims = await loop.run_in_executor(_verify_executor, _verify, token)
+    token_cache.set(token, claims)
+    return claims
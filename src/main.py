@@ -1,18 +1,48 @@
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from src.db.database import engine, Base
-from src.middlewares import LoggingMiddleware
+from src.db.database import engine, Base, pool_status
+from src.middlewares import (
+    LoggingMiddleware,
+    MetricsMiddleware,
+    QueryBudgetMiddleware,
+    start_access_log,
+    stop_access_log,
+)
 from contextlib import asynccontextmanager
 from src.routes import quiz, book, user, subscription
+from src.services.progress_writer import progress_buffer
+from src.services.answer_keys import answer_keys
+from src.services.catalog_snapshot import catalog_snapshots
+from src.services.content import content_version_cache
+from src.services.invalidation import invalidation_bus
+from src import metrics
+from src.settings import get_settings
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    start_access_log()
+    # In production the schema comes from the migrations: no DDL on the startup path
+    if settings.create_schema_on_startup:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    # Answer keys come from the shared catalog snapshot when one is configured
+    if not await catalog_snapshots.start():
+        await answer_keys.load()
+    await progress_buffer.start()
+    await invalidation_bus.start()
     yield
+    await invalidation_bus.stop()
+    # Write out buffered progress events before the worker exits
+    await progress_buffer.stop()
+    await content_version_cache.stop()
+    await answer_keys.stop()
+    await catalog_snapshots.stop()
+    stop_access_log()
+
 
+settings = get_settings()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -24,7 +54,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.add_middleware(LoggingMiddleware)
+app.add_middleware(LoggingMiddleware, sample_rate=settings.access_log_sample_rate)
+
+# In test mode, fail requests that issue more SQL statements than their route allows
+if settings.is_test:
+    app.add_middleware(QueryBudgetMiddleware)
+
+# Outermost, so the timings cover the other middlewares too
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(quiz.router, prefix="/quiz", tags=["quiz"])
 app.include_router(book.router, prefix="/books", tags=["books"])
@@ -36,6 +73,16 @@ app.include_router(subscription.router, prefix="/subscription", tags=["subscript
 @app.get("/health")
 async def health_check():
     return JSONResponse(
-        content={"status": "OK", "message": "Service is running."},
+        content={
+            "status": "OK",
+            "message": "Service is running.",
+            "db_pool": pool_status(),
+        },
         status_code=200,
     )
+
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
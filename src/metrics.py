@@ -0,0 +1,207 @@
+"""
+In-process metrics, rendered in the Prometheus text exposition format by `/metrics`.
+
+Metrics are per worker process: with several workers, scrape each one (or aggregate
+the results in Prometheus).
+"""
+
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [
+        '%s="%s"'
+        % (
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{%s}" % ",".join(pairs) if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonically increasing value per label set.
+    """
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Histogram:
+    """
+    Cumulative histogram per label set, with a sum and a count.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [non-cumulative bucket counts (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        counts, total = self._values.setdefault(
+            label_values, ([0] * (len(self.buckets) + 1), [0.0])
+        )
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="%s"' % _format_value(bound)
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests_total = registry.counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code.",
+    ("method", "route", "status"),
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route"),
+)
+db_query_duration_seconds = registry.histogram(
+    "db_query_duration_seconds",
+    "Time spent executing SQL statements per request, by route template.",
+    ("method", "route"),
+)
+db_pool_wait_seconds = registry.histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a pooled connection per request, by route template.",
+    ("method", "route"),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+db_statements_per_request = registry.histogram(
+    "db_statements_per_request",
+    "SQL statements issued per request, by route template.",
+    ("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+request_memo_hits_total = registry.counter(
+    "request_memo_hits_total",
+    "Database loads served from the request memo, by route template.",
+    ("method", "route"),
+)
+catalog_cache_lookups_total = registry.counter(
+    "catalog_cache_lookups_total",
+    "Encoded catalog and question payload lookups, by kind and result: hit, miss, or "
+    "stale (a hit while the content version is being re-read).",
+    ("kind", "result"),
+)
+content_version_refreshes_total = registry.counter(
+    "content_version_refreshes_total",
+    "Background re-reads of the catalog content version, by outcome.",
+    ("outcome",),
+)
+singleflight_calls_total = registry.counter(
+    "singleflight_calls_total",
+    "Coalesced reads, by group: calls that ran the load, and calls that shared the "
+    "load already in flight for the same key.",
+    ("group", "result"),
+)
+progress_events_dropped_total = registry.counter(
+    "progress_events_dropped_total",
+    "Read progress events dropped because the write buffer was full and couldn't be "
+    "flushed.",
+)
+invalidation_events_total = registry.counter(
+    "invalidation_events_total",
+    "Cache invalidation events, by type: published by this worker, received from the "
+    "bus (including its own), or failed to broadcast.",
+    ("type", "result"),
+)
+invalidation_latency_seconds = registry.histogram(
+    "invalidation_latency_seconds",
+    "Time from publishing a cache invalidation event to receiving it, by type.",
+    ("type",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+def render() -> str:
+    return registry.render()
@@ -1,3 +1,12 @@
-from .logging import LoggingMiddleware
+from .logging import LoggingMiddleware, start_access_log, stop_access_log
+from .metrics import MetricsMiddleware
+from .query_budget import QueryBudgetMiddleware, query_budget
 
-__all__ = ["LoggingMiddleware"]
+__all__ = [
+    "LoggingMiddleware",
+    "MetricsMiddleware",
+    "QueryBudgetMiddleware",
+    "query_budget",
+    "start_access_log",
+    "stop_access_log",
+]
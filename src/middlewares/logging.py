@@ -1,27 +1,125 @@
+import json
 import logging
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request
-import inspect
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.db import instrumentation
+from src.middlewares.metrics import route_template
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+# One record per request, written by a background thread (see `start_access_log`)
+access_logger = logging.getLogger("src.access")
+access_logger.setLevel(logging.INFO)
+access_logger.propagate = False
 
+_listener: Optional[QueueListener] = None
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Get the function name (route being called)
-        method = request.scope["method"]
 
-        # Get the parameters passed to the route
-        path = request.scope["path"]
+class JsonFormatter(logging.Formatter):
+    """
+    Formats access records as a single JSON line.
+    """
 
-        # Log the function name and parameters
-        logger.info(f"Method: {method}")
-        logger.info(f"Path : {path}")
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            **getattr(record, "request", {}),
+        }
+        return json.dumps(entry, default=str)
 
-        # Call the next middleware or route handler
-        response = await call_next(request)
 
-        # Return the response to the client
-        return response
+def start_access_log(handler: Optional[logging.Handler] = None) -> None:
+    """
+    Routes access records through a queue, so request handling never blocks on the
+    output stream. `handler` defaults to JSON lines on stdout.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    if handler is None:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    access_logger.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_access_log() -> None:
+    """
+    Writes out the queued records and detaches the queue handler.
+    """
+    global _listener
+    if _listener is None:
+        return
+
+    _listener.stop()
+    _listener = None
+    for handler in list(access_logger.handlers):
+        if isinstance(handler, QueueHandler):
+            access_logger.removeHandler(handler)
+
+
+class LoggingMiddleware:
+    """
+    Emits one structured access record per request: route template, status, duration,
+    user id and database stats.
+
+    Successful requests are sampled at `sample_rate` (0.0 - 1.0); server errors are
+    always logged.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stats, token = instrumentation.start_request_stats()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            instrumentation.end_request_stats(token)
+
+            if status_code >= 500 or random.random() < self.sample_rate:
+                duration = time.perf_counter() - started
+                # Set by the authentication dependency
+                user_id = scope.get("state", {}).get("user_id")
+                access_logger.info(
+                    "request",
+                    extra={
+                        "request": {
+                            "method": scope["method"],
+                            "route": route_template(scope),
+                            "path": scope["path"],
+                            "status": status_code,
+                            "duration_ms": round(duration * 1000, 2),
+                            "user_id": user_id,
+                            "db_statements": stats.statements,
+                            "db_ms": round(stats.db_time * 1000, 2),
+                            "db_rows": stats.rows,
+                            "pool_wait_ms": round(stats.pool_wait * 1000, 2),
+                            "memo_hits": stats.memo_hits,
+                        }
+                    },
+                )
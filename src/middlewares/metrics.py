@@ -0,0 +1,67 @@
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src import metrics
+from src.db import instrumentation
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Path template of the matched route (e.g. "/books/{book_id}"), so metrics don't get
+    one label value per id. Requests that matched no route share a single label.
+    """
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+class MetricsMiddleware:
+    """
+    Collects per-request database stats, reports them in a `Server-Timing` header and
+    records request latency histograms per route template.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stats, token = instrumentation.start_request_stats()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed = time.perf_counter() - started
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.db_time * 1000:.1f};desc="{stats.statements} statements, '
+                    f'{stats.rows} rows", '
+                    f"pool;dur={stats.pool_wait * 1000:.1f}, "
+                    f"app;dur={elapsed * 1000:.1f}",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            instrumentation.end_request_stats(token)
+
+            method = scope["method"]
+            route = route_template(scope)
+            metrics.http_requests_total.inc(method, route, str(status_code))
+            metrics.http_request_duration_seconds.observe(
+                time.perf_counter() - started, method, route
+            )
+            metrics.db_query_duration_seconds.observe(stats.db_time, method, route)
+            metrics.db_pool_wait_seconds.observe(stats.pool_wait, method, route)
+            metrics.db_statements_per_request.observe(stats.statements, method, route)
+            if stats.memo_hits:
+                metrics.request_memo_hits_total.inc(
+                    method, route, amount=stats.memo_hits
+                )
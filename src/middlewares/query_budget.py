@@ -0,0 +1,78 @@
+import json
+from typing import Callable
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.db import instrumentation
+
+# Statement budget of routes that don't declare their own
+DEFAULT_QUERY_BUDGET = 10
+
+
+def query_budget(statements: int) -> Callable:
+    """
+    Declares how many SQL statements a route may issue per request.
+    Only enforced when the QueryBudgetMiddleware is installed (test mode).
+    """
+
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.__query_budget__ = statements
+        return endpoint
+
+    return decorator
+
+
+class QueryBudgetMiddleware:
+    """
+    Test-mode N+1 guard: fails a request with a 500 when the number of SQL statements it
+    issued before responding exceeds the budget declared on its route.
+    """
+
+    def __init__(self, app: ASGIApp, default_budget: int = DEFAULT_QUERY_BUDGET):
+        self.app = app
+        self.default_budget = default_budget
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = instrumentation.start_request_stats()
+        exceeded = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal exceeded
+            if exceeded:
+                # The route's own response is replaced by the budget error
+                return
+
+            if message["type"] == "http.response.start":
+                endpoint = scope.get("endpoint")
+                budget = getattr(endpoint, "__query_budget__", self.default_budget)
+                if stats.statements > budget:
+                    exceeded = True
+                    route = scope.get("route")
+                    path = getattr(route, "path", scope["path"])
+                    body = json.dumps(
+                        {
+                            "detail": f"Query budget exceeded for {scope['method']} {path}: "
+                            f"{stats.statements} statements, budget is {budget}"
+                        }
+                    ).encode()
+                    await send(
+                        {
+                            "type": "http.response.start",
+                            "status": 500,
+                            "headers": [
+                                (b"content-type", b"application/json"),
+                                (b"content-length", str(len(body)).encode()),
+                            ],
+                        }
+                    )
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            instrumentation.end_request_stats(token)
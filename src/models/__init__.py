@@ -6,9 +6,11 @@ from .choice import Choice
 from .reported_question import ReportedQuestion
 from .user import User
 from .user_progress import UserProgress
+from .user_progress_rollup import UserProgressRollup
 from .subscription_type import SubscriptionType
 from .subscription import Subscription
 from .preview_subunit import PreviewSubunit
+from .content_version import ContentVersion
 
 __all__ = [
     "Book",
@@ -18,7 +20,9 @@ __all__ = [
     "ReportedQuestion",
     "User",
     "UserProgress",
+    "UserProgressRollup",
     "SubscriptionType",
     "Subscription",
     "PreviewSubunit",
+    "ContentVersion",
 ]
@@ -10,8 +10,10 @@ class Book(Base):
     title_en = Column(String, index=True)
     title_hi = Column(String)
 
-    units = relationship("Unit", back_populates="book", lazy="selectin")
-    subscriptions = relationship("Subscription", back_populates="book", lazy="selectin")
+    units = relationship("Unit", back_populates="book", lazy="raise_on_sql")
+    subscriptions = relationship(
+        "Subscription", back_populates="book", lazy="raise_on_sql"
+    )
 
     def __repr__(self):
         return f"<Book(id={self.id}, title_en={self.title_en})>"
@@ -10,9 +10,9 @@ class Choice(Base):
     text_en = Column(String, index=True)
     text_hi = Column(String)
     is_correct = Column(Boolean)
-    question_id = Column(Integer, ForeignKey("question.id"))
+    question_id = Column(Integer, ForeignKey("question.id"), index=True)
 
-    question = relationship("Question", back_populates="choices", lazy="selectin")
+    question = relationship("Question", back_populates="choices", lazy="raise_on_sql")
 
     def __repr__(self):
         return f"<Choice(id={self.id}, text_en={self.text_en[:50]})>"
@@ -0,0 +1,85 @@
+from sqlalchemy import Column, Integer, DateTime, event, text
+from sqlalchemy.sql import func
+from src.db.database import Base
+
+# Catalog tables: any write to them bumps the content version, through a trigger
+CONTENT_TABLES = ("book", "unit", "sub_unit", "preview_subunit", "question", "choice")
+
+# Columns of those tables that aren't served in the catalog: updating only these (e.g.
+# a user reporting a question) keeps the version. The trigger of such a table lists
+# its other columns, so a column added to it must be added to its trigger too.
+NON_CONTENT_COLUMNS = {"question": ("reported",)}
+
+BUMP_CONTENT_VERSION_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_content_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE content_version SET version = version + 1, updated_at = now() WHERE id = 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+class ContentVersion(Base):
+    """
+    Single-row counter bumped whenever catalog content is written: by the content
+    importer (`src.cli.import_content`) and by a trigger on every catalog table.
+    Catalog ETags and cached payloads are keyed by it.
+    """
+
+    __tablename__ = "content_version"
+
+    id = Column(Integer, primary_key=True, default=1)
+    version = Column(Integer, default=1, nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ContentVersion(version={self.version}, updated_at={self.updated_at})>"
+
+
+def create_content_version_trigger(table: str, columns) -> str:
+    """
+    The bump trigger of a catalog table; `columns` are the table's columns.
+    """
+    update = "UPDATE"
+    if table in NON_CONTENT_COLUMNS:
+        content_columns = [
+            column for column in columns if column not in NON_CONTENT_COLUMNS[table]
+        ]
+        update = f"UPDATE OF {', '.join(content_columns)}"
+    return (
+        f"CREATE TRIGGER {table}_bump_content_version "
+        f"AFTER INSERT OR {update} OR DELETE OR TRUNCATE ON {table} "
+        "FOR EACH STATEMENT EXECUTE FUNCTION bump_content_version()"
+    )
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_content_version_triggers(target, connection, **kw) -> None:
+    """
+    Installs the bump triggers and the version row when the schema is created without
+    the migrations (`create_all`). Runs on every `create_all`, so it replaces existing
+    triggers, and keeps an existing version.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+
+    # The triggers only update the row: without it, writes wouldn't bump anything
+    connection.execute(
+        text(
+            "INSERT INTO content_version (id, version) VALUES (1, 1) "
+            "ON CONFLICT (id) DO NOTHING"
+        )
+    )
+    connection.execute(text(BUMP_CONTENT_VERSION_FUNCTION))
+    for table in CONTENT_TABLES:
+        connection.execute(
+            text(f"DROP TRIGGER IF EXISTS {table}_bump_content_version ON {table}")
+        )
+        connection.execute(
+            text(
+                create_content_version_trigger(
+                    table, [column.name for column in target.tables[table].columns]
+                )
+            )
+        )
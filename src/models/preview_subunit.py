@@ -8,7 +8,7 @@ class PreviewSubunit(Base):
     __tablename__ = "preview_subunit"
 
     id = Column(Integer, primary_key=True, index=True)
-    subunit_id = Column(Integer, ForeignKey("sub_unit.id"), nullable=False)
+    subunit_id = Column(Integer, ForeignKey("sub_unit.id"), nullable=False, index=True)
     available_for_preview = Column(Boolean, default=True, nullable=False)
 
     subunit = relationship("SubUnit", back_populates="preview")
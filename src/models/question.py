@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from src.db.database import Base
 from src.models.subunit import SubUnit
@@ -7,6 +7,10 @@ from src.models.reported_question import ReportedQuestion
 
 class Question(Base):
     __tablename__ = "question"
+    __table_args__ = (
+        # A subunit's questions in id order (listing, keyset pagination, counts)
+        Index("ix_question_subunit_id_id", "subunit_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     text_en = Column(Text)
@@ -15,8 +19,8 @@ class Question(Base):
     reported = Column(Boolean, default=False)
     subunit_id = Column(Integer, ForeignKey("sub_unit.id"))
 
-    subunit = relationship("SubUnit", back_populates="questions", lazy="selectin")
-    choices = relationship("Choice", back_populates="question", lazy="selectin")
+    subunit = relationship("SubUnit", back_populates="questions", lazy="raise_on_sql")
+    choices = relationship("Choice", back_populates="question", lazy="raise_on_sql")
     reported_questions = relationship(
         "ReportedQuestion",
         back_populates="question",
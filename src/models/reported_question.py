@@ -13,7 +13,7 @@ class ReportedQuestion(Base):
     question_id = Column(Integer, ForeignKey("question.id"))
 
     question = relationship(
-        "Question", back_populates="reported_questions", lazy="selectin"
+        "Question", back_populates="reported_questions", lazy="raise_on_sql"
     )
 
     def __repr__(self):
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from src.db.database import Base
@@ -7,9 +7,18 @@ from src.models.subscription_type import SubscriptionType
 
 class Subscription(Base):
     __tablename__ = "subscription"
+    __table_args__ = (
+        # Active subscriptions of a user, optionally for one book (entitlements)
+        Index(
+            "ix_subscription_active_user_id_book_id",
+            "user_id",
+            "book_id",
+            postgresql_where=text("active"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=False, index=True)
     book_id = Column(
         Integer, ForeignKey("book.id"), nullable=True
     )  # Can be None for full subscription
@@ -20,11 +29,11 @@ class Subscription(Base):
     end_date = Column(DateTime, nullable=True)
     active = Column(Boolean, default=True)
 
-    user = relationship("User", back_populates="subscriptions", lazy="selectin")
-    book = relationship("Book", back_populates="subscriptions", lazy="selectin")
+    user = relationship("User", back_populates="subscriptions", lazy="raise_on_sql")
+    book = relationship("Book", back_populates="subscriptions", lazy="raise_on_sql")
     subscription_type = relationship(
-        "SubscriptionType", back_populates="subscriptions", lazy="selectin"
+        "SubscriptionType", back_populates="subscriptions", lazy="raise_on_sql"
     )
 
     def __repr__(self):
-        return f"<Subscription(user_id={self.user_id}, book_id={self.book_id}, active={self.active}, subscription_type={self.subscription_type.name})>"
+        return f"<Subscription(user_id={self.user_id}, book_id={self.book_id}, active={self.active}, subscription_type_id={self.subscription_type_id})>"
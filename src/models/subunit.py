@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, Text, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from src.db.database import Base
 from src.models.unit import Unit
 
@@ -10,13 +10,17 @@ class SubUnit(Base):
     id = Column(Integer, primary_key=True, index=True)
     title_en = Column(String)
     title_hi = Column(String)
-    content_en = Column(Text)
-    content_hi = Column(Text)
+    # Lesson texts, only read by the subunit content endpoint: never loaded with the
+    # subunit, and accessing them on a loaded subunit raises instead of querying
+    content_en = deferred(Column(Text), group="content", raiseload=True)
+    content_hi = deferred(Column(Text), group="content", raiseload=True)
     subunit_number = Column(Integer)
-    unit_id = Column(Integer, ForeignKey("unit.id"))
+    unit_id = Column(Integer, ForeignKey("unit.id"), index=True)
 
-    unit = relationship("Unit", back_populates="subunits", lazy="selectin")
-    preview = relationship("PreviewSubunit", back_populates="subunit", lazy="selectin")
+    unit = relationship("Unit", back_populates="subunits", lazy="raise_on_sql")
+    preview = relationship(
+        "PreviewSubunit", back_populates="subunit", lazy="raise_on_sql"
+    )
 
     questions = relationship(
         "Question",
@@ -11,10 +11,10 @@ class Unit(Base):
     title_en = Column(String)
     title_hi = Column(String)
     unit_number = Column(Integer)
-    book_id = Column(Integer, ForeignKey("book.id"))
+    book_id = Column(Integer, ForeignKey("book.id"), index=True)
 
-    book = relationship("Book", back_populates="units", lazy="selectin")
-    subunits = relationship("SubUnit", back_populates="unit", lazy="selectin")
+    book = relationship("Book", back_populates="units", lazy="raise_on_sql")
+    subunits = relationship("SubUnit", back_populates="unit", lazy="raise_on_sql")
 
     def __repr__(self):
         return f"<Unit(id={self.id}, title_en={self.title_en})>"
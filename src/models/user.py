@@ -14,7 +14,9 @@ class User(Base):
     verified = Column(Boolean, default=False, nullable=False)
     active = Column(Boolean, default=False, nullable=False)
 
-    subscriptions = relationship("Subscription", back_populates="user", lazy="selectin")
+    subscriptions = relationship(
+        "Subscription", back_populates="user", lazy="raise_on_sql"
+    )
 
     def __repr__(self):
         return f"<User(id={self.id}, first_name={self.first_name}, last_name={self.last_name}, email={self.email})>"
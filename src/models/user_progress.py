@@ -1,4 +1,13 @@
-from sqlalchemy import Column, Integer, ForeignKey, Boolean, String, Enum, DateTime
+from sqlalchemy import (
+    Column,
+    Integer,
+    ForeignKey,
+    Boolean,
+    String,
+    Enum,
+    DateTime,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from src.db.database import Base
@@ -7,6 +16,11 @@ from src.enums.enums import QuestionStatus
 
 class UserProgress(Base):
     __tablename__ = "user_progress"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "question_id", name="uq_user_progress_user_question"
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
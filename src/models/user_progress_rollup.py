@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, ForeignKey, Enum, DateTime
+from sqlalchemy.sql import func
+from src.db.database import Base
+from src.enums.enums import QuestionStatus, ProgressScope
+
+
+class UserProgressRollup(Base):
+    """
+    Per-user progress counters for a book, unit or subunit, kept up to date on every
+    submission so progress can be answered without scanning `user_progress`.
+    """
+
+    __tablename__ = "user_progress_rollup"
+
+    user_id = Column(Integer, ForeignKey("user.id"), primary_key=True)
+    scope_type = Column(Enum(ProgressScope), primary_key=True)
+    scope_id = Column(Integer, primary_key=True)
+    total_attempted = Column(Integer, default=0, nullable=False)
+    total_correct = Column(Integer, default=0, nullable=False)
+    last_unit_id = Column(Integer, nullable=True)
+    last_sub_unit_id = Column(Integer, nullable=True)
+    last_question_id = Column(Integer, nullable=True)
+    last_status = Column(Enum(QuestionStatus), nullable=True)
+    last_touched_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<UserProgressRollup(user_id={self.user_id}, scope_type={self.scope_type}, scope_id={self.scope_id}, total_attempted={self.total_attempted}, total_correct={self.total_correct})>"
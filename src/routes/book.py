@@ -1,126 +1,102 @@
-from fastapi import APIRouter, Depends
-from typing import List
-from pydantic import TypeAdapter
-from src.schemas.book import BookBase, UnitBase, SubUnitBase
-from src.services import BookService, SubscriptionService, UserService
+from fastapi import APIRouter, Depends, Header, Response
+from typing import List, Optional
+from src.schemas import SubscriptionError
+from src.schemas.book import BookBase, UnitBase, SubUnitBase, SubUnitContent
+from src.enums import ContentLanguage
+from src.services import BookService
+from src.cache import Entitlements
+from src.middlewares import query_budget
+from src.serialization import JSONBytesResponse
 from src.dependencies import (
     get_book_service,
-    get_current_user,
-    get_subscription_service,
+    get_user_entitlements,
+    check_catalog_etag,
+    check_subunit_content_etag,
 )
 
 
 router = APIRouter()
 
+# Every catalog response carries an ETag (see `check_catalog_etag`); a client sending
+# it back in `If-None-Match` gets a 304 until content is published or its
+# subscriptions change.
+#
+# Payloads are encoded once per content version and served as raw bytes (see
+# `src.serialization`); `response_model` only documents their shape.
+
 
 @router.get("/", response_model=List[BookBase])
+@query_budget(6)
 async def get_books(
+    response: Response,
     book_service: BookService = Depends(get_book_service),
-    current_service: UserService = Depends(get_current_user),
-    subscription_service: SubscriptionService = Depends(get_subscription_service),
+    entitlements: Entitlements = Depends(get_user_entitlements),
+    _: str = Depends(check_catalog_etag),
 ):
-    books = await book_service.get_all_books()
-    books = TypeAdapter(List[BookBase]).validate_python(books)
-    for book in books:
-        full_subscription = (
-            await subscription_service.check_user_has_a_full_subscription(
-                current_service.id
-            )
-        )
-
-        if full_subscription:
-            for unit in book.units:
-                for subunit in unit.subunits:
-                    subunit.is_preview = True
-        else:
-            book_subscription = (
-                await subscription_service.check_user_subscription_for_book(
-                    current_service.id, book.id
-                )
-            )
-            if book_subscription:
-                for unit in book.units:
-                    for subunit in unit.subunits:
-                        subunit.is_preview = True
-
-    return books
+    body = await book_service.get_all_books_json(entitlements)
+    return JSONBytesResponse(body, headers=response.headers)
 
 
 @router.get("/book/{book_id}", response_model=BookBase)
+@query_budget(6)
 async def get_book(
     book_id: int,
+    response: Response,
     book_service: BookService = Depends(get_book_service),
-    current_service: UserService = Depends(get_current_user),
-    subscription_service: SubscriptionService = Depends(get_subscription_service),
+    entitlements: Entitlements = Depends(get_user_entitlements),
+    _: str = Depends(check_catalog_etag),
 ):
-    book = await book_service.get_book_by_id(book_id)
-    book = BookBase.model_validate(book)
-    full_subscription = await subscription_service.check_user_has_a_full_subscription(
-        current_service.id
-    )
-    if full_subscription:
-        for unit in book.units:
-            for subunit in unit.subunits:
-                subunit.is_preview = True
-    else:
-        book_subscription = await subscription_service.check_user_subscription_for_book(
-            current_service.id, book_id
-        )
-        if book_subscription:
-            for unit in book.units:
-                for subunit in unit.subunits:
-                    subunit.is_preview = True
-    return book
+    body = await book_service.get_book_json(book_id, entitlements)
+    return JSONBytesResponse(body, headers=response.headers)
 
 
 @router.get("/book/{book_id}/units", response_model=List[UnitBase])
+@query_budget(6)
 async def get_units(
     book_id: int,
+    response: Response,
     book_service: BookService = Depends(get_book_service),
-    current_service: UserService = Depends(get_current_user),
-    subscription_service: SubscriptionService = Depends(get_subscription_service),
+    entitlements: Entitlements = Depends(get_user_entitlements),
+    _: str = Depends(check_catalog_etag),
 ):
-    units = await book_service.get_units_by_book_id(book_id)
-    units = TypeAdapter(List[UnitBase]).validate_python(units)
-    full_subscription = await subscription_service.check_user_has_a_full_subscription(
-        current_service.id
-    )
-    if full_subscription:
-        for unit in units:
-            for subunit in unit.subunits:
-                subunit.is_preview = True
-    else:
-        book_subscription = await subscription_service.check_user_subscription_for_book(
-            current_service.id, book_id
-        )
-        if book_subscription:
-            for unit in units:
-                for subunit in unit.subunits:
-                    subunit.is_preview = True
-    return units
+    body = await book_service.get_units_json(book_id, entitlements)
+    return JSONBytesResponse(body, headers=response.headers)
 
 
 @router.get("/book/unit/{unit_id}/subunits", response_model=List[SubUnitBase])
+@query_budget(6)
 async def get_subunits(
     unit_id: int,
+    response: Response,
     book_service: BookService = Depends(get_book_service),
-    current_service: UserService = Depends(get_current_user),
-    subscription_service: SubscriptionService = Depends(get_subscription_service),
+    entitlements: Entitlements = Depends(get_user_entitlements),
+    _: str = Depends(check_catalog_etag),
 ):
-    subunits = await book_service.get_subunits_by_unit_id(unit_id)
-    book = await book_service.get_book_by_unit_id(unit_id)
-    subunits = TypeAdapter(List[SubUnitBase]).validate_python(subunits)
-    full_subscription = await subscription_service.check_user_has_a_full_subscription(
-        current_service.id
-    )
-    if full_subscription:
-        for subunit in subunits:
-            subunit.is_preview = True
-    else:
-        book_subscription = await subscription_service.check_user_subscription_for_book(
-            current_service.id, book.id
-        )
-        if book_subscription:
-            for subunit in subunits:
-                subunit.is_preview = True
-    return subunits
+    body = await book_service.get_subunits_json(unit_id, entitlements)
+    return JSONBytesResponse(body, headers=response.headers)
+
+
+# Lesson text of a subunit, kept out of the catalog and quiz responses. The body is
+# compressed once per content version (gzip, and brotli when it is installed), and
+# revalidated through its ETag (see `check_subunit_content_etag`).
+@router.get(
+    "/subunit/{subunit_id}/content",
+    response_model=SubUnitContent | SubscriptionError,
+)
+@query_budget(5)
+async def get_subunit_content(
+    subunit_id: int,
+    response: Response,
+    lang: ContentLanguage = ContentLanguage.EN,
+    accept_encoding: Optional[str] = Header(None),
+    book_service: BookService = Depends(get_book_service),
+    etag: Optional[str] = Depends(check_subunit_content_etag),
+):
+    if etag is None:
+        return SubscriptionError
+
+    payload = await book_service.get_subunit_content(subunit_id, lang)
+    coding, body = payload.negotiate(accept_encoding)
+    if coding is not None:
+        response.headers["Content-Encoding"] = coding
+    return JSONBytesResponse(body, headers=response.headers)
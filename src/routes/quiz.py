@@ -1,25 +1,39 @@
-from typing import List
-from fastapi import APIRouter, Depends, Response
+from typing import AsyncIterator, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from src.schemas import (
     Question,
     SubmitAnswerRequest,
     SubmitAnswerResponse,
+    BatchSubmitRequest,
+    BatchSubmitResult,
+    BatchSubmitResponse,
     SubscriptionError,
 )
 from src.services import QuizService, UserProgressService
 from src.dependencies import (
     get_quiz_service,
+    get_read_quiz_service,
     get_current_user,
     get_user_progress_service,
+    get_user_entitlements,
     check_user_subscription_and_preview,
 )
+from src.cache import Entitlements
 from src.models import User
+from src.middlewares import query_budget
+from src.serialization import JSONBytesResponse, QUESTION_ADAPTER
 
 router = APIRouter()
 
+# Page size of the subunit question listing
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
 
 # GET Question and Choices without the answer
 @router.get("/question/{question_id}", response_model=Question | SubscriptionError)
+@query_budget(5)
 async def get_question_with_options(
     question_id: int,
     quiz_service: QuizService = Depends(get_quiz_service),
@@ -32,21 +46,24 @@ async def get_question_with_options(
     # Associate the user with the progress service
     user_progress_service.associate_user(current_user)
 
-    # Fetch the question along with its choices and related entities (book, unit, subunit)
-    question = await quiz_service.get_question_with_choices(question_id)
+    # Fetch the encoded question along with its choices
+    body = await quiz_service.get_question_json(question_id)
+
+    # Book, unit and subunit ids of the question
+    answer_key = await quiz_service.get_answer_key(question_id)
 
     # Update user progress with the relevant question data
     await user_progress_service.update_user_progress(
-        book_id=question["book"]["id"],
-        unit_id=question["unit"]["id"],
-        sub_unit_id=question["subunit"]["id"],
+        book_id=answer_key.book_id,
+        unit_id=answer_key.unit_id,
+        sub_unit_id=answer_key.subunit_id,
         question_id=question_id,
         selected_choice=None,
         is_correct=False,
         status="read",
     )
 
-    return question
+    return JSONBytesResponse(body)
 
 
 # POST Submit Answer and Check Correctness
@@ -54,6 +71,7 @@ async def get_question_with_options(
     "/question/{question_id}/submit",
     response_model=SubmitAnswerResponse | SubscriptionError,
 )
+@query_budget(6)
 async def submit_answer(
     question_id: int,
     submit_request: SubmitAnswerRequest,
@@ -67,8 +85,8 @@ async def submit_answer(
     # Associate the user with the progress service
     user_progress_service.associate_user(current_user)
 
-    # Fetch the question with choices
-    question = await quiz_service.get_question_with_choices(question_id)
+    # Fetch the question's answer key (ids of its choices, subunit, unit and book)
+    answer_key = await quiz_service.get_answer_key(question_id)
 
     # Submit the answer and check correctness
     choice_id = submit_request.choice_id
@@ -76,9 +94,9 @@ async def submit_answer(
 
     # Update user progress with the selected choice
     _ = await user_progress_service.update_user_progress(
-        book_id=question["book"]["id"],
-        unit_id=question["unit"]["id"],
-        sub_unit_id=question["subunit"]["id"],
+        book_id=answer_key.book_id,
+        unit_id=answer_key.unit_id,
+        sub_unit_id=answer_key.subunit_id,
         question_id=question_id,
         selected_choice=choice_id,
         is_correct=(submitted_response["correct"]),
@@ -88,16 +106,124 @@ async def submit_answer(
     return submitted_response
 
 
+# POST Submit several answers at once
+@router.post("/questions/submit", response_model=BatchSubmitResponse)
+@query_budget(8)
+async def submit_answers(
+    submit_request: BatchSubmitRequest,
+    quiz_service: QuizService = Depends(get_quiz_service),
+    current_user: User = Depends(get_current_user),
+    user_progress_service: UserProgressService = Depends(get_user_progress_service),
+    entitlements: Entitlements = Depends(get_user_entitlements),
+):
+    """
+    Grades a list of answers and records them in one transaction.
+    Results are returned in the order of the answers; an answer that can't be graded
+    (unknown question or choice, no access) gets an `error` instead of failing the batch.
+    """
+    user_progress_service.associate_user(current_user)
+    answers = submit_request.answers
+
+    # Answer keys of every question, and access checked once per distinct subunit
+    answer_keys = await quiz_service.get_answer_keys(
+        answer.question_id for answer in answers
+    )
+    locked_subunits = {
+        answer_key.subunit_id
+        for answer_key in answer_keys.values()
+        if not entitlements.can_access_book(answer_key.book_id)
+    }
+    if locked_subunits:
+        locked_subunits -= await quiz_service.get_preview_subunit_ids(locked_subunits)
+
+    results = []
+    progress = []
+    for answer in answers:
+        result = BatchSubmitResult(
+            question_id=answer.question_id, choice_id=answer.choice_id
+        )
+        results.append(result)
+
+        answer_key = answer_keys.get(answer.question_id)
+        if answer_key is None:
+            result.error = "Question not found"
+            continue
+        if answer_key.subunit_id in locked_subunits:
+            result.error = SubscriptionError().detail
+            continue
+
+        try:
+            graded = quiz_service.grade(answer_key, answer.choice_id)
+        except HTTPException as e:
+            result.error = e.detail
+            continue
+
+        result.correct = graded["correct"]
+        result.correct_option_id = graded["correct_option_id"]
+        result.message = graded["message"]
+        progress.append(
+            {
+                "book_id": answer_key.book_id,
+                "unit_id": answer_key.unit_id,
+                "sub_unit_id": answer_key.subunit_id,
+                "question_id": answer.question_id,
+                "selected_choice": answer.choice_id,
+                "is_correct": graded["correct"],
+            }
+        )
+
+    # All graded answers and their rollups are written in one transaction
+    await user_progress_service.record_submitted_answers(progress)
+
+    return BatchSubmitResponse(results=results)
+
+
 # GET API: Get questions by subunit_id
 @router.get(
     "/subunit/{subunit_id}/questions", response_model=List[Question] | SubscriptionError
 )
+@query_budget(6)
 async def get_questions_by_subunit(
     subunit_id: int,
-    quiz_service: QuizService = Depends(get_quiz_service),
+    response: Response,
+    after_id: Optional[int] = Query(None, description="Cursor: last question id seen"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = Query(False, description="Stream all questions as NDJSON"),
+    quiz_service: QuizService = Depends(get_read_quiz_service),
     _: User = Depends(get_current_user),
     has_access: bool = Depends(check_user_subscription_and_preview),
 ):
+    """
+    Lists a subunit's questions.
+
+    - Without `after_id`/`limit`, all questions are returned at once.
+    - With `after_id` and/or `limit`, one page is returned; the cursor of the next page is
+      in the `X-Next-Cursor` header (absent on the last page).
+    - With `stream=true`, all questions are streamed as newline-delimited JSON.
+    """
     if not has_access:
         return SubscriptionError
-    return await quiz_service.get_questions_by_subunit_id(subunit_id)
+
+    if stream:
+        return StreamingResponse(
+            _ndjson(quiz_service.stream_questions_by_subunit_id(subunit_id)),
+            media_type="application/x-ndjson",
+        )
+
+    if after_id is None and limit is None:
+        body = await quiz_service.get_questions_json_by_subunit_id(subunit_id)
+        return JSONBytesResponse(body)
+
+    questions, next_cursor = await quiz_service.get_questions_page_by_subunit_id(
+        subunit_id, limit or DEFAULT_PAGE_SIZE, after_id
+    )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return questions
+
+
+async def _ndjson(questions: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    async for question in questions:
+        yield QUESTION_ADAPTER.dump_json(
+            QUESTION_ADAPTER.validate_python(question)
+        ) + b"\n"
@@ -1,8 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List
 from src.models import User
+from src.middlewares import query_budget
 from src.services import SubscriptionService
-from src.dependencies import get_current_user, get_subscription_service
+from src.dependencies import (
+    get_current_user,
+    get_subscription_service,
+    get_read_subscription_service,
+)
 from src.schemas import (
     CreateSubscriptionResponse,
     CreateSubscriptionRequest,
@@ -18,6 +23,7 @@ router = APIRouter()
     "/create",
     response_model=CreateSubscriptionResponse,
 )
+@query_budget(6)
 async def create_subscription(
     create_subscription_request: CreateSubscriptionRequest,
     current_user: User = Depends(get_current_user),
@@ -62,9 +68,10 @@ async def mock_payment_service() -> bool:
 
 # GET all subscription types
 @router.get("/all", response_model=List[SubscriptionType])
+@query_budget(2)
 async def get_all_subscription_types(
     _: User = Depends(get_current_user),
-    subscription_service: SubscriptionService = Depends(get_subscription_service),
+    subscription_service: SubscriptionService = Depends(get_read_subscription_service),
 ):
     """
     Fetch all subscription types (full and base subscription).
@@ -1,22 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException
 from src.models import User
-from src.services import UserProgressService, QuizService, SubscriptionService
+from src.middlewares import query_budget
+from src.services import UserProgressService, SubscriptionService
 from src.schemas import UserProgressResponse, ActiveSubscription
 from src.dependencies import (
     get_user_progress_service,
     get_current_user,
-    get_quiz_service,
-    get_subscription_service,
+    get_read_subscription_service,
 )
 
 router = APIRouter()
 
 
 @router.get("/progress", response_model=UserProgressResponse)
+@query_budget(2)
 async def get_user_progress_by_type(
     type: str,
     type_id: int,
-    quiz_service: QuizService = Depends(get_quiz_service),
     user_progress_service: UserProgressService = Depends(get_user_progress_service),
     current_user: User = Depends(get_current_user),
 ):
@@ -27,9 +27,7 @@ async def get_user_progress_by_type(
     user_progress_service.associate_user(current_user)
 
     # Call service to fetch user progress
-    user_progress = await user_progress_service.get_user_progress_by_type(
-        quiz_service, type, type_id
-    )
+    user_progress = await user_progress_service.get_user_progress_by_type(type, type_id)
 
     if not user_progress:
         raise HTTPException(status_code=404, detail="No progress found")
@@ -39,9 +37,10 @@ async def get_user_progress_by_type(
 
 # GET User's active subscription
 @router.get("/active-subscription", response_model=ActiveSubscription)
+@query_budget(2)
 async def get_active_subscription(
     current_user: User = Depends(get_current_user),
-    subscription_service: SubscriptionService = Depends(get_subscription_service),
+    subscription_service: SubscriptionService = Depends(get_read_subscription_service),
 ):
     """
     Get the active subscription for the current user.
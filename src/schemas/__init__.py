@@ -1,9 +1,16 @@
 from .choice import Choice
 from .question import Question
 from .user_progress import UserProgressBase, RecentQuestionDetails, UserProgressResponse
-from .requests import SubmitAnswerRequest, CreateSubscriptionRequest
+from .requests import (
+    SubmitAnswerRequest,
+    BatchAnswer,
+    BatchSubmitRequest,
+    CreateSubscriptionRequest,
+)
 from .responses import (
     SubmitAnswerResponse,
+    BatchSubmitResult,
+    BatchSubmitResponse,
     CreateSubscriptionResponse,
     SubscriptionType,
     ActiveSubscription,
@@ -18,6 +25,10 @@ __all__ = [
     "UserProgressResponse",
     "SubmitAnswerRequest",
     "SubmitAnswerResponse",
+    "BatchAnswer",
+    "BatchSubmitRequest",
+    "BatchSubmitResult",
+    "BatchSubmitResponse",
     "SubscriptionError",
     "CreateSubscriptionResponse",
     "CreateSubscriptionRequest",
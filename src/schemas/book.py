@@ -3,6 +3,7 @@ from typing import List
 
 from pydantic import BaseModel
 from typing import List, Optional
+from src.enums import ContentLanguage
 
 
 class SubUnitBase(BaseModel):
@@ -35,3 +36,9 @@ class BookBase(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class SubUnitContent(BaseModel):
+    id: int
+    lang: ContentLanguage
+    content: Optional[str] = None
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from typing import List
+from pydantic import BaseModel, Field
 from src.enums import SubscriptionTypeEnum
 
 
@@ -6,6 +7,16 @@ class SubmitAnswerRequest(BaseModel):
     choice_id: int
 
 
+class BatchAnswer(BaseModel):
+    question_id: int
+    choice_id: int
+
+
+# Request model for submitting several answers at once (e.g. a whole subunit quiz)
+class BatchSubmitRequest(BaseModel):
+    answers: List[BatchAnswer] = Field(min_length=1, max_length=200)
+
+
 # Request model for creating a subscription
 class CreateSubscriptionRequest(BaseModel):
     subscription_type: SubscriptionTypeEnum
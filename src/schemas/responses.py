@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import List
 
 
 class SubmitAnswerResponse(BaseModel):
@@ -8,6 +9,21 @@ class SubmitAnswerResponse(BaseModel):
     correct_option_id: int
 
 
+class BatchSubmitResult(BaseModel):
+    question_id: int
+    choice_id: int
+    # None when the answer could not be graded, see `error`
+    correct: bool | None = None
+    correct_option_id: int | None = None
+    message: str | None = None
+    error: str | None = None
+
+
+class BatchSubmitResponse(BaseModel):
+    # In the order of the submitted answers
+    results: List[BatchSubmitResult]
+
+
 class CreateSubscriptionResponse(BaseModel):
     message: str
 
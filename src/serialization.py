@@ -0,0 +1,149 @@
+"""
+Serialization fast path: payloads are validated and encoded to JSON once, with
+adapters built at import time, and served as raw bytes.
+
+A route returning a `JSONBytesResponse` bypasses FastAPI's `response_model`
+validation and encoding; its bytes must already have the shape of the response model.
+"""
+
+import gzip
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from pydantic import TypeAdapter
+from starlette.responses import Response
+from src.cache import Entitlements
+from src.schemas import Question
+from src.schemas.book import BookBase, UnitBase, SubUnitBase, SubUnitContent
+
+try:
+    import brotli
+except ImportError:  # Optional: without it, bodies are only gzip-compressed
+    brotli = None
+
+BOOK_ADAPTER = TypeAdapter(BookBase)
+UNIT_LIST_ADAPTER = TypeAdapter(List[UnitBase])
+SUBUNIT_LIST_ADAPTER = TypeAdapter(List[SubUnitBase])
+QUESTION_ADAPTER = TypeAdapter(Question)
+QUESTION_LIST_ADAPTER = TypeAdapter(List[Question])
+SUBUNIT_CONTENT_ADAPTER = TypeAdapter(SubUnitContent)
+
+# Bodies shorter than this are sent as they are: compressing them saves next to nothing
+MIN_COMPRESSED_SIZE = 512
+
+
+class JSONBytesResponse(Response):
+    media_type = "application/json"
+
+
+class CatalogPayload(NamedTuple):
+    """
+    A catalog payload encoded twice: as seen without access to its book (only the
+    preview subunits flagged) and with access (every subunit flagged).
+    """
+
+    book_id: int
+    locked: bytes
+    unlocked: bytes
+
+    def for_entitlements(self, entitlements: Entitlements) -> bytes:
+        if entitlements.can_access_book(self.book_id):
+            return self.unlocked
+        return self.locked
+
+
+def encode(adapter: TypeAdapter, value: Any) -> bytes:
+    return adapter.dump_json(adapter.validate_python(value))
+
+
+def _subunits(value: Any) -> Iterable[SubUnitBase]:
+    if isinstance(value, list):
+        for item in value:
+            yield from _subunits(item)
+    elif isinstance(value, BookBase):
+        yield from _subunits(value.units)
+    elif isinstance(value, UnitBase):
+        yield from _subunits(value.subunits)
+    elif isinstance(value, SubUnitBase):
+        yield value
+
+
+def encode_catalog(book_id: int, adapter: TypeAdapter, value: Any) -> CatalogPayload:
+    """
+    Encodes a book, unit list or subunit list of the catalog in both of its variants.
+    """
+    models = adapter.validate_python(value)
+    locked = adapter.dump_json(models)
+    for subunit in _subunits(models):
+        subunit.is_preview = True
+    return CatalogPayload(book_id, locked, adapter.dump_json(models))
+
+
+def json_array(items: Iterable[bytes]) -> bytes:
+    return b"[" + b",".join(items) + b"]"
+
+
+class CompressedPayload(NamedTuple):
+    """
+    An encoded payload along with its compressed variants, by content coding, each
+    smaller than the payload itself.
+    """
+
+    body: bytes
+    encodings: Dict[str, bytes]
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.body) + sum(map(len, self.encodings.values()))
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Tuple[Optional[str], bytes]:
+        """
+        The content coding (None for none) and body to send to a client sending
+        `accept_encoding`, preferring brotli over gzip.
+        """
+        accepted = accepted_encodings(accept_encoding)
+        for coding in ("br", "gzip"):
+            if coding in accepted and coding in self.encodings:
+                return coding, self.encodings[coding]
+        return None, self.body
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> frozenset:
+    """
+    Content codings an `Accept-Encoding` header accepts: those listed without q=0, and
+    through "*" those not listed at all.
+    """
+    qualities: Dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+
+    accepted = {coding for coding, quality in qualities.items() if quality > 0}
+    if qualities.get("*", 0) > 0:
+        accepted.update(coding for coding in ("br", "gzip") if coding not in qualities)
+    return frozenset(accepted)
+
+
+def compress(body: bytes) -> CompressedPayload:
+    """
+    Compresses a payload once, to be served to every client that accepts it.
+    """
+    encodings = {}
+    if len(body) >= MIN_COMPRESSED_SIZE:
+        # mtime=0: the same body always compresses to the same bytes
+        encodings["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            encodings["br"] = brotli.compress(body, mode=brotli.MODE_TEXT, quality=9)
+    return CompressedPayload(
+        body,
+        {coding: data for coding, data in encodings.items() if len(data) < len(body)},
+    )
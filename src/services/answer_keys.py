@@ -0,0 +1,346 @@
+import asyncio
+import contextvars
+import logging
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from src.cache import CatalogSnapshot
+from src.db.database import async_session
+from src.models import Question, Choice, SubUnit, Unit
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip while building the index
+LOAD_BATCH_SIZE = 5000
+
+# Seconds before a failed background reload is retried
+RELOAD_RETRY_INTERVAL = 10.0
+
+
+class AnswerKey(NamedTuple):
+    question_id: int
+    subunit_id: int
+    unit_id: int
+    book_id: int
+    choice_ids: Tuple[int, ...]
+    correct_choice_id: Optional[int]
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """
+    Column arrays, one entry per question, sorted by question id. Never modified once
+    built: changes produce a new snapshot. The columns are either arrays, or
+    memoryviews over a mapped catalog snapshot.
+    The choices of question i are `choice_ids[choice_start[i]:choice_start[i + 1]]`.
+    """
+
+    question_ids: array
+    subunit_ids: array
+    correct_choice_ids: array  # 0 when the question has no correct choice
+    choice_start: array
+    choice_ids: array
+    # Subunit id -> (unit id, book id); there are far fewer subunits than questions
+    subunits: Dict[int, Tuple[int, int]]
+
+    @classmethod
+    def empty(cls) -> "_Snapshot":
+        return cls(array("i"), array("i"), array("i"), array("i", [0]), array("i"), {})
+
+    def lookup(self, question_id: int) -> Optional[AnswerKey]:
+        i = bisect_left(self.question_ids, question_id)
+        if i == len(self.question_ids) or self.question_ids[i] != question_id:
+            return None
+
+        subunit_id = self.subunit_ids[i]
+        unit_id, book_id = self.subunits.get(subunit_id, (0, 0))
+        return AnswerKey(
+            question_id=question_id,
+            subunit_id=subunit_id,
+            unit_id=unit_id,
+            book_id=book_id,
+            choice_ids=tuple(
+                self.choice_ids[self.choice_start[i] : self.choice_start[i + 1]]
+            ),
+            correct_choice_id=self.correct_choice_ids[i] or None,
+        )
+
+    def keys(self) -> Iterable[AnswerKey]:
+        for question_id in self.question_ids:
+            yield self.lookup(question_id)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            column.itemsize * len(column)
+            for column in (
+                self.question_ids,
+                self.subunit_ids,
+                self.correct_choice_ids,
+                self.choice_start,
+                self.choice_ids,
+            )
+        )
+
+
+class _SnapshotBuilder:
+    """
+    Builds a snapshot from answer keys, or from (question, choice) rows, appended in
+    question id order.
+    """
+
+    def __init__(self, subunits: Dict[int, Tuple[int, int]]):
+        self.snapshot = _Snapshot.empty()
+        self.snapshot.subunits.update(subunits)
+
+    def add(
+        self,
+        question_id: int,
+        subunit_id: int,
+        choice_ids: Iterable[int],
+        correct_choice_id: Optional[int],
+    ) -> None:
+        snapshot = self.snapshot
+        snapshot.question_ids.append(question_id)
+        snapshot.subunit_ids.append(subunit_id or 0)
+        snapshot.correct_choice_ids.append(correct_choice_id or 0)
+        snapshot.choice_ids.extend(choice_ids)
+        snapshot.choice_start.append(len(snapshot.choice_ids))
+
+    def add_row(
+        self,
+        question_id: int,
+        subunit_id: int,
+        choice_id: Optional[int],
+        is_correct: Optional[bool],
+    ) -> None:
+        """
+        Adds one row of a question LEFT JOIN choice query, ordered by question id.
+        """
+        snapshot = self.snapshot
+        if not snapshot.question_ids or snapshot.question_ids[-1] != question_id:
+            self.add(question_id, subunit_id, (), None)
+        if choice_id is not None:
+            snapshot.choice_ids.append(choice_id)
+            snapshot.choice_start[-1] = len(snapshot.choice_ids)
+            if is_correct and not snapshot.correct_choice_ids[-1]:
+                snapshot.correct_choice_ids[-1] = choice_id
+
+
+class AnswerKeyIndex:
+    """
+    In-memory answer key of every question: its choice ids, correct choice id and
+    subunit/unit/book ids, stored in flat int32 arrays (about 16 bytes per question
+    plus 4 per choice).
+
+    The arrays are built at startup by `load`, or are the columns of the catalog
+    snapshot shared by the workers of the host (`attach`). When content is published,
+    they are rebuilt in the background (`reload`) or replaced by the new snapshot.
+    Questions missing from them (e.g. created after the last load) are read from the
+    database into a small overlay dict.
+    """
+
+    def __init__(self, session_factory=async_session):
+        self.session_factory = session_factory
+        self._snapshot = _Snapshot.empty()
+        # Question id -> answer key, for the questions read on a miss
+        self._overlay: Dict[int, Optional[AnswerKey]] = {}
+        self._lock = asyncio.Lock()
+        self._reload_task: Optional[asyncio.Task] = None
+        self._reload_requested = False
+        self.loaded = False
+
+    def __len__(self) -> int:
+        count = len(self._snapshot.question_ids)
+        for question_id, key in self._overlay.items():
+            in_snapshot = self._snapshot.lookup(question_id) is not None
+            count += (key is not None) - in_snapshot
+        return count
+
+    @property
+    def nbytes(self) -> int:
+        return self._snapshot.nbytes
+
+    def lookup(self, question_id: int) -> Optional[AnswerKey]:
+        """
+        Answer key of a question from memory only.
+        """
+        if question_id in self._overlay:
+            return self._overlay[question_id]
+        return self._snapshot.lookup(question_id)
+
+    async def get(
+        self, question_id: int, db: Optional[AsyncSession] = None
+    ) -> Optional[AnswerKey]:
+        """
+        Answer key of a question, read from the database on a miss.
+        Returns None if the question doesn't exist.
+        """
+        return (await self.get_many([question_id], db)).get(question_id)
+
+    async def get_many(
+        self, question_ids: Iterable[int], db: Optional[AsyncSession] = None
+    ) -> Dict[int, AnswerKey]:
+        """
+        Answer keys of several questions; the misses are read in a single query.
+        Questions that don't exist are left out.
+        """
+        keys = {}
+        missing = []
+        for question_id in set(question_ids):
+            key = self.lookup(question_id)
+            if key is not None:
+                keys[question_id] = key
+            elif question_id not in self._overlay:
+                missing.append(question_id)
+
+        if missing:
+            fetched = await self._fetch(missing, db)
+            # Questions that don't exist are remembered too, so they aren't read again
+            for question_id in missing:
+                self._overlay[question_id] = fetched.get(question_id)
+            keys.update(fetched)
+
+        return keys
+
+    async def load(self) -> None:
+        """
+        (Re)builds the arrays from the database and swaps them in.
+        """
+        async with self._lock:
+            async with self.session_factory() as db:
+                snapshot = await self.read_snapshot(db)
+
+            self._snapshot = snapshot
+            self._overlay = {}
+            self.loaded = True
+
+        logger.info(
+            "Answer key index loaded: %d questions, %d bytes",
+            len(self._snapshot.question_ids),
+            self._snapshot.nbytes,
+        )
+
+    def reload(self) -> None:
+        """
+        Starts a `load` in the background, e.g. when content is published; lookups keep
+        using the current arrays meanwhile. A reload requested while one is running is
+        done once it completes, and a failed one is retried.
+        """
+        self._reload_requested = True
+        running = self._reload_task
+        if (
+            running is not None
+            and not running.done()
+            and running.get_loop() is asyncio.get_running_loop()
+        ):
+            return
+        # Outside the calling request's context, so its statements aren't counted there
+        self._reload_task = asyncio.create_task(
+            self._reload(), context=contextvars.Context()
+        )
+
+    async def _reload(self) -> None:
+        while self._reload_requested:
+            self._reload_requested = False
+            try:
+                await self.load()
+            except Exception:
+                logger.exception("Failed to reload the answer key index")
+                self._reload_requested = True
+                await asyncio.sleep(RELOAD_RETRY_INTERVAL)
+
+    async def stop(self) -> None:
+        if self._reload_task is not None and not self._reload_task.done():
+            self._reload_task.cancel()
+            try:
+                await self._reload_task
+            except asyncio.CancelledError:
+                pass
+        self._reload_task = None
+
+    def attach(self, catalog: CatalogSnapshot) -> None:
+        """
+        Serves the answer keys from the columns of a mapped catalog snapshot (see
+        `src.cache.snapshot`) instead of arrays of its own.
+        """
+        self._snapshot = _Snapshot(
+            question_ids=catalog.column("questions.id"),
+            subunit_ids=catalog.column("questions.subunit_id"),
+            correct_choice_ids=catalog.column("questions.correct_choice_id"),
+            choice_start=catalog.column("questions.choice_start"),
+            choice_ids=catalog.column("choices.id"),
+            subunits=catalog.subunit_parents(),
+        )
+        self._overlay = {}
+        self.loaded = True
+
+    @classmethod
+    async def read_snapshot(cls, db: AsyncSession) -> _Snapshot:
+        """
+        Reads every answer key from the database into a new set of arrays.
+        """
+        builder = _SnapshotBuilder(await cls._fetch_subunits(db))
+        result = await db.stream(
+            cls._answer_key_query().execution_options(yield_per=LOAD_BATCH_SIZE)
+        )
+        async for partition in result.partitions():
+            for row in partition:
+                builder.add_row(*row)
+        return builder.snapshot
+
+    @staticmethod
+    def _answer_key_query():
+        return (
+            select(
+                Question.id,
+                Question.subunit_id,
+                Choice.id,
+                Choice.is_correct,
+            )
+            .outerjoin(Choice, Choice.question_id == Question.id)
+            .order_by(Question.id, Choice.id)
+        )
+
+    @staticmethod
+    async def _fetch_subunits(db: AsyncSession) -> Dict[int, Tuple[int, int]]:
+        result = await db.execute(
+            select(SubUnit.id, Unit.id, Unit.book_id).join(
+                Unit, Unit.id == SubUnit.unit_id
+            )
+        )
+        return {
+            subunit_id: (unit_id, book_id) for subunit_id, unit_id, book_id in result
+        }
+
+    async def _fetch(
+        self, question_ids: List[int], db: Optional[AsyncSession] = None
+    ) -> Dict[int, AnswerKey]:
+        if db is None:
+            async with self.session_factory() as db:
+                return await self._fetch(question_ids, db)
+
+        result = await db.execute(
+            self._answer_key_query()
+            .add_columns(Unit.id, Unit.book_id)
+            .join(SubUnit, SubUnit.id == Question.subunit_id)
+            .join(Unit, Unit.id == SubUnit.unit_id)
+            .filter(Question.id.in_(question_ids))
+        )
+        builder = _SnapshotBuilder({})
+        for question_id, subunit_id, choice_id, is_correct, unit_id, book_id in result:
+            builder.add_row(question_id, subunit_id, choice_id, is_correct)
+            builder.snapshot.subunits[subunit_id] = (unit_id, book_id)
+
+        snapshot = builder.snapshot
+        return {
+            question_id: snapshot.lookup(question_id)
+            for question_id in snapshot.question_ids
+        }
+
+
+# Shared index, built by the application lifespan
+answer_keys = AnswerKeyIndex()
@@ -1,126 +1,220 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
 from fastapi import HTTPException
-from src.models import Book, Unit, SubUnit, Question
+from src.enums import ContentLanguage
+from src.models import SubUnit
 from src.schemas.book import BookBase, UnitBase, SubUnitBase
-from typing import List, Dict
+from src.services.catalog import CatalogMaterializer
+from src.services.catalog_snapshot import catalog_snapshots
+from src.services.content import (
+    content_payload_cache,
+    get_payload,
+    payload_cache,
+    read_content_version,
+)
+from src.cache import Entitlements, PayloadCache, SingleFlight
+from src.serialization import (
+    BOOK_ADAPTER,
+    UNIT_LIST_ADAPTER,
+    SUBUNIT_LIST_ADAPTER,
+    SUBUNIT_CONTENT_ADAPTER,
+    CompressedPayload,
+    compress,
+    encode,
+    encode_catalog,
+    json_array,
+)
+from typing import Any, List, Dict, Optional, Tuple
+
+# Concurrent reads of the same book, at the same content version, share a single load
+book_flight = SingleFlight("book")
 
 
 class BookService:
     def __init__(self, db: AsyncSession):
         # Initializes the BookService with the given database session
         self.db = db
+        self.catalog = CatalogMaterializer(db)
+        # Read once per request, so the ETag and the payloads agree on it
+        self._content_version: Optional[Tuple[int, bool]] = None
+
+    async def get_content_version(self) -> int:
+        """
+        Returns the current catalog content version (see `read_content_version`).
+        """
+        if self._content_version is None:
+            self._content_version = await read_content_version(self.db)
+        return self._content_version[0]
+
+    async def _cached(
+        self, *key, cache: PayloadCache = payload_cache
+    ) -> Tuple[Tuple, Optional[Any]]:
+        """
+        Looks up a payload of the current content version.
+        Returns its full cache key, and the payload (None on a miss).
+        """
+        version = await self.get_content_version()
+        key = (version, *key)
+        return key, get_payload(key, stale=self._content_version[1], cache=cache)
+
+    async def get_all_books_json(self, entitlements: Entitlements) -> bytes:
+        """
+        The encoded catalog as seen with `entitlements`. Each book is encoded once per
+        content version, and also serves `get_book_json`.
+        """
+        key, payloads = await self._cached("books")
+        if payloads is None:
+            payloads = []
+            for book in await self.get_all_books():
+                payload = encode_catalog(book["id"], BOOK_ADAPTER, book)
+                payload_cache.set((key[0], "book", book["id"]), payload)
+                payloads.append(payload)
+            payload_cache.set(key, payloads)
+
+        return json_array(
+            payload.for_entitlements(entitlements) for payload in payloads
+        )
+
+    async def get_book_json(self, book_id: int, entitlements: Entitlements) -> bytes:
+        key, payload = await self._cached("book", book_id)
+        if payload is None:
+            book = await self.get_book_by_id(book_id)
+            # Callers that shared the load find it already encoded by the first one
+            payload = payload_cache.get(key)
+            if payload is None:
+                payload = encode_catalog(book_id, BOOK_ADAPTER, book)
+                payload_cache.set(key, payload)
+
+        return payload.for_entitlements(entitlements)
+
+    async def get_units_json(self, book_id: int, entitlements: Entitlements) -> bytes:
+        key, payload = await self._cached("units", book_id)
+        if payload is None:
+            units = await self.get_units_by_book_id(book_id)
+            payload = encode_catalog(book_id, UNIT_LIST_ADAPTER, units)
+            payload_cache.set(key, payload)
+
+        return payload.for_entitlements(entitlements)
+
+    async def get_subunits_json(
+        self, unit_id: int, entitlements: Entitlements
+    ) -> bytes:
+        key, payload = await self._cached("subunits", unit_id)
+        if payload is None:
+            book = await self.get_book_by_unit_id(unit_id)
+            payload = encode_catalog(
+                book["id"], SUBUNIT_LIST_ADAPTER, book["units"][0]["subunits"]
+            )
+            payload_cache.set(key, payload)
+
+        return payload.for_entitlements(entitlements)
+
+    async def get_subunit_content(
+        self, subunit_id: int, lang: ContentLanguage
+    ) -> CompressedPayload:
+        """
+        A subunit's lesson text in one language, encoded and compressed once per
+        content version. Only this reads the (deferred) content columns.
+        """
+        key, payload = await self._cached(
+            "subunit_content", subunit_id, lang.value, cache=content_payload_cache
+        )
+        if payload is None:
+            column = (
+                SubUnit.content_hi if lang is ContentLanguage.HI else SubUnit.content_en
+            )
+            result = await self.db.execute(
+                select(column).filter(SubUnit.id == subunit_id)
+            )
+            row = result.first()
+            if row is None:
+                raise HTTPException(status_code=404, detail="Subunit not found")
+
+            body = encode(
+                SUBUNIT_CONTENT_ADAPTER,
+                {"id": subunit_id, "lang": lang, "content": row[0]},
+            )
+            payload = compress(body)
+            content_payload_cache.set(key, payload)
+
+        return payload
+
+    async def _materialize(
+        self, book_id: Optional[int] = None, unit_id: Optional[int] = None
+    ) -> List[Dict[str, any]]:
+        """
+        The catalog tree (see `CatalogMaterializer.materialize`), read from the shared
+        catalog snapshot when this worker has the one of the current content version.
+        """
+        snapshot = catalog_snapshots.get(await self.get_content_version())
+        if snapshot is not None:
+            return snapshot.materialize(book_id=book_id, unit_id=unit_id)
+        return await self.catalog.materialize(book_id=book_id, unit_id=unit_id)
 
     async def get_all_books(self) -> List[BookBase]:
         """
         Fetches all books along with their units and subunits.
-        Uses `get_book_by_id` to get full details for each book.
+        The whole tree is built by the catalog materializer in a fixed number of queries.
         """
-        # Fetch all books
-        result = await self.db.execute(
-            select(Book)
-        )  # Fetch books without joining units/subunits
-        books = result.scalars().all()
+        books = await self._materialize()
 
         if not books:
             raise HTTPException(status_code=404, detail="No books found")
 
-        # Fetch detailed information (units, subunits, and question counts) for each book
-        books_with_details = []
-        for book in books:
-            book_details = await self.get_book_by_id(book.id)
-            books_with_details.append(book_details)
-
-        return books_with_details
+        return books
 
     async def get_book_by_id(self, book_id: int) -> Dict[str, any]:
         """
-        Fetches a single book by its ID along with its units and subunits.
-        Uses the existing methods to get question counts for each unit and subunit.
+        Fetches a single book by its ID along with its units, subunits and question counts.
+        Concurrent calls for the same book and content version share one load, and the
+        same result.
         """
-        # Fetch the book with its units
-        result = await self.db.execute(select(Book).filter(Book.id == book_id))
-        book = result.scalars().first()
-
-        if not book:
-            raise HTTPException(status_code=404, detail="Book not found")
+        # A load started before a publish is never shared with callers after it
+        version = await self.get_content_version()
+        return await book_flight.do(
+            (version, book_id), lambda: self._load_book_by_id(book_id)
+        )
 
-        # Fetch the units for the book
-        units = await self.get_units_by_book_id(book_id)
+    async def _load_book_by_id(self, book_id: int) -> Dict[str, any]:
+        books = await self._materialize(book_id=book_id)
 
-        # For each unit, fetch subunits and question count per subunit
-        for unit in units:
-            unit_id = unit["id"]
-            # Get subunits with their question count
-            subunits = await self.get_subunits_by_unit_id(unit_id)
-            unit["subunits"] = subunits
+        if not books:
+            raise HTTPException(status_code=404, detail="Book not found")
+        # As before the catalog materializer, a book without units isn't served
+        if not books[0]["units"]:
+            raise HTTPException(status_code=404, detail="No units found for this book")
 
-        # Combine the book data with its units and subunits
-        return {
-            "id": book.id,
-            "title_en": book.title_en,
-            "title_hi": book.title_hi,
-            "units": units,
-        }
+        return books[0]
 
     async def get_units_by_book_id(self, book_id: int) -> List[UnitBase]:
         """
         Fetches all units for a specific book, along with their subunits and question counts.
         """
-        result = await self.db.execute(select(Unit).filter(Unit.book_id == book_id))
-        units = result.scalars().all()
+        books = await self._materialize(book_id=book_id)
+        units = books[0]["units"] if books else []
 
         if not units:
             raise HTTPException(status_code=404, detail="No units found for this book")
 
-        # Add question count to each unit
-        for unit in units:
-            unit.question_count = len(unit.subunits)
-
-        return [
-            {
-                "id": unit.id,
-                "title_en": unit.title_en,
-                "title_hi": unit.title_hi,
-                "question_count": unit.question_count,
-            }
-            for unit in units
-        ]
+        return units
 
     async def get_subunits_by_unit_id(self, unit_id: int) -> List[SubUnitBase]:
         """
         Fetches all subunits for a specific unit, including the count of questions per subunit.
         """
-        result = await self.db.execute(
-            select(SubUnit)
-            .filter(SubUnit.unit_id == unit_id)
-            .join(Question, Question.subunit_id == SubUnit.id, isouter=True)
-            .group_by(SubUnit.id)
-            .add_columns(func.count(Question.id).label("question_count"))
-        )
-        subunits = result.all()
+        book = await self.get_book_by_unit_id(unit_id)
+        return book["units"][0]["subunits"]
+
+    async def get_book_by_unit_id(self, unit_id: int) -> Dict[str, any]:
+        """
+        Fetches the book owning a specific unit. The returned book only contains that unit,
+        with its subunits and the count of questions per subunit.
+        """
+        books = await self._materialize(unit_id=unit_id)
 
-        if not subunits:
+        if not books or not books[0]["units"][0]["subunits"]:
             raise HTTPException(
                 status_code=404, detail="No subunits found for this unit"
             )
 
-        return [
-            {
-                "id": subunit.id,
-                "title_en": subunit.title_en,
-                "title_hi": subunit.title_hi,
-                "question_count": question_count,
-                "is_preview": True if subunit.preview else False,
-            }
-            for subunit, question_count in subunits
-        ]
-
-    async def get_book_by_unit_id(self, unit_id: int) -> Book:
-        """
-        Fetches all subunits for a specific unit, including the count of questions per subunit.
-        """
-        result = await self.db.execute(select(Unit).filter(Unit.id == unit_id))
-        unit = result.scalars().first()
-        return unit.book
+        return books[0]
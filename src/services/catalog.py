@@ -0,0 +1,126 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import func, exists, true
+from typing import List, Dict, Optional
+from src.models import Book, Unit, SubUnit, Question, PreviewSubunit
+
+
+class CatalogMaterializer:
+    """
+    Builds the book -> unit -> subunit tree, including question counts and preview
+    flags, in a fixed number of column-only queries (books, units, subunits).
+
+    Only plain columns are selected, so none of the relationship loaders on the models
+    are triggered and the statement count does not grow with the size of the catalog.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def materialize(
+        self, book_id: Optional[int] = None, unit_id: Optional[int] = None
+    ) -> List[Dict[str, any]]:
+        """
+        Returns the catalog tree as a list of book dicts.
+
+        - Without arguments, every book is returned.
+        - With `book_id`, only that book is returned.
+        - With `unit_id`, only the book owning that unit is returned, containing just that unit.
+        """
+        # Scope filter shared by all three queries
+        if unit_id is not None:
+            scope = Unit.id == unit_id
+        elif book_id is not None:
+            scope = Unit.book_id == book_id
+        else:
+            scope = true()
+
+        # Books
+        book_query = select(Book.id, Book.title_en, Book.title_hi).order_by(Book.id)
+        if unit_id is not None:
+            book_query = book_query.join(Unit, Unit.book_id == Book.id).filter(scope)
+        elif book_id is not None:
+            book_query = book_query.filter(Book.id == book_id)
+        book_rows = (await self.db.execute(book_query)).all()
+
+        if not book_rows:
+            return []
+
+        # Units
+        unit_rows = (
+            await self.db.execute(
+                select(Unit.id, Unit.title_en, Unit.title_hi, Unit.book_id)
+                .filter(scope)
+                .order_by(Unit.book_id, Unit.unit_number, Unit.id)
+            )
+        ).all()
+
+        # Subunits with their question count and preview flag
+        question_counts = (
+            select(
+                Question.subunit_id,
+                func.count(Question.id).label("question_count"),
+            )
+            .join(SubUnit, SubUnit.id == Question.subunit_id)
+            .join(Unit, Unit.id == SubUnit.unit_id)
+            .filter(scope)
+            .group_by(Question.subunit_id)
+            .subquery()
+        )
+        is_preview = exists().where(PreviewSubunit.subunit_id == SubUnit.id)
+        subunit_rows = (
+            await self.db.execute(
+                select(
+                    SubUnit.id,
+                    SubUnit.title_en,
+                    SubUnit.title_hi,
+                    SubUnit.unit_id,
+                    func.coalesce(question_counts.c.question_count, 0).label(
+                        "question_count"
+                    ),
+                    is_preview.label("is_preview"),
+                )
+                .join(Unit, Unit.id == SubUnit.unit_id)
+                .outerjoin(question_counts, question_counts.c.subunit_id == SubUnit.id)
+                .filter(scope)
+                .order_by(SubUnit.unit_id, SubUnit.subunit_number, SubUnit.id)
+            )
+        ).all()
+
+        # Stitch the tree together in memory
+        subunits_by_unit: Dict[int, List[Dict[str, any]]] = {}
+        for row in subunit_rows:
+            subunits_by_unit.setdefault(row.unit_id, []).append(
+                {
+                    "id": row.id,
+                    "title_en": row.title_en,
+                    "title_hi": row.title_hi,
+                    "question_count": row.question_count,
+                    "is_preview": bool(row.is_preview),
+                }
+            )
+
+        units_by_book: Dict[int, List[Dict[str, any]]] = {}
+        for row in unit_rows:
+            subunits = subunits_by_unit.get(row.id, [])
+            units_by_book.setdefault(row.book_id, []).append(
+                {
+                    "id": row.id,
+                    "title_en": row.title_en,
+                    "title_hi": row.title_hi,
+                    "question_count": sum(
+                        subunit["question_count"] for subunit in subunits
+                    ),
+                    "subunits": subunits,
+                }
+            )
+
+        return [
+            {
+                "id": row.id,
+                "title_en": row.title_en,
+                "title_hi": row.title_hi,
+                "units": units_by_book.get(row.id, []),
+            }
+            for row in book_rows
+        ]
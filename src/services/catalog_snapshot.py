@@ -0,0 +1,324 @@
+"""
+Catalog snapshot shared by the workers of a host (see `src.cache.snapshot`).
+
+The first worker needing the snapshot of a content version builds it from the database
+under a file lock, and atomically replaces the snapshot file; the other workers wait
+for the lock, then map the file it wrote. Each worker swaps its mapping when a new
+content version is published, and falls back to the database while it has none.
+"""
+
+import asyncio
+import contextvars
+import fcntl
+import hashlib
+import logging
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from src.cache.snapshot import (
+    CatalogSnapshot,
+    SnapshotError,
+    StringTable,
+    write_snapshot,
+)
+from src.db.database import async_session
+from src.models import ContentVersion
+from src.services.answer_keys import AnswerKeyIndex, answer_keys
+from src.services.catalog import CatalogMaterializer
+from src.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+async def _read_content_version(db: AsyncSession) -> int:
+    version = await db.scalar(
+        select(ContentVersion.version).filter(ContentVersion.id == 1)
+    )
+    return version or 0
+
+
+async def read_catalog_columns(
+    db: AsyncSession,
+) -> Tuple[int, Dict[str, Union[array, bytearray]]]:
+    """
+    Reads the content version and the catalog content graph, as snapshot columns.
+    Run it in a REPEATABLE READ transaction, so the version matches the content.
+    """
+    version = await _read_content_version(db)
+    books = await CatalogMaterializer(db).materialize()
+    answers = await AnswerKeyIndex.read_snapshot(db)
+    return version, catalog_columns(books, answers)
+
+
+def catalog_columns(
+    books: List[Dict[str, Any]], answers
+) -> Dict[str, Union[array, bytearray]]:
+    """
+    Snapshot columns of a catalog tree (see `CatalogMaterializer.materialize`) and of
+    the answer key arrays (see `AnswerKeyIndex.read_snapshot`).
+    """
+    strings = StringTable()
+    columns: Dict[str, Union[array, bytearray]] = {
+        name: array("i")
+        for name in (
+            "books.id",
+            "books.title_en",
+            "books.title_hi",
+            "books.unit_start",
+            "units.id",
+            "units.book_id",
+            "units.title_en",
+            "units.title_hi",
+            "units.subunit_start",
+            "subunits.id",
+            "subunits.unit_id",
+            "subunits.title_en",
+            "subunits.title_hi",
+            "subunits.question_count",
+        )
+    }
+    preview = bytearray()
+    for book in books:
+        columns["books.id"].append(book["id"])
+        columns["books.title_en"].append(strings.add(book["title_en"]))
+        columns["books.title_hi"].append(strings.add(book["title_hi"]))
+        columns["books.unit_start"].append(len(columns["units.id"]))
+        for unit in book["units"]:
+            columns["units.id"].append(unit["id"])
+            columns["units.book_id"].append(book["id"])
+            columns["units.title_en"].append(strings.add(unit["title_en"]))
+            columns["units.title_hi"].append(strings.add(unit["title_hi"]))
+            columns["units.subunit_start"].append(len(columns["subunits.id"]))
+            for subunit in unit["subunits"]:
+                columns["subunits.id"].append(subunit["id"])
+                columns["subunits.unit_id"].append(unit["id"])
+                columns["subunits.title_en"].append(strings.add(subunit["title_en"]))
+                columns["subunits.title_hi"].append(strings.add(subunit["title_hi"]))
+                columns["subunits.question_count"].append(subunit["question_count"])
+                preview.append(subunit["is_preview"])
+    columns["books.unit_start"].append(len(columns["units.id"]))
+    columns["units.subunit_start"].append(len(columns["subunits.id"]))
+
+    for kind in ("units", "subunits"):
+        ids = columns[f"{kind}.id"]
+        columns[f"{kind}.by_id"] = array(
+            "i", sorted(range(len(ids)), key=ids.__getitem__)
+        )
+    columns["subunits.preview"] = preview
+
+    columns["questions.id"] = answers.question_ids
+    columns["questions.subunit_id"] = answers.subunit_ids
+    columns["questions.correct_choice_id"] = answers.correct_choice_ids
+    columns["questions.choice_start"] = answers.choice_start
+    columns["choices.id"] = answers.choice_ids
+    columns["strings.offsets"] = strings.offsets
+    columns["strings.data"] = strings.data
+    return columns
+
+
+class CatalogSnapshotStore:
+    """
+    The mapped snapshot of this worker, kept in step with the content version.
+
+    `on_swap` is called with each newly mapped snapshot. A failed sync is retried after
+    `retry_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        session_factory=async_session,
+        on_swap: Optional[Callable[[CatalogSnapshot], None]] = None,
+        retry_interval: float = 10.0,
+    ):
+        self.path = Path(path) if path else None
+        self.session_factory = session_factory
+        self.on_swap = on_swap
+        self.retry_interval = retry_interval
+        self.current: Optional[CatalogSnapshot] = None
+        # Snapshots of another database sharing the path are never used
+        self.source = hashlib.blake2b(
+            make_url(get_settings().database.url)
+            .render_as_string(hide_password=True)
+            .encode(),
+            digest_size=16,
+        ).digest()
+        self._task: Optional[asyncio.Task] = None
+        self._synced_version: Optional[int] = None
+        self._retry_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def get(self, version: int) -> Optional[CatalogSnapshot]:
+        """
+        The mapped snapshot, if it is the one of content `version`. Otherwise None, and
+        the snapshot of `version` is mapped in the background.
+        """
+        snapshot = self.current
+        if snapshot is not None and snapshot.content_version == version:
+            return snapshot
+        self.sync(version)
+        return None
+
+    def sync(self, version: int) -> None:
+        """
+        Starts mapping the snapshot of `version` in the background, unless it is
+        already being mapped, or was tried less than `retry_interval` seconds ago.
+        """
+        if not self.enabled:
+            return
+        running = self._task
+        if (
+            running is not None
+            and not running.done()
+            and running.get_loop() is asyncio.get_running_loop()
+        ):
+            return
+        if version == self._synced_version and self._retry_at > time.monotonic():
+            return
+
+        self._synced_version = version
+        self._retry_at = time.monotonic() + self.retry_interval
+        # Outside the calling request's context, so its statements aren't counted there
+        self._task = asyncio.create_task(
+            self._sync(version), context=contextvars.Context()
+        )
+
+    async def _sync(self, version: int) -> None:
+        try:
+            await self.ensure(version)
+        except Exception:
+            logger.warning(
+                "Failed to map the catalog snapshot of content version %s",
+                version,
+                exc_info=True,
+            )
+
+    async def start(self) -> bool:
+        """
+        Maps the snapshot of the current content version at startup.
+        Returns whether one is mapped.
+        """
+        if not self.enabled:
+            return False
+        try:
+            await self.ensure()
+        except Exception:
+            logger.exception("Failed to map the catalog snapshot")
+            return False
+        return True
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def ensure(self, version: Optional[int] = None) -> CatalogSnapshot:
+        """
+        Maps the snapshot of `version` (by default, the current content version) or a
+        newer one, building it first when no worker of the host has yet.
+        """
+        if version is None:
+            async with self.session_factory() as db:
+                version = await _read_content_version(db)
+
+        snapshot = self._open(version)
+        if snapshot is None:
+            loop = asyncio.get_running_loop()
+            lock = await loop.run_in_executor(None, self.lock)
+            try:
+                # Another worker may have built it while this one waited
+                snapshot = self._open(version)
+                if snapshot is None:
+                    snapshot = await self.build()
+            finally:
+                lock.close()
+
+        if snapshot is not self.current:
+            self.current = snapshot
+            if self.on_swap is not None:
+                self.on_swap(snapshot)
+            logger.info(
+                "Catalog snapshot of content version %d mapped (%d bytes)",
+                snapshot.content_version,
+                snapshot.nbytes,
+            )
+        return snapshot
+
+    async def build(self) -> CatalogSnapshot:
+        """
+        Builds the snapshot of the current content from the database, and replaces the
+        snapshot file with it. Call it holding the lock.
+        """
+        started = time.perf_counter()
+        async with self.session_factory() as db:
+            await db.connection(
+                execution_options={"isolation_level": "REPEATABLE READ"}
+            )
+            version, columns = await read_catalog_columns(db)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        size = await asyncio.get_running_loop().run_in_executor(
+            None, write_snapshot, self.path, version, self.source, columns
+        )
+        logger.info(
+            "Catalog snapshot of content version %d built in %.2fs (%d bytes)",
+            version,
+            time.perf_counter() - started,
+            size,
+        )
+        return CatalogSnapshot(self.path)
+
+    def _open(self, version: int) -> Optional[CatalogSnapshot]:
+        """
+        The snapshot file, if it holds `version` or a newer one.
+        """
+        current = self.current
+        try:
+            if current is not None and current.file_id == self._file_id():
+                snapshot = current
+            else:
+                snapshot = CatalogSnapshot(self.path)
+        except FileNotFoundError:
+            return None
+        except SnapshotError:
+            logger.warning("Ignoring unreadable catalog snapshot", exc_info=True)
+            return None
+
+        if snapshot.source != self.source or snapshot.content_version < version:
+            return None
+        return snapshot
+
+    def _file_id(self) -> Tuple[int, int, int]:
+        stat = self.path.stat()
+        return stat.st_dev, stat.st_ino, stat.st_mtime_ns
+
+    def lock(self):
+        """
+        Takes the build lock of the snapshot file, blocking until it is free.
+        The lock is released when the returned file is closed.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock = open(self.path.with_name(self.path.name + ".lock"), "a")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        except BaseException:
+            lock.close()
+            raise
+        return lock
+
+
+# Shared by the services; the answer key index follows the mapped snapshot
+catalog_snapshots = CatalogSnapshotStore(
+    get_settings().catalog_snapshot_path, on_swap=answer_keys.attach
+)
@@ -0,0 +1,108 @@
+import asyncio
+from typing import Any, Hashable, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from src import metrics
+from src.db.database import async_session
+from src.models import ContentVersion
+from src.services.answer_keys import answer_keys
+from src.services.catalog_snapshot import catalog_snapshots
+from src.services.invalidation import BusReset, ContentVersionBumped, invalidation_bus
+from src.cache import ContentVersionCache, PayloadCache
+from src.settings import get_settings
+
+# Encoded catalog and question payloads, keyed by content version first
+payload_cache = PayloadCache()
+
+# Encoded and compressed lesson texts, apart from the small catalog payloads they
+# would otherwise evict, and bounded by their size
+content_payload_cache = PayloadCache(
+    max_bytes=get_settings().content_cache_bytes, sizeof=lambda payload: payload.nbytes
+)
+
+
+def _on_content_version_change(version: int) -> None:
+    # Payloads of the previous version can't be looked up anymore
+    payload_cache.retain_version(version)
+    content_payload_cache.retain_version(version)
+    # Answers are graded against the new content: the answer keys follow the new
+    # snapshot when there is one, and are rebuilt otherwise
+    if catalog_snapshots.enabled:
+        catalog_snapshots.sync(version)
+    else:
+        answer_keys.reload()
+
+
+# Catalog content version shared by every request served by this process
+content_version_cache = ContentVersionCache(on_change=_on_content_version_change)
+
+
+def _on_content_version_bumped(event: ContentVersionBumped) -> None:
+    # Publishing is picked up right away rather than when the cached version expires;
+    # the version change hook then moves the payloads and answer keys along
+    version, _ = content_version_cache.peek()
+    if version is None or event.version > version:
+        content_version_cache.set(event.version)
+
+
+invalidation_bus.subscribe(ContentVersionBumped, _on_content_version_bumped)
+invalidation_bus.subscribe(BusReset, lambda event: content_version_cache.invalidate())
+
+
+async def _load_content_version(db: AsyncSession) -> int:
+    version = await db.scalar(
+        select(ContentVersion.version).filter(ContentVersion.id == 1)
+    )
+    return version or 0
+
+
+async def _refresh_content_version() -> int:
+    """
+    Background re-read of the version, on its own session (the request's session
+    can't be shared with a task that outlives it).
+    """
+    try:
+        async with async_session() as db:
+            version = await _load_content_version(db)
+    except (Exception, asyncio.CancelledError):
+        # Cancelled when it times out
+        metrics.content_version_refreshes_total.inc("error")
+        raise
+    metrics.content_version_refreshes_total.inc("ok")
+    return version
+
+
+async def read_content_version(db: AsyncSession) -> Tuple[int, bool]:
+    """
+    Returns the current catalog content version (0 before anything was published), and
+    whether it is stale.
+
+    Served from the process-wide cache, so most requests don't query it. Once the
+    cached version is older than its TTL it is still returned, flagged as stale, while
+    a background task re-reads it; only the very first read waits for the database.
+    """
+    version, stale = content_version_cache.peek()
+    if version is None:
+        version = await _load_content_version(db)
+        content_version_cache.set(version)
+        return version, False
+
+    if stale:
+        content_version_cache.revalidate(_refresh_content_version)
+    return version, stale
+
+
+def get_payload(
+    key: Tuple[Hashable, ...], stale: bool = False, cache: PayloadCache = payload_cache
+) -> Optional[Any]:
+    """
+    Looks up an encoded payload, keyed by (content version, kind, ...), and counts the
+    lookup in the catalog cache metrics.
+    """
+    payload = cache.get(key)
+    if payload is None:
+        result = "miss"
+    else:
+        result = "stale" if stale else "hit"
+    metrics.catalog_cache_lookups_total.inc(key[1], result)
+    return payload
@@ -0,0 +1,349 @@
+"""
+Cross-worker cache invalidation.
+
+Workers cache state that another worker, on this host or another one, may change:
+entitlements, users, the catalog content version. The worker making the change publishes a
+typed event once it is committed; every worker applies it to its own caches through
+the handlers subscribed to that event type.
+
+Transports (`INVALIDATION_TRANSPORT`):
+
+- "postgres": LISTEN/NOTIFY on a dedicated asyncpg connection, reaching every worker
+  of every host. The connection is re-established when it drops; since events may
+  have been missed meanwhile, a `BusReset` is then dispatched locally.
+- "socket": Unix datagram sockets in a directory shared by the workers of one host
+  (`INVALIDATION_SOCKET_DIR`), for single-host setups and tests.
+- "none": events are only applied by the worker publishing them.
+
+Events carry their wall-clock send time, so receivers record the end-to-end latency
+(across hosts it includes their clock offset).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, ClassVar, Dict, List, Optional, Tuple, Type
+import asyncpg
+from sqlalchemy.engine import make_url
+from src import metrics
+from src.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Postgres notification channel
+CHANNEL = "gk_invalidation"
+
+
+@dataclass(frozen=True)
+class EntitlementsChanged:
+    """
+    A user's subscriptions changed.
+    """
+
+    type: ClassVar[str] = "entitlements_changed"
+    user_id: int
+
+
+@dataclass(frozen=True)
+class ContentVersionBumped:
+    """
+    Catalog content was published as `version`.
+    """
+
+    type: ClassVar[str] = "content_version_bumped"
+    version: int
+
+
+@dataclass(frozen=True)
+class UserUpdated:
+    """
+    A user's account changed.
+    """
+
+    type: ClassVar[str] = "user_updated"
+    user_id: int
+
+
+@dataclass(frozen=True)
+class BusReset:
+    """
+    Dispatched locally only, when events may have been missed (the transport
+    reconnected): handlers should drop what they cache.
+    """
+
+    type: ClassVar[str] = "bus_reset"
+
+
+EVENT_TYPES: Dict[str, Type] = {
+    event_type.type: event_type
+    for event_type in (EntitlementsChanged, ContentVersionBumped, UserUpdated)
+}
+
+
+def encode_event(event, origin: str = "") -> str:
+    return json.dumps(
+        {"type": event.type, "origin": origin, "sent_at": time.time(), **asdict(event)}
+    )
+
+
+def decode_event(payload: str) -> Tuple[object, str, float]:
+    """
+    Returns the event, the origin of the bus that sent it, and its send time.
+    """
+    fields = json.loads(payload)
+    event_type = EVENT_TYPES[fields.pop("type")]
+    origin = fields.pop("origin", "")
+    sent_at = fields.pop("sent_at")
+    return event_type(**fields), origin, sent_at
+
+
+class PostgresTransport:
+    def __init__(
+        self,
+        dsn: str,
+        receive: Callable[[str], None],
+        reset: Callable[[], None],
+        connect_timeout: float = 10.0,
+        reconnect_interval: float = 1.0,
+    ):
+        self.dsn = dsn
+        self.receive = receive
+        self.reset = reset
+        self.connect_timeout = connect_timeout
+        self.reconnect_interval = reconnect_interval
+        self._conn: Optional[asyncpg.Connection] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        # One statement at a time on the connection
+        self._lock = asyncio.Lock()
+        self._stopping = False
+
+    async def start(self) -> None:
+        self._stopping = False
+        try:
+            await self._connect()
+        except (OSError, asyncio.TimeoutError, asyncpg.PostgresError):
+            # Don't hold up the worker: keep trying in the background
+            logger.warning("Invalidation bus failed to connect", exc_info=True)
+            self._schedule_reconnect()
+
+    async def _connect(self) -> None:
+        conn = await asyncpg.connect(
+            self.dsn,
+            timeout=self.connect_timeout,
+            server_settings={"application_name": "gk-books-api-invalidation"},
+        )
+        await conn.add_listener(CHANNEL, self._on_notification)
+        conn.add_termination_listener(self._on_termination)
+        self._conn = conn
+
+    def _on_notification(self, conn, pid: int, channel: str, payload: str) -> None:
+        self.receive(payload)
+
+    def _on_termination(self, conn) -> None:
+        if self._conn is conn:
+            self._conn = None
+        if not self._stopping:
+            logger.warning("Invalidation bus connection lost, reconnecting")
+            self._schedule_reconnect()
+
+    def _schedule_reconnect(self) -> None:
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        while not self._stopping:
+            await asyncio.sleep(self.reconnect_interval)
+            try:
+                await self._connect()
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError):
+                logger.warning("Invalidation bus failed to reconnect", exc_info=True)
+                continue
+            logger.info("Invalidation bus reconnected")
+            self.reset()
+            return
+
+    async def send(self, payload: str) -> None:
+        conn = self._conn
+        if conn is None:
+            raise ConnectionError("The invalidation bus is not connected")
+        async with self._lock:
+            await conn.execute("SELECT pg_notify($1, $2)", CHANNEL, payload)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            try:
+                await self._reconnect_task
+            except asyncio.CancelledError:
+                pass
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            await conn.close()
+
+
+class SocketTransport:
+    """
+    One Unix datagram socket per worker in `directory`; a send reaches every socket in
+    it. Sockets left behind by workers that exited are removed on the next send.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        receive: Callable[[str], None],
+        send_timeout: float = 1.0,
+    ):
+        self.directory = Path(directory)
+        self.receive = receive
+        self.send_timeout = send_timeout
+        self.path: Optional[Path] = None
+        self._sock: Optional[socket.socket] = None
+
+    async def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(str(self.path))
+        sock.setblocking(False)
+        self._sock = sock
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._read)
+
+    def _read(self) -> None:
+        while True:
+            try:
+                data = self._sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return
+            self.receive(data.decode())
+
+    async def send(self, payload: str) -> None:
+        data = payload.encode()
+        for peer in self.directory.glob("*.sock"):
+            await self._send_to(data, peer)
+
+    async def _send_to(self, data: bytes, peer: Path) -> None:
+        # A peer's queue only holds a few datagrams: when it is full, give the peer
+        # `send_timeout` seconds to drain it before dropping the event
+        deadline = time.monotonic() + self.send_timeout
+        delay = 0.001
+        while True:
+            try:
+                self._sock.sendto(data, str(peer))
+                return
+            except (ConnectionRefusedError, FileNotFoundError):
+                peer.unlink(missing_ok=True)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    logger.warning(
+                        "Invalidation socket %s is full, event dropped", peer
+                    )
+                    return
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
+    async def stop(self) -> None:
+        if self._sock is not None:
+            asyncio.get_running_loop().remove_reader(self._sock.fileno())
+            self._sock.close()
+            self._sock = None
+            self.path.unlink(missing_ok=True)
+
+
+class InvalidationBus:
+    def __init__(self, transport: str = "none", socket_dir: Optional[str] = None):
+        self.transport_name = transport
+        self.socket_dir = socket_dir
+        # Identifies this bus, so it doesn't apply its own events twice
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[Type, List[Callable]] = defaultdict(list)
+        self._transport = None
+
+    def subscribe(self, event_type: Type, handler: Callable) -> None:
+        """
+        Calls `handler(event)` for every event of `event_type`, whichever worker
+        published it.
+        """
+        self._handlers[event_type].append(handler)
+
+    async def start(self) -> None:
+        if self.transport_name == "postgres":
+            settings = get_settings().database
+            dsn = (
+                make_url(settings.url)
+                .set(drivername="postgresql")
+                .render_as_string(hide_password=False)
+            )
+            self._transport = PostgresTransport(
+                dsn,
+                self._receive,
+                lambda: self._dispatch(BusReset()),
+                connect_timeout=settings.connect_timeout,
+            )
+        elif self.transport_name == "socket":
+            self._transport = SocketTransport(self.socket_dir, self._receive)
+        elif self.transport_name != "none":
+            raise ValueError(f"Unknown invalidation transport {self.transport_name!r}")
+
+        if self._transport is not None:
+            await self._transport.start()
+
+    async def stop(self) -> None:
+        if self._transport is not None:
+            await self._transport.stop()
+            self._transport = None
+
+    async def publish(self, event) -> None:
+        """
+        Applies `event` in this worker right away, and broadcasts it to the others.
+        Publish once the change is committed. A failed broadcast is logged: the other
+        workers then catch up when their cache entries expire.
+        """
+        self._dispatch(event)
+        metrics.invalidation_events_total.inc(event.type, "published")
+        if self._transport is None:
+            return
+
+        try:
+            await self._transport.send(encode_event(event, self.origin))
+        except Exception:
+            metrics.invalidation_events_total.inc(event.type, "send_error")
+            logger.warning("Failed to broadcast %s", event, exc_info=True)
+
+    def _receive(self, payload: str) -> None:
+        try:
+            event, origin, sent_at = decode_event(payload)
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed invalidation event %r", payload)
+            return
+
+        metrics.invalidation_events_total.inc(event.type, "received")
+        metrics.invalidation_latency_seconds.observe(
+            max(time.time() - sent_at, 0.0), event.type
+        )
+        # Already applied when it was published
+        if origin != self.origin:
+            self._dispatch(event)
+
+    def _dispatch(self, event) -> None:
+        for handler in self._handlers.get(type(event), ()):
+            try:
+                handler(event)
+            except Exception:
+                logger.exception("Invalidation handler failed for %s", event)
+
+
+_settings = get_settings()
+
+# Shared by the services, started by the application lifespan
+invalidation_bus = InvalidationBus(
+    _settings.invalidation_transport, _settings.invalidation_socket_dir
+)
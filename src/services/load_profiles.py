@@ -0,0 +1,58 @@
+from typing import Dict, FrozenSet, Tuple
+from sqlalchemy.orm import joinedload, selectinload
+from src.models import Question, SubUnit, Unit, Subscription
+
+# Relationships are never loaded implicitly (see `lazy="raise_on_sql"` on the models).
+# Every query that needs related objects names one of these profiles instead.
+LOAD_PROFILES: Dict[str, Tuple] = {
+    # Question with its choices
+    "question+choices": (selectinload(Question.choices),),
+    # Question with its choices and the subunit -> unit -> book chain
+    "question+choices+tree": (
+        selectinload(Question.choices),
+        joinedload(Question.subunit).joinedload(SubUnit.unit).joinedload(Unit.book),
+    ),
+    # Question with what an access check needs (the owning book and preview flag),
+    # in a single statement. The book is included so the tree is complete as well.
+    "question+access": (
+        joinedload(Question.subunit).joinedload(SubUnit.unit).joinedload(Unit.book),
+        joinedload(Question.subunit).joinedload(SubUnit.preview),
+    ),
+    # Subunit with what an access check needs: the owning book id and preview flag
+    "subunit+access": (
+        joinedload(SubUnit.unit),
+        joinedload(SubUnit.preview),
+    ),
+    # Subscription with its type and book
+    "subscription+type+book": (
+        joinedload(Subscription.subscription_type),
+        joinedload(Subscription.book),
+    ),
+}
+
+# Relationship paths each profile loads, so memoized objects can be checked for reuse
+PROFILE_PATHS: Dict[str, FrozenSet[str]] = {
+    "question+choices": frozenset({"choices"}),
+    "question+choices+tree": frozenset(
+        {"choices", "subunit", "subunit.unit", "subunit.unit.book"}
+    ),
+    "question+access": frozenset(
+        {"subunit", "subunit.unit", "subunit.unit.book", "subunit.preview"}
+    ),
+    "subunit+access": frozenset({"unit", "preview"}),
+    "subscription+type+book": frozenset({"subscription_type", "book"}),
+}
+
+
+def load_profile(name: str) -> Tuple:
+    """
+    Returns the loader options of a named load profile, to pass to `.options(...)`.
+    """
+    return LOAD_PROFILES[name]
+
+
+def profile_paths(name: str) -> FrozenSet[str]:
+    """
+    Returns the relationship paths loaded by a named load profile.
+    """
+    return PROFILE_PATHS[name]
@@ -0,0 +1,369 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Dict, List, Tuple
+from sqlalchemy import case, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql import func
+from src import metrics
+from src.db.database import async_session
+from src.models import UserProgress, UserProgressRollup
+from src.enums.enums import QuestionStatus, ProgressScope
+
+logger = logging.getLogger(__name__)
+
+# Rollup scopes and the user_progress column holding each scope's id
+ROLLUP_SCOPES = (
+    (ProgressScope.BOOK, "book_id"),
+    (ProgressScope.UNIT, "unit_id"),
+    (ProgressScope.SUBUNIT, "sub_unit_id"),
+)
+
+
+# Namespace of the advisory locks serialising each user's submissions
+# (`pg_advisory_xact_lock(SUBMISSION_LOCK_NAMESPACE, user_id)`)
+SUBMISSION_LOCK_NAMESPACE = 7201
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def build_submission_upsert(rows: List[Dict[str, any]]):
+    """
+    Single INSERT ... ON CONFLICT DO UPDATE recording submitted answers.
+    The latest submission always wins.
+    """
+    stmt = insert(UserProgress).values(rows)
+    return stmt.on_conflict_do_update(
+        constraint="uq_user_progress_user_question",
+        set_={
+            "book_id": stmt.excluded.book_id,
+            "unit_id": stmt.excluded.unit_id,
+            "sub_unit_id": stmt.excluded.sub_unit_id,
+            "selected_choice": stmt.excluded.selected_choice,
+            "is_correct": stmt.excluded.is_correct,
+            "status": stmt.excluded.status,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+
+
+def build_read_upsert(rows: List[Dict[str, any]]):
+    """
+    Single INSERT ... ON CONFLICT DO UPDATE recording "read" events.
+    An existing row only has its timestamp touched, so a read flushed after a
+    submission never overwrites the submitted answer.
+    """
+    stmt = insert(UserProgress).values(rows)
+    return stmt.on_conflict_do_update(
+        constraint="uq_user_progress_user_question",
+        set_={
+            "updated_at": func.greatest(
+                UserProgress.updated_at, stmt.excluded.updated_at
+            )
+        },
+    )
+
+
+def build_rollup_rows(events: List[Dict[str, any]]) -> List[Dict[str, any]]:
+    """
+    Folds progress events into one rollup row per (user, scope type, scope id).
+
+    Each event carries the ids of the question it touched, its resulting `status`,
+    the time it happened (`touched_at`) and how it changes the `attempted` and
+    `correct` counters.
+    """
+    rollups: Dict[Tuple[int, ProgressScope, int], Dict[str, any]] = {}
+    for event in events:
+        for scope, column in ROLLUP_SCOPES:
+            key = (event["user_id"], scope, event[column])
+            rollup = rollups.get(key)
+            if rollup is None:
+                rollup = rollups[key] = {
+                    "user_id": event["user_id"],
+                    "scope_type": scope,
+                    "scope_id": event[column],
+                    "total_attempted": 0,
+                    "total_correct": 0,
+                    "last_touched_at": None,
+                }
+
+            rollup["total_attempted"] += event["attempted"]
+            rollup["total_correct"] += event["correct"]
+            if (
+                rollup["last_touched_at"] is None
+                or event["touched_at"] >= rollup["last_touched_at"]
+            ):
+                rollup["last_unit_id"] = event["unit_id"]
+                rollup["last_sub_unit_id"] = event["sub_unit_id"]
+                rollup["last_question_id"] = event["question_id"]
+                rollup["last_status"] = event["status"]
+                rollup["last_touched_at"] = event["touched_at"]
+
+    # A stable order keeps row locks consistent between concurrent writers
+    return [
+        rollups[key] for key in sorted(rollups, key=lambda k: (k[0], k[1].value, k[2]))
+    ]
+
+
+def build_rollup_upsert(rows: List[Dict[str, any]]):
+    """
+    Single INSERT ... ON CONFLICT DO UPDATE adding counter deltas to the rollups.
+    The last-touched question is only replaced by a more recent one.
+    """
+    stmt = insert(UserProgressRollup).values(rows)
+    newer = or_(
+        UserProgressRollup.last_touched_at.is_(None),
+        stmt.excluded.last_touched_at >= UserProgressRollup.last_touched_at,
+    )
+
+    def latest(column: str):
+        return case(
+            (newer, stmt.excluded[column]),
+            else_=getattr(UserProgressRollup, column),
+        )
+
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "scope_type", "scope_id"],
+        set_={
+            "total_attempted": UserProgressRollup.total_attempted
+            + stmt.excluded.total_attempted,
+            "total_correct": UserProgressRollup.total_correct
+            + stmt.excluded.total_correct,
+            "last_unit_id": latest("last_unit_id"),
+            "last_sub_unit_id": latest("last_sub_unit_id"),
+            "last_question_id": latest("last_question_id"),
+            "last_status": latest("last_status"),
+            "last_touched_at": func.greatest(
+                UserProgressRollup.last_touched_at, stmt.excluded.last_touched_at
+            ),
+            "updated_at": func.now(),
+        },
+    )
+
+
+async def record_submissions(db: AsyncSession, rows: List[Dict[str, any]]) -> None:
+    """
+    Upserts submitted answers of a single user and updates their progress rollups.
+    The caller commits, so progress rows and rollups change in one transaction, and
+    the user's other submissions wait for it.
+    """
+    user_id = rows[0]["user_id"]
+    # The same question can only be upserted once per statement: the last answer wins
+    latest_rows = {row["question_id"]: row for row in rows}
+
+    # Row locks can't cover rows that don't exist yet: without this, two concurrent
+    # first submissions of a question would both count it as a new attempt. Taken in
+    # its own statement, so the read below sees what the previous holder committed.
+    await db.execute(
+        select(func.pg_advisory_xact_lock(SUBMISSION_LOCK_NAMESPACE, user_id))
+    )
+
+    # Lock the previous state of these rows to know how the counters change
+    result = await db.execute(
+        select(UserProgress.question_id, UserProgress.status, UserProgress.is_correct)
+        .filter(
+            UserProgress.user_id == user_id,
+            UserProgress.question_id.in_(list(latest_rows)),
+        )
+        .with_for_update()
+    )
+    previous = {
+        question_id: (status, is_correct) for question_id, status, is_correct in result
+    }
+
+    touched_at = _utcnow()
+    await db.execute(
+        build_submission_upsert(
+            [
+                {**latest_rows[key], "updated_at": touched_at}
+                for key in sorted(latest_rows)
+            ]
+        )
+    )
+
+    events = []
+    for row in rows:
+        status, was_correct = previous.get(row["question_id"], (None, False))
+        events.append(
+            {
+                **row,
+                "touched_at": touched_at,
+                "attempted": 0 if status == QuestionStatus.SUBMITTED else 1,
+                "correct": int(row["is_correct"]) - int(bool(was_correct)),
+            }
+        )
+        previous[row["question_id"]] = (QuestionStatus.SUBMITTED, row["is_correct"])
+
+    await db.execute(build_rollup_upsert(build_rollup_rows(events)))
+
+
+class ProgressWriteBuffer:
+    """
+    In-process write-behind buffer for "read" progress events.
+
+    Events are coalesced per (user_id, question_id) and written in batches by a
+    background task, either when `batch_size` events are pending or every
+    `flush_interval` seconds. At most `max_pending` events are held; beyond that the
+    caller waits for a flush, and the event is dropped if the flush fails. Drops are
+    counted, and logged at most once every `drop_log_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        session_factory=async_session,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000,
+        drop_log_interval: float = 10.0,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.drop_log_interval = drop_log_interval
+        self.dropped = 0
+        # Drops since the last warning, and when it was logged
+        self._unlogged_drops = 0
+        self._drop_logged_at = float("-inf")
+        self._pending: Dict[Tuple[int, int], Tuple[Dict[str, any], datetime]] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stops the background task and flushes everything still pending.
+        The task isn't cancelled: a flush it has in progress runs to completion.
+        """
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Failed to flush progress events at shutdown")
+
+    async def enqueue(self, row: Dict[str, any]) -> None:
+        key = (row["user_id"], row["question_id"])
+
+        if key not in self._pending and len(self._pending) >= self.max_pending:
+            # The buffer is full, so apply backpressure before accepting more events
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush progress events")
+            if len(self._pending) >= self.max_pending:
+                self._drop()
+                return
+
+        self._pending[key] = (row, _utcnow())
+
+        if not self.running:
+            # No background task (e.g. outside the app lifespan): write through
+            await self.flush()
+        elif len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def _drop(self) -> None:
+        self.dropped += 1
+        self._unlogged_drops += 1
+        metrics.progress_events_dropped_total.inc()
+
+        now = time.monotonic()
+        if now - self._drop_logged_at >= self.drop_log_interval:
+            logger.warning(
+                "Progress buffer full, dropped %d read events (%d in total)",
+                self._unlogged_drops,
+                self.dropped,
+            )
+            self._unlogged_drops = 0
+            self._drop_logged_at = now
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            while self._pending:
+                keys = list(islice(self._pending, self.batch_size))
+                batch = {key: self._pending.pop(key) for key in keys}
+                try:
+                    async with self.session_factory() as db:
+                        await self._write(db, batch)
+                        await db.commit()
+                except BaseException:
+                    # Put the batch back, without overriding events queued meanwhile,
+                    # also when cancelled so the batch is flushed later
+                    for key, pending in batch.items():
+                        self._pending.setdefault(key, pending)
+                    raise
+
+    async def _write(
+        self,
+        db: AsyncSession,
+        batch: Dict[Tuple[int, int], Tuple[Dict[str, any], datetime]],
+    ) -> None:
+        result = await db.execute(
+            build_read_upsert(
+                [
+                    {**batch[key][0], "updated_at": batch[key][1]}
+                    for key in sorted(batch)
+                ]
+            ).returning(
+                UserProgress.user_id,
+                UserProgress.book_id,
+                UserProgress.unit_id,
+                UserProgress.sub_unit_id,
+                UserProgress.question_id,
+                UserProgress.status,
+            )
+        )
+
+        # Reads don't change the counters, only the last-touched question
+        events = [
+            {
+                **row._mapping,
+                "touched_at": batch[(row.user_id, row.question_id)][1],
+                "attempted": 0,
+                "correct": 0,
+            }
+            for row in result
+        ]
+        if events:
+            await db.execute(build_rollup_upsert(build_rollup_rows(events)))
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush progress events")
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+# Shared buffer, started and flushed by the application lifespan
+progress_buffer = ProgressWriteBuffer()
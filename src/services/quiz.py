@@ -1,25 +1,44 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import func
+from sqlalchemy.orm.attributes import set_committed_value
 from fastapi import HTTPException
-from typing import List, Dict
-from src.models import Question, Book, Unit, SubUnit
+from typing import AsyncIterator, Iterable, List, Dict, Optional, Set, Tuple
+from src.db.database import open_read_session
+from src.models import Question, Book, Unit, SubUnit, Choice, PreviewSubunit
+from src.services.load_profiles import load_profile, profile_paths
+from src.cache import RequestMemo, SingleFlight
+from src.services.answer_keys import AnswerKey, answer_keys
+from src.services.catalog_snapshot import catalog_snapshots
+from src.services.content import get_payload, payload_cache, read_content_version
+from src.serialization import QUESTION_ADAPTER, QUESTION_LIST_ADAPTER, encode
+
+# Rows fetched per round trip when streaming questions from the server-side cursor
+STREAM_BATCH_SIZE = 500
+
+# Concurrent reads of the same subunit's questions (a class starting a quiz together)
+# share a single load
+subunit_questions_flight = SingleFlight("subunit_questions")
 
 
 class QuizService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, memo: Optional[RequestMemo] = None):
         # Initializes the QuizService with the given database session
         self.db = db
+        # Objects already loaded by this request (e.g. by the access check)
+        self.memo = memo if memo is not None else RequestMemo()
 
     # Helper method to fetch questions with their associated choices, unit, subunit, and book
     async def _get_questions_with_choices(
-        self, question_filter
+        self, question_filter, profile: str = "question+choices"
     ) -> List[Dict[str, any]]:
         """
-        Fetches all questions and their related choices, book, unit, and subunit based on a filter.
-        The relationships are preloaded via `lazy="selectin"` in the models.
+        Fetches all questions and their related choices based on a filter.
+        Further relationships (unit, subunit, book) are loaded through the named load profile.
         """
-        result = await self.db.execute(select(Question).filter(question_filter))
+        result = await self.db.execute(
+            select(Question).filter(question_filter).options(*load_profile(profile))
+        )
         questions = result.scalars().all()
 
         if not questions:
@@ -27,18 +46,43 @@ class QuizService:
 
         return questions
 
+    async def _get_memoized_question_with_choices_tree(
+        self, question_id: int
+    ) -> Question:
+        """
+        Returns the question with its choices and subunit -> unit -> book chain, reusing
+        the copy loaded earlier in the request when there is one.
+        """
+        required = profile_paths("question+choices+tree")
+        question = self.memo.get("question", question_id, required)
+        if question is not None:
+            return question
+
+        # The access check loads the tree but not the choices: only fetch those
+        question, loaded = self.memo.peek("question", question_id)
+        if question is not None and required - loaded == {"choices"}:
+            result = await self.db.execute(
+                select(Choice).filter(Choice.question_id == question_id)
+            )
+            set_committed_value(question, "choices", result.scalars().all())
+            self.memo.put("question", question_id, question, {"choices"})
+            self.memo.record_hit()
+            return question
+
+        questions = await self._get_questions_with_choices(
+            Question.id == question_id, profile="question+choices+tree"
+        )
+        question = questions[0]
+        self.memo.put("question", question_id, question, required)
+        return question
+
     # Method to get question with choices by question_id
     async def get_question_with_choices(self, question_id: int) -> Dict[str, any]:
         """
         Fetches a single question by its ID, along with its associated choices, book, unit, and subunit.
         Returns the question and choices in the expected format.
         """
-        questions = await self._get_questions_with_choices(Question.id == question_id)
-
-        if not questions:
-            raise HTTPException(status_code=404, detail="Question not found")
-
-        question = questions[0]
+        question = await self._get_memoized_question_with_choices_tree(question_id)
         return {
             "id": question.id,
             "text_en": question.text_en,
@@ -68,7 +112,32 @@ class QuizService:
             ],
         }
 
-    # Method to handle the submission of an answer
+    async def get_question_json(self, question_id: int) -> bytes:
+        """
+        The encoded question with its choices, without the answer. Encoded once per
+        content version.
+        """
+        version, stale = await read_content_version(self.db)
+        key = (version, "question", question_id)
+        body = get_payload(key, stale)
+        if body is None:
+            question = await self.get_question_with_choices(question_id)
+            body = encode(QUESTION_ADAPTER, question)
+            payload_cache.set(key, body)
+        return body
+
+    async def get_answer_key(self, question_id: int) -> AnswerKey:
+        """
+        Returns the question's choice ids, correct choice id and subunit/unit/book ids,
+        served from the in-memory answer key index.
+        """
+        answer_key = await answer_keys.get(question_id, self.db)
+
+        if answer_key is None:
+            raise HTTPException(status_code=404, detail="Question not found")
+
+        return answer_key
+
     # Method to handle the submission of an answer
     async def submit_answer(self, question_id: int, choice_id: int) -> Dict[str, any]:
         """
@@ -76,31 +145,52 @@ class QuizService:
         Returns a message indicating whether the answer is correct or incorrect,
         and also includes the correct option id.
         """
-        # Fetch the question with choices
-        questions = await self._get_questions_with_choices(Question.id == question_id)
+        answer_key = await self.get_answer_key(question_id)
+        return self.grade(answer_key, choice_id)
 
-        if not questions:
-            raise HTTPException(status_code=404, detail="Question not found")
+    async def get_answer_keys(
+        self, question_ids: Iterable[int]
+    ) -> Dict[int, AnswerKey]:
+        """
+        Returns the answer keys of several questions at once. Questions that don't
+        exist are left out.
+        """
+        return await answer_keys.get_many(question_ids, self.db)
 
-        # Get the question and choices
-        question = questions[0]
+    async def get_preview_subunit_ids(self, subunit_ids: Iterable[int]) -> Set[int]:
+        """
+        Returns which of the given subunits are open for preview, in a single query, or
+        from the shared catalog snapshot.
+        """
+        if catalog_snapshots.current is not None:
+            version, _ = await read_content_version(self.db)
+            snapshot = catalog_snapshots.get(version)
+            if snapshot is not None:
+                return snapshot.preview_subunit_ids(subunit_ids)
 
-        # Find the selected choice
-        choice = next((ch for ch in question.choices if ch.id == choice_id), None)
+        result = await self.db.execute(
+            select(PreviewSubunit.subunit_id)
+            .filter(PreviewSubunit.subunit_id.in_(list(subunit_ids)))
+            .distinct()
+        )
+        return set(result.scalars().all())
 
-        if not choice:
+    @staticmethod
+    def grade(answer_key: AnswerKey, choice_id: int) -> Dict[str, any]:
+        """
+        Checks a choice against the question's answer key.
+        """
+        # Check the selected choice belongs to the question
+        if choice_id not in answer_key.choice_ids:
             raise HTTPException(status_code=404, detail="Choice not found")
 
-        # Find the correct choice for this question
-        correct_choice = next((ch for ch in question.choices if ch.is_correct), None)
-
-        if not correct_choice:
+        if answer_key.correct_choice_id is None:
             raise HTTPException(
                 status_code=500, detail="No correct answer found for the question"
             )
 
         # Check if the selected choice is correct
-        is_correct = choice.id == correct_choice.id
+        is_correct = choice_id == answer_key.correct_choice_id
 
         # Return the result with the correct option id
         return {
@@ -108,37 +198,152 @@ class QuizService:
                 "Correct answer!" if is_correct else "Incorrect answer. Try again!"
             ),
             "correct": is_correct,
-            "correct_option_id": correct_choice.id,  # Add the correct option id to the response
+            "correct_option_id": answer_key.correct_choice_id,  # Add the correct option id to the response
         }
 
     # Method to get questions by subunit_id with choices (without correct answer flag)
     async def get_questions_by_subunit_id(
-        self, subunit_id: int
+        self, subunit_id: int, version: Optional[int] = None
     ) -> List[Dict[str, any]]:
         """
         Fetches all questions related to a specific subunit, including their choices.
         The correct answer flag is not included in the choices.
+        Concurrent calls for the same subunit and content `version` (by default, the
+        current one) share one load, and the same result.
         """
+        if version is None:
+            version, _ = await read_content_version(self.db)
+        # A load started before a publish is never shared with callers after it
+        return await subunit_questions_flight.do(
+            (version, subunit_id),
+            lambda: self._load_questions_by_subunit_id(subunit_id),
+        )
+
+    async def _load_questions_by_subunit_id(
+        self, subunit_id: int
+    ) -> List[Dict[str, any]]:
         questions = await self._get_questions_with_choices(
             Question.subunit_id == subunit_id
         )
 
+        return [self._question_without_answer(question) for question in questions]
+
+    async def get_questions_json_by_subunit_id(self, subunit_id: int) -> bytes:
+        """
+        The encoded list of a subunit's questions (see `get_questions_by_subunit_id`).
+        Encoded once per content version.
+        """
+        version, stale = await read_content_version(self.db)
+        key = (version, "subunit_questions", subunit_id)
+        body = get_payload(key, stale)
+        if body is None:
+            questions = await self.get_questions_by_subunit_id(subunit_id, version)
+            # Callers that shared the load find it already encoded by the first one
+            body = payload_cache.get(key)
+            if body is None:
+                body = encode(QUESTION_LIST_ADAPTER, questions)
+                payload_cache.set(key, body)
+        return body
+
+    async def get_questions_page_by_subunit_id(
+        self, subunit_id: int, limit: int, after_id: Optional[int] = None
+    ) -> Tuple[List[Dict[str, any]], Optional[int]]:
+        """
+        Fetches one page of a subunit's questions, ordered by id, starting after the
+        question `after_id` (keyset pagination).
+        Returns the page and the cursor of the next page (None on the last page).
+        """
+        query = select(Question).filter(Question.subunit_id == subunit_id)
+        if after_id is not None:
+            query = query.filter(Question.id > after_id)
+
+        # One extra row tells whether another page follows
+        result = await self.db.execute(
+            query.order_by(Question.id)
+            .limit(limit + 1)
+            .options(*load_profile("question+choices"))
+        )
+        questions = result.scalars().all()
+
+        if not questions and after_id is None:
+            raise HTTPException(status_code=404, detail="No questions found")
+
+        next_cursor = questions[limit - 1].id if len(questions) > limit else None
         return [
-            {
-                "id": question.id,
-                "text_en": question.text_en,
-                "text_hi": question.text_hi,
-                "choices": [
-                    {
-                        "id": choice.id,
-                        "text_en": choice.text_en,
-                        "text_hi": choice.text_hi,
+            self._question_without_answer(question) for question in questions[:limit]
+        ], next_cursor
+
+    @staticmethod
+    async def stream_questions_by_subunit_id(
+        subunit_id: int, open_session=open_read_session
+    ) -> AsyncIterator[Dict[str, any]]:
+        """
+        Yields a subunit's questions one at a time, ordered by id, reading the rows
+        through a server-side cursor so memory stays flat for any subunit size.
+
+        The generator opens its own session: a streamed response is sent after the
+        request's dependencies (and their sessions) have been closed.
+        """
+        query = (
+            select(
+                Question.id,
+                Question.text_en,
+                Question.text_hi,
+                Choice.id.label("choice_id"),
+                Choice.text_en.label("choice_text_en"),
+                Choice.text_hi.label("choice_text_hi"),
+            )
+            .outerjoin(Choice, Choice.question_id == Question.id)
+            .filter(Question.subunit_id == subunit_id)
+            .order_by(Question.id, Choice.id)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+
+        async with await open_session() as db:
+            result = await db.stream(query)
+
+            # Rows arrive grouped by question: one row per choice
+            question = None
+            async for row in result:
+                if question is None or question["id"] != row.id:
+                    if question is not None:
+                        yield question
+                    question = {
+                        "id": row.id,
+                        "text_en": row.text_en,
+                        "text_hi": row.text_hi,
+                        "choices": [],
                     }
-                    for choice in question.choices
-                ],
-            }
-            for question in questions
-        ]
+                if row.choice_id is not None:
+                    question["choices"].append(
+                        {
+                            "id": row.choice_id,
+                            "text_en": row.choice_text_en,
+                            "text_hi": row.choice_text_hi,
+                        }
+                    )
+
+            if question is not None:
+                yield question
+
+    @staticmethod
+    def _question_without_answer(question: Question) -> Dict[str, any]:
+        """
+        Question and its choices, without the correct answer flag.
+        """
+        return {
+            "id": question.id,
+            "text_en": question.text_en,
+            "text_hi": question.text_hi,
+            "choices": [
+                {
+                    "id": choice.id,
+                    "text_en": choice.text_en,
+                    "text_hi": choice.text_hi,
+                }
+                for choice in question.choices
+            ],
+        }
 
     async def get_total_questions_by_book(self, book: Book) -> List[Question]:
         """
@@ -5,12 +5,32 @@ from src.schemas import SubscriptionNotCompletedError, SubscriptionType
 from datetime import datetime, timedelta
 from src.models import Subscription, User, SubscriptionType
 from src.enums import SubscriptionTypeEnum
-from typing import List
+from src.cache import Entitlements, EntitlementCache, RequestMemo
+from src.services.load_profiles import load_profile
+from src.services.invalidation import (
+    BusReset,
+    EntitlementsChanged,
+    UserUpdated,
+    invalidation_bus,
+)
+from typing import List, Optional
+
+# Entitlement snapshots shared by every request served by this process, dropped when
+# any worker changes the user's subscriptions
+entitlement_cache = EntitlementCache()
+invalidation_bus.subscribe(
+    EntitlementsChanged, lambda event: entitlement_cache.invalidate(event.user_id)
+)
+invalidation_bus.subscribe(
+    UserUpdated, lambda event: entitlement_cache.invalidate(event.user_id)
+)
+invalidation_bus.subscribe(BusReset, lambda event: entitlement_cache.clear())
 
 
 class SubscriptionService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, memo: Optional[RequestMemo] = None):
         self.db = db
+        self.memo = memo if memo is not None else RequestMemo()
 
     async def create_subscription(
         self,
@@ -33,9 +53,11 @@ class SubscriptionService:
         if not subscription_type_db:
             raise HTTPException(status_code=404, detail="Subscription type not found")
 
-        # Check if user exists
-        user = await self.db.execute(select(User).filter(User.id == user_id))
-        user = user.scalars().first()
+        # Check if user exists (usually already loaded by the authentication dependency)
+        user = self.memo.get("user", user_id)
+        if user is None:
+            user = await self.db.execute(select(User).filter(User.id == user_id))
+            user = user.scalars().first()
 
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -75,8 +97,44 @@ class SubscriptionService:
         await self.db.commit()
         await self.db.refresh(new_subscription)
 
+        # The user's cached entitlements are stale now that the subscription is
+        # committed, in every worker
+        await invalidation_bus.publish(EntitlementsChanged(user_id))
+
         return new_subscription
 
+    async def get_entitlements(self, user_id: int) -> Entitlements:
+        """
+        Get the entitlement snapshot (full access flag and subscribed book ids) for a user.
+        On a cache miss all active subscriptions of the user are loaded in a single query.
+        """
+        entitlements = entitlement_cache.get(user_id)
+        if entitlements is not None:
+            return entitlements
+
+        result = await self.db.execute(
+            select(Subscription.book_id, SubscriptionType.code)
+            .join(
+                SubscriptionType,
+                SubscriptionType.id == Subscription.subscription_type_id,
+            )
+            .filter(
+                Subscription.user_id == user_id,
+                Subscription.active == True,
+            )
+        )
+        rows = result.all()
+
+        entitlements = Entitlements(
+            user_id=user_id,
+            full_access=any(
+                code == SubscriptionTypeEnum.FULL_SUBSCRIPTION.value for _, code in rows
+            ),
+            book_ids=frozenset(book_id for book_id, _ in rows if book_id is not None),
+        )
+        entitlement_cache.set(entitlements)
+        return entitlements
+
     async def check_user_has_a_full_subscription(
         self, user_id: int
     ) -> Subscription | None:
@@ -155,9 +213,9 @@ class SubscriptionService:
         Get the active subscription for a specific user.
         """
         result = await self.db.execute(
-            select(Subscription).filter(
-                Subscription.user_id == user_id, Subscription.active == True
-            )
+            select(Subscription)
+            .filter(Subscription.user_id == user_id, Subscription.active == True)
+            .options(*load_profile("subscription+type+book"))
         )
         active_subscription = result.scalars().first()
 
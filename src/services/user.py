@@ -2,14 +2,18 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import sessionmaker
 from fastapi import HTTPException
+from typing import Optional
+from src.cache import RequestMemo
+from src.services.invalidation import UserUpdated, invalidation_bus
 from src.models.user import (
     User,
 )
 
 
 class UserService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, memo: Optional[RequestMemo] = None):
         self.db = db
+        self.memo = memo if memo is not None else RequestMemo()
 
     async def get_user_by_email(self, email: str) -> User:
         """
@@ -24,6 +28,10 @@ class UserService:
         Raises:
         - HTTPException: If no user with the provided email exists.
         """
+        user = self.memo.get("user_email", email)
+        if user is not None:
+            return user
+
         # Query to fetch the user by email
         result = await self.db.execute(select(User).filter(User.email == email))
         user = (
@@ -35,4 +43,47 @@ class UserService:
                 status_code=404, detail=f"User with email {email} not found"
             )
 
+        self._remember(user)
+        return user
+
+    async def create_user(self, **fields) -> User:
+        """
+        Create a user from its column values and commit it.
+        """
+        user = User(**fields)
+        self.db.add(user)
+        await self.db.commit()
+
+        self._remember(user)
+        # Every worker drops what it cached about the user, once committed
+        await invalidation_bus.publish(UserUpdated(user.id))
+        return user
+
+    async def update_user(self, user_id: int, **fields) -> User:
+        """
+        Update a user's column values and commit them.
+
+        Raises:
+        - HTTPException: If no user with the provided id exists.
+        """
+        user = await self.db.get(User, user_id)
+        if not user:
+            raise HTTPException(
+                status_code=404, detail=f"User with id {user_id} not found"
+            )
+
+        # The object memoized earlier in this request (possibly from another session,
+        # under the old email) is stale now
+        self.memo.discard("user_email", user.email)
+        for name, value in fields.items():
+            setattr(user, name, value)
+        await self.db.commit()
+
+        self._remember(user)
+        await invalidation_bus.publish(UserUpdated(user.id))
         return user
+
+    def _remember(self, user: User) -> None:
+        # Later lookups in this request, by id or email, reuse this object
+        self.memo.put("user_email", user.email, user)
+        self.memo.put("user", user.id, user)
@@ -1,10 +1,11 @@
-from typing import Dict
+from typing import Dict, List
 from fastapi import HTTPException
+from sqlalchemy import and_, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.models import UserProgress, User, SubUnit, Unit, Book
-from src.enums.enums import QuestionStatus
+from src.models import UserProgressRollup, User, SubUnit, Unit, Book, Question
+from src.enums.enums import QuestionStatus, ProgressScope
 from sqlalchemy.future import select
-from src.services import QuizService
+from src.services.progress_writer import record_submissions, progress_buffer
 
 
 class UserProgressService:
@@ -31,134 +32,136 @@ class UserProgressService:
         """
         Updates or creates a user progress record for a given question.
 
-        If the user has not previously attempted the question, it creates a new progress record.
-        If the user has previously attempted the question, it updates their selected choice and status.
+        Submissions are written with a single upsert, together with the progress
+        rollups of the question's book, unit and subunit, and committed right away.
+        "Read" events go through the write-behind buffer: they are coalesced and
+        flushed in batches, and never overwrite an answer that was already submitted.
         """
-        # Check if a progress entry exists for the user and the specific question
+        row = {
+            "user_id": self.user.id,
+            "book_id": book_id,
+            "unit_id": unit_id,
+            "sub_unit_id": sub_unit_id,
+            "question_id": question_id,
+            "selected_choice": selected_choice,
+            "is_correct": is_correct,
+            "status": QuestionStatus(status),
+        }
 
-        result = await self.db.execute(
-            select(UserProgress).filter(
-                UserProgress.user_id == self.user.id,
-                UserProgress.book_id == book_id,
-                UserProgress.unit_id == unit_id,
-                UserProgress.sub_unit_id == sub_unit_id,
-                UserProgress.question_id == question_id,
-            )
-        )
-        progress = result.scalars().first()
+        if row["status"] == QuestionStatus.READ:
+            await progress_buffer.enqueue(row)
+            return
 
-        if progress:
-            # If progress exists, update the selected_choice and is_correct
-            progress.selected_choice = selected_choice
-            progress.is_correct = is_correct
-            progress.status = status  # Update the status (e.g., "read", "submitted")
-        else:
-            # If no progress exists, create a new record for the user's progress
-            progress = UserProgress(
-                user_id=self.user.id,
-                book_id=book_id,
-                unit_id=unit_id,
-                sub_unit_id=sub_unit_id,
-                question_id=question_id,
-                selected_choice=selected_choice,
-                is_correct=is_correct,
-                status=status,
-            )
-            self.db.add(progress)
+        await record_submissions(self.db, [row])
+        await self.db.commit()
 
-        # Commit the changes (insert or update)
+    async def record_submitted_answers(self, answers: List[Dict[str, any]]) -> None:
+        """
+        Records several submitted answers (dicts with the question's book_id, unit_id,
+        sub_unit_id and question_id, plus selected_choice and is_correct) and their
+        rollups in one transaction.
+        """
+        if not answers:
+            return
+
+        rows = [
+            {**answer, "user_id": self.user.id, "status": QuestionStatus.SUBMITTED}
+            for answer in answers
+        ]
+        await record_submissions(self.db, rows)
         await self.db.commit()
-        await self.db.refresh(progress)
-        return progress
 
     async def get_user_progress_by_type(
-        self, quiz_service: QuizService, progress_type: str, type_id: int
+        self, progress_type: str, type_id: int
     ) -> Dict[str, any]:
         """
         Fetch user progress based on the specified type and type_id.
         Type can be 'book', 'unit', or 'subunit'.
+
+        Counters come from the user's progress rollup for that scope, read together with
+        the scope's total question count in a single query.
         """
         if progress_type == "book":
-            # Fetch user progress for the specified book
-            result = await self.db.execute(
-                select(UserProgress)
-                .filter(UserProgress.book_id == type_id)
-                .order_by(UserProgress.updated_at.desc())
+            scope_model = Book
+            not_found = "Book not found"
+            total_questions = (
+                select(func.count(Question.id))
+                .join(SubUnit, SubUnit.id == Question.subunit_id)
+                .join(Unit, Unit.id == SubUnit.unit_id)
+                .filter(Unit.book_id == type_id)
             )
-            user_progress = result.scalars().all()
-
-            book = await self.db.execute(select(Book).filter(Book.id == type_id))
-            book = book.scalars().first()
-            if not book:
-                raise HTTPException(status_code=404, detail="Book not found")
-
-            total_questions = await quiz_service.get_total_questions_by_book(book)
-
         elif progress_type == "unit":
-            # Fetch user progress for the specified unit
-            result = await self.db.execute(
-                select(UserProgress)
-                .filter(UserProgress.unit_id == type_id)
-                .order_by(UserProgress.updated_at.desc())
+            scope_model = Unit
+            not_found = "Unit not found"
+            total_questions = (
+                select(func.count(Question.id))
+                .join(SubUnit, SubUnit.id == Question.subunit_id)
+                .filter(SubUnit.unit_id == type_id)
             )
-            user_progress = result.scalars().all()
-
-            unit = await self.db.execute(select(Unit).filter(Unit.id == type_id))
-            unit = unit.scalars().first()
-            if not unit:
-                raise HTTPException(status_code=404, detail="Unit not found")
-
-            total_questions = await quiz_service.get_questions_by_unit(unit)
-
         elif progress_type == "subunit":
-            # Fetch user progress for the specified subunit
-            result = await self.db.execute(
-                select(UserProgress)
-                .filter(UserProgress.sub_unit_id == type_id)
-                .order_by(UserProgress.updated_at.desc())
-            )
-            user_progress = result.scalars().all()
-
-            subunit = await self.db.execute(
-                select(SubUnit).filter(SubUnit.id == type_id)
+            scope_model = SubUnit
+            not_found = "Subunit not found"
+            total_questions = select(func.count(Question.id)).filter(
+                Question.subunit_id == type_id
             )
-            subunit = subunit.scalars().first()
-            if not subunit:
-                raise HTTPException(status_code=404, detail="Subunit not found")
-
-            total_questions = await quiz_service.get_questions_by_subunit(subunit)
-
         else:
             raise HTTPException(
                 status_code=400,
                 detail="Invalid progress type. Must be one of: book, unit, subunit.",
             )
 
+        result = await self.db.execute(
+            select(
+                total_questions.scalar_subquery().label("total_questions"),
+                UserProgressRollup.total_attempted,
+                UserProgressRollup.total_correct,
+                UserProgressRollup.last_unit_id,
+                UserProgressRollup.last_sub_unit_id,
+                UserProgressRollup.last_question_id,
+                UserProgressRollup.last_status,
+            )
+            .select_from(scope_model)
+            .outerjoin(
+                UserProgressRollup,
+                and_(
+                    UserProgressRollup.user_id == self.user.id,
+                    UserProgressRollup.scope_type == ProgressScope(progress_type),
+                    UserProgressRollup.scope_id == scope_model.id,
+                ),
+            )
+            .filter(scope_model.id == type_id)
+        )
+        progress = result.first()
+
+        if not progress:
+            raise HTTPException(status_code=404, detail=not_found)
+
         # Calculate total questions attempted and correct
-        total_attempted = sum(1 for up in user_progress if up.status == "submitted")
-        total_correct = sum(1 for up in user_progress if up.is_correct)
+        total_attempted = progress.total_attempted or 0
+        total_correct = progress.total_correct or 0
 
         # Calculate accuracy as a percentage
         accuracy = (total_correct / total_attempted * 100) if total_attempted > 0 else 0
 
-        # Fetch the most recent question details
-        recent_question_details = [
-            {
-                "unit_id": up.unit_id,
-                "sub_unit_id": up.sub_unit_id,
-                "question_id": up.question_id,
-                "status": up.status,
-            }
-            for up in user_progress
-        ]
+        # The most recently touched question, if any
+        recent_question_details = []
+        if progress.last_question_id is not None:
+            recent_question_details.append(
+                {
+                    "unit_id": progress.last_unit_id,
+                    "sub_unit_id": progress.last_sub_unit_id,
+                    "question_id": progress.last_question_id,
+                    "status": progress.last_status,
+                }
+            )
 
         # Build the response as a dictionary
         response = {
-            "total_questions": len(total_questions),
+            "total_questions": progress.total_questions,
             "total_questions_attempted": total_attempted,
             "total_questions_correct": total_correct,
             "accuracy": round(accuracy, 2),
-            "recent_question_details": recent_question_details[:1],
+            "recent_question_details": recent_question_details,
         }
 
         return response
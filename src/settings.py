@@ -0,0 +1,198 @@
+import os
+import tempfile
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+
+def _env_str(name: str, default: Optional[str]) -> Optional[str]:
+    value = os.getenv(name)
+    return value if value not in (None, "") else default
+
+
+def _env_list(name: str) -> Tuple[str, ...]:
+    value = os.getenv(name) or ""
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    if value.lower() in ("1", "true", "yes", "on"):
+        return True
+    if value.lower() in ("0", "false", "no", "off"):
+        return False
+    raise ValueError(f"{name} must be a boolean, got {value!r}")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}") from None
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {value!r}") from None
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    """
+    Engine, pool and asyncpg connection settings. The pool is per worker process, so
+    the connections a deployment opens are `workers * (pool_size + max_overflow)`.
+    """
+
+    url: str = "postgresql+asyncpg://postgres:#@localhost/gk_books"
+    # Read replicas for read-only routes; empty to read from the primary
+    replica_urls: Tuple[str, ...] = ()
+    # Seconds a failed replica is skipped before it is tried again
+    replica_retry_interval: float = 30.0
+    # Log every SQL statement (debugging only)
+    echo: bool = False
+
+    pool_size: int = 5
+    max_overflow: int = 10
+    # Seconds to wait for a connection before failing the request
+    pool_timeout: float = 30.0
+    # Seconds after which a connection is replaced, -1 to never recycle
+    pool_recycle: int = 1800
+    # Test connections on checkout, so a restarted database doesn't fail requests
+    pool_pre_ping: bool = True
+
+    # asyncpg prepared statement cache per connection, 0 to disable (e.g. behind pgbouncer)
+    statement_cache_size: int = 100
+    # Seconds to establish a connection
+    connect_timeout: float = 10.0
+    # Default timeout of a single statement, in seconds (None for no limit)
+    command_timeout: Optional[float] = None
+    application_name: str = "gk-books-api"
+
+    def engine_kwargs(self) -> Dict[str, any]:
+        """
+        Keyword arguments for `create_async_engine`.
+        """
+        connect_args = {
+            "statement_cache_size": self.statement_cache_size,
+            "timeout": self.connect_timeout,
+            "server_settings": {"application_name": self.application_name},
+        }
+        if self.command_timeout is not None:
+            connect_args["command_timeout"] = self.command_timeout
+
+        return {
+            "echo": self.echo,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+            "connect_args": connect_args,
+        }
+
+
+@dataclass(frozen=True)
+class Settings:
+    # "test" enables the query budget guard, "production" the fast-start mode
+    app_env: str = "development"
+    # Create missing tables when a worker starts. Off in production, where the
+    # schema is managed by Alembic migrations (`alembic upgrade head`)
+    create_schema_on_startup: bool = True
+    # Firebase service account key, read on the first token verification
+    firebase_credentials: str = "path/to/your/serviceAccountKey.json"
+    # Catalog snapshot file shared by the workers of a host (see
+    # `src.services.catalog_snapshot`); None to keep the catalog in each worker
+    catalog_snapshot_path: Optional[str] = None
+    # Cross-worker cache invalidation: "postgres" (LISTEN/NOTIFY), "socket" (Unix
+    # sockets in `invalidation_socket_dir`, single host) or "none". Only production
+    # defaults to "postgres", elsewhere it's "none"
+    invalidation_transport: str = "postgres"
+    invalidation_socket_dir: str = os.path.join(
+        tempfile.gettempdir(), "gk-invalidation"
+    )
+    # Size bound of the cached lesson texts of each worker, compressed variants included
+    content_cache_bytes: int = 64 * 1024 * 1024
+    # Share of successful requests written to the access log (errors are always logged)
+    access_log_sample_rate: float = 1.0
+    database: DatabaseSettings = field(default_factory=DatabaseSettings)
+
+    @property
+    def is_test(self) -> bool:
+        return self.app_env == "test"
+
+    @property
+    def is_production(self) -> bool:
+        return self.app_env == "production"
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        db_defaults = DatabaseSettings()
+        app_env = _env_str("APP_ENV", cls.app_env)
+        return cls(
+            app_env=app_env,
+            create_schema_on_startup=_env_bool(
+                "DB_CREATE_SCHEMA", app_env != "production"
+            ),
+            firebase_credentials=_env_str(
+                "FIREBASE_CREDENTIALS", cls.firebase_credentials
+            ),
+            catalog_snapshot_path=_env_str(
+                "CATALOG_SNAPSHOT_PATH", cls.catalog_snapshot_path
+            ),
+            invalidation_transport=_env_str(
+                "INVALIDATION_TRANSPORT",
+                cls.invalidation_transport if app_env == "production" else "none",
+            ),
+            invalidation_socket_dir=_env_str(
+                "INVALIDATION_SOCKET_DIR", cls.invalidation_socket_dir
+            ),
+            content_cache_bytes=_env_int(
+                "CONTENT_CACHE_BYTES", cls.content_cache_bytes
+            ),
+            access_log_sample_rate=_env_float(
+                "ACCESS_LOG_SAMPLE_RATE", cls.access_log_sample_rate
+            ),
+            database=DatabaseSettings(
+                url=_env_str("DATABASE_URL", db_defaults.url),
+                replica_urls=_env_list("DATABASE_REPLICA_URLS"),
+                replica_retry_interval=_env_float(
+                    "DB_REPLICA_RETRY_INTERVAL", db_defaults.replica_retry_interval
+                ),
+                echo=_env_bool("SQL_ECHO", db_defaults.echo),
+                pool_size=_env_int("DB_POOL_SIZE", db_defaults.pool_size),
+                max_overflow=_env_int("DB_MAX_OVERFLOW", db_defaults.max_overflow),
+                pool_timeout=_env_float("DB_POOL_TIMEOUT", db_defaults.pool_timeout),
+                pool_recycle=_env_int("DB_POOL_RECYCLE", db_defaults.pool_recycle),
+                pool_pre_ping=_env_bool("DB_POOL_PRE_PING", db_defaults.pool_pre_ping),
+                statement_cache_size=_env_int(
+                    "DB_STATEMENT_CACHE_SIZE", db_defaults.statement_cache_size
+                ),
+                connect_timeout=_env_float(
+                    "DB_CONNECT_TIMEOUT", db_defaults.connect_timeout
+                ),
+                command_timeout=_env_float(
+                    "DB_COMMAND_TIMEOUT", db_defaults.command_timeout
+                ),
+                application_name=_env_str(
+                    "DB_APPLICATION_NAME", db_defaults.application_name
+                ),
+            ),
+        )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Settings read from the environment, loaded once per process.
+    """
+    return Settings.from_env()
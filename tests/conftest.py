@@ -0,0 +1,34 @@
+import os
+import pytest
+
+# Settings are read once, at import: never run the tests against production settings
+os.environ.setdefault("APP_ENV", "test")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def database_configured() -> bool:
+    """
+    Whether a disposable test database is configured: the database tests reset it.
+    """
+    return os.environ.get("APP_ENV") == "test" and bool(os.environ.get("DATABASE_URL"))
+
+
+requires_database = pytest.mark.skipif(
+    not database_configured(), reason="needs APP_ENV=test and DATABASE_URL"
+)
+
+
+@pytest.fixture
+async def database():
+    """
+    For the database tests: the engine's pooled connections are bound to the event loop
+    of the test that opened them, so they are closed at the end of each test.
+    """
+    from src.db.database import engine
+
+    yield
+    await engine.dispose()
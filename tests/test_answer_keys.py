@@ -0,0 +1,41 @@
+import pytest
+from src.services.answer_keys import AnswerKey, AnswerKeyIndex, _SnapshotBuilder
+
+
+def test_builds_answer_keys_from_question_choice_rows():
+    builder = _SnapshotBuilder({5: (2, 1)})
+    builder.add_row(10, 5, 100, False)
+    builder.add_row(10, 5, 101, True)
+    # A second correct choice doesn't replace the first one
+    builder.add_row(10, 5, 102, True)
+    builder.add_row(11, 5, None, None)
+    snapshot = builder.snapshot
+
+    assert snapshot.lookup(10) == AnswerKey(10, 5, 2, 1, (100, 101, 102), 101)
+    assert snapshot.lookup(11) == AnswerKey(11, 5, 2, 1, (), None)
+    assert snapshot.lookup(12) is None
+    assert list(snapshot.keys()) == [snapshot.lookup(10), snapshot.lookup(11)]
+
+
+def test_unknown_subunit_has_zero_parents():
+    builder = _SnapshotBuilder({})
+    builder.add(10, 7, (1, 2), 2)
+    assert builder.snapshot.lookup(10) == AnswerKey(10, 7, 0, 0, (1, 2), 2)
+
+
+@pytest.mark.anyio
+async def test_get_many_reads_each_miss_once():
+    index = AnswerKeyIndex()
+    reads = []
+
+    async def fetch(question_ids, db):
+        reads.append(sorted(question_ids))
+        return {10: AnswerKey(10, 5, 2, 1, (100,), 100)}
+
+    index._fetch = fetch
+    assert await index.get_many([10, 11]) == {10: AnswerKey(10, 5, 2, 1, (100,), 100)}
+    # Neither the existing question nor the missing one is read again
+    assert await index.get(11) is None
+    assert await index.get_many([10, 11]) == {10: AnswerKey(10, 5, 2, 1, (100,), 100)}
+    assert reads == [[10, 11]]
+    assert len(index) == 1
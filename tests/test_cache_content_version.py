@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from src.cache import ContentVersionCache
+
+pytestmark = pytest.mark.anyio
+
+
+def test_fresh_then_stale():
+    cache = ContentVersionCache(ttl=0.0)
+    assert cache.peek() == (None, True)
+    cache.set(3)
+    assert cache.peek() == (3, True)
+    assert cache.get() is None
+
+    cache = ContentVersionCache(ttl=60.0)
+    cache.set(3)
+    assert cache.get() == 3
+
+
+def test_on_change_only_for_a_different_version():
+    changes = []
+    cache = ContentVersionCache(on_change=changes.append)
+    cache.set(1)
+    cache.set(1)
+    cache.set(2)
+    assert changes == [2]
+
+
+def test_on_change_after_invalidate():
+    changes = []
+    cache = ContentVersionCache(on_change=changes.append)
+    cache.set(1)
+    cache.invalidate()
+    assert cache.peek()[0] is None
+    cache.set(2)
+    assert changes == [2]
+
+
+async def test_revalidate_runs_one_load_at_a_time():
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 7
+
+    cache = ContentVersionCache()
+    cache.revalidate(load)
+    cache.revalidate(load)
+    await asyncio.sleep(0.05)
+
+    assert calls == [1]
+    assert cache.get() == 7
+    await cache.stop()
+
+
+async def test_failed_revalidate_keeps_the_version_and_waits_to_retry():
+    async def fail():
+        raise ConnectionError
+
+    cache = ContentVersionCache(ttl=0.0, retry_interval=60.0)
+    cache.set(4)
+    cache.revalidate(fail)
+    await asyncio.sleep(0.01)
+    assert cache.peek() == (4, True)
+
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return 5
+
+    cache.revalidate(load)
+    await asyncio.sleep(0.01)
+    assert calls == []
+    await cache.stop()
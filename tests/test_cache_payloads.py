@@ -0,0 +1,51 @@
+from src.cache import PayloadCache
+
+
+def test_evicts_least_recently_used():
+    cache = PayloadCache(maxsize=2)
+    cache.set((1, "a"), b"a")
+    cache.set((1, "b"), b"b")
+    assert cache.get((1, "a")) == b"a"
+    cache.set((1, "c"), b"c")
+
+    assert cache.get((1, "b")) is None
+    assert cache.get((1, "a")) == b"a"
+    assert len(cache) == 2
+
+
+def test_bounded_by_bytes():
+    cache = PayloadCache(max_bytes=100)
+    for i in range(5):
+        cache.set((1, i), b"x" * 30)
+
+    assert len(cache) == 3
+    assert cache.nbytes == 90
+    assert cache.get((1, 0)) is None
+
+
+def test_payload_larger_than_bound_is_not_kept():
+    cache = PayloadCache(max_bytes=100)
+    cache.set((1, "small"), b"x" * 10)
+    cache.set((1, "large"), b"x" * 200)
+
+    assert cache.get((1, "large")) is None
+    assert cache.get((1, "small")) is not None
+    assert cache.nbytes == 10
+
+
+def test_replacing_an_entry_updates_its_size():
+    cache = PayloadCache(max_bytes=100)
+    cache.set((1, "a"), b"x" * 60)
+    cache.set((1, "a"), b"x" * 10)
+    assert cache.nbytes == 10
+
+
+def test_retain_version_drops_other_versions():
+    cache = PayloadCache(max_bytes=1000)
+    cache.set((1, "a"), b"old")
+    cache.set((2, "a"), b"new")
+    cache.retain_version(2)
+
+    assert cache.get((1, "a")) is None
+    assert cache.get((2, "a")) == b"new"
+    assert cache.nbytes == 3
@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from src.cache import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_calls_share_one_load():
+    flight = SingleFlight("test")
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return object()
+
+    results = await asyncio.gather(*(flight.do("key", load) for _ in range(10)))
+
+    assert len(loads) == 1
+    assert all(result is results[0] for result in results)
+    assert len(flight) == 0
+
+
+async def test_distinct_keys_load_separately():
+    flight = SingleFlight("test")
+
+    async def load(value):
+        await asyncio.sleep(0.01)
+        return value
+
+    results = await asyncio.gather(
+        flight.do((1, "a"), lambda: load(1)), flight.do((2, "a"), lambda: load(2))
+    )
+    assert results == [1, 2]
+
+
+async def test_exception_is_shared():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise KeyError("missing")
+
+    results = await asyncio.gather(
+        *(flight.do("key", fail) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(result, KeyError) for result in results)
+
+
+async def test_follower_takes_over_when_the_leader_is_cancelled():
+    flight = SingleFlight("test")
+    loads = []
+
+    async def load(tag):
+        loads.append(tag)
+        await asyncio.sleep(0.02)
+        return tag
+
+    leader = asyncio.create_task(flight.do("key", lambda: load("leader")))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", lambda: load("follower")))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "follower"
+    assert loads == ["leader", "follower"]
+    with pytest.raises(asyncio.CancelledError):
+        await leader
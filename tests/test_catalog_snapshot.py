@@ -0,0 +1,112 @@
+import pytest
+from src.cache import CatalogSnapshot
+from src.cache.snapshot import SnapshotError, write_snapshot
+from src.services.answer_keys import _SnapshotBuilder
+from src.services.catalog_snapshot import catalog_columns
+
+SOURCE = b"s" * 16
+
+
+def _subunit(id, question_count, is_preview=False, title_hi="शीर्षक"):
+    return {
+        "id": id,
+        "title_en": f"Subunit {id}",
+        "title_hi": title_hi,
+        "question_count": question_count,
+        "is_preview": is_preview,
+    }
+
+
+def _unit(id, subunits):
+    return {
+        "id": id,
+        "title_en": f"Unit {id}",
+        "title_hi": None,
+        "question_count": sum(subunit["question_count"] for subunit in subunits),
+        "subunits": subunits,
+    }
+
+
+# Ids out of order within their parents, as unit and subunit numbers decide the order
+BOOKS = [
+    {
+        "id": 1,
+        "title_en": "Book 1",
+        "title_hi": "पुस्तक",
+        "units": [
+            _unit(12, [_subunit(31, 2, is_preview=True), _subunit(30, 0)]),
+            _unit(11, [_subunit(32, 1, title_hi=None)]),
+        ],
+    },
+    {"id": 2, "title_en": "Book 2", "title_hi": "", "units": [_unit(13, [])]},
+]
+
+
+def _answers():
+    builder = _SnapshotBuilder({30: (12, 1), 31: (12, 1), 32: (11, 1)})
+    builder.add_row(100, 31, 1000, False)
+    builder.add_row(100, 31, 1001, True)
+    builder.add_row(101, 31, 1002, None)
+    builder.add_row(102, 32, None, None)
+    return builder.snapshot
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = tmp_path / "catalog.snapshot"
+    size = write_snapshot(path, 42, SOURCE, catalog_columns(BOOKS, _answers()))
+    assert path.stat().st_size == size
+    return CatalogSnapshot(path)
+
+
+def test_header(snapshot):
+    assert snapshot.content_version == 42
+    assert snapshot.source == SOURCE
+    assert list(snapshot.book_ids) == [1, 2]
+
+
+def test_materializes_the_catalog_it_was_built_from(snapshot):
+    assert snapshot.materialize() == BOOKS
+    assert snapshot.materialize(book_id=2) == [BOOKS[1]]
+    assert snapshot.materialize(unit_id=11) == [
+        {**BOOKS[0], "units": [BOOKS[0]["units"][1]]}
+    ]
+    assert snapshot.materialize(book_id=3) == []
+    assert snapshot.materialize(unit_id=99) == []
+
+
+def test_subunit_lookups(snapshot):
+    assert snapshot.subunit_parents() == {30: (12, 1), 31: (12, 1), 32: (11, 1)}
+    assert snapshot.preview_subunit_ids([30, 31, 32, 99]) == {31}
+
+
+def test_answer_key_columns(snapshot):
+    assert list(snapshot.column("questions.id")) == [100, 101, 102]
+    assert list(snapshot.column("questions.correct_choice_id")) == [1001, 0, 0]
+    assert list(snapshot.column("questions.choice_start")) == [0, 2, 3, 3]
+    assert list(snapshot.column("choices.id")) == [1000, 1001, 1002]
+
+
+def test_replacing_the_file_keeps_the_mapped_snapshot_valid(tmp_path, snapshot):
+    write_snapshot(snapshot.path, 43, SOURCE, catalog_columns(BOOKS[1:], _answers()))
+    replaced = CatalogSnapshot(snapshot.path)
+
+    assert replaced.content_version == 43
+    assert replaced.file_id != snapshot.file_id
+    assert snapshot.materialize() == BOOKS
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not-a-snapshot"
+    path.write_bytes(b"x" * 100)
+    with pytest.raises(SnapshotError):
+        CatalogSnapshot(path)
+
+    path.write_bytes(b"x")
+    with pytest.raises(SnapshotError):
+        CatalogSnapshot(path)
+
+
+def test_rejects_long_column_names(tmp_path):
+    with pytest.raises(ValueError):
+        write_snapshot(tmp_path / "s", 1, SOURCE, {"x" * 33: b""})
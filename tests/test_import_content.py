@@ -0,0 +1,73 @@
+import pytest
+from src.cli.import_content import ENTITIES, BundleError, _coerce, _merge_statements
+
+ENTITY = {entity.name: entity for entity in ENTITIES}
+
+
+def test_entities_are_merged_after_their_parents():
+    names = [entity.name for entity in ENTITIES]
+    for entity in ENTITIES:
+        if entity.parent_entity:
+            assert names.index(entity.parent_entity) < names.index(entity.name)
+
+
+def test_merge_statements_without_parent():
+    assign, upsert = _merge_statements(ENTITY["books"])
+
+    assert assign == (
+        "UPDATE staging_books SET new_id = "
+        "COALESCE(id, nextval(pg_get_serial_sequence('book', 'id')))"
+    )
+    assert upsert == (
+        "INSERT INTO book (id, title_en, title_hi) "
+        "SELECT s.new_id, s.title_en, s.title_hi FROM staging_books s "
+        "ON CONFLICT (id) DO UPDATE SET "
+        "title_en = EXCLUDED.title_en, title_hi = EXCLUDED.title_hi"
+    )
+
+
+def test_merge_statements_resolve_parent_keys():
+    _, upsert = _merge_statements(ENTITY["questions"])
+
+    assert upsert == (
+        "INSERT INTO question (id, text_en, text_hi, subunit_id) "
+        "SELECT s.new_id, s.text_en, s.text_hi, COALESCE(p.new_id, s.subunit_id) "
+        "FROM staging_questions s "
+        "LEFT JOIN staging_subunits p ON p.key = s.subunit_key "
+        "ON CONFLICT (id) DO UPDATE SET text_en = EXCLUDED.text_en, "
+        "text_hi = EXCLUDED.text_hi, subunit_id = EXCLUDED.subunit_id"
+    )
+
+
+def test_staging_columns():
+    assert [name for name, _ in ENTITY["choices"].staging_columns] == [
+        "id",
+        "question_key",
+        "question_id",
+        "text_en",
+        "text_hi",
+        "is_correct",
+    ]
+    assert ENTITY["subunits"].staging_columns[-1] == ("preview", "boolean")
+
+
+@pytest.mark.parametrize(
+    "value, sql_type, expected",
+    [
+        (None, "integer", None),
+        ("", "text", None),
+        ("12", "integer", 12),
+        (12, "integer", 12),
+        ("Yes", "boolean", True),
+        ("0", "boolean", False),
+        (False, "boolean", False),
+        (3, "text", "3"),
+    ],
+)
+def test_coerce(value, sql_type, expected):
+    assert _coerce(value, sql_type, "units.csv:2") == expected
+
+
+def test_coerce_rejects_non_integers():
+    with pytest.raises(BundleError, match="units.csv:2: expected integer"):
+        _coerce("twelve", "integer", "units.csv:2")
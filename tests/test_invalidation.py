@@ -0,0 +1,70 @@
+import json
+import pytest
+from src.cache import Entitlements
+from src.services.invalidation import (
+    BusReset,
+    ContentVersionBumped,
+    InvalidationBus,
+    UserUpdated,
+    decode_event,
+    encode_event,
+    invalidation_bus,
+)
+from src.services.subscription import entitlement_cache
+
+
+def test_round_trip():
+    payload = encode_event(UserUpdated(7), origin="host:1")
+    event, origin, sent_at = decode_event(payload)
+
+    assert event == UserUpdated(7)
+    assert origin == "host:1"
+    assert sent_at > 0
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        "not json",
+        json.dumps({"type": "unknown", "sent_at": 0}),
+        json.dumps({"type": "content_version_bumped", "sent_at": 0}),
+        json.dumps({"type": "content_version_bumped", "version": 1}),
+    ],
+)
+def test_malformed_payloads_are_ignored(payload):
+    bus = InvalidationBus()
+    received = []
+    bus.subscribe(ContentVersionBumped, received.append)
+    bus._receive(payload)
+    assert received == []
+
+
+def test_events_of_other_buses_are_dispatched_once():
+    bus = InvalidationBus()
+    received = []
+    bus.subscribe(ContentVersionBumped, received.append)
+
+    bus._receive(encode_event(ContentVersionBumped(3), origin="elsewhere"))
+    # Its own events were already applied when published
+    bus._receive(encode_event(ContentVersionBumped(4), origin=bus.origin))
+
+    assert received == [ContentVersionBumped(3)]
+
+
+def test_failing_handler_doesnt_stop_the_others():
+    bus = InvalidationBus()
+    received = []
+
+    def fail(event):
+        raise RuntimeError
+
+    bus.subscribe(BusReset, fail)
+    bus.subscribe(BusReset, received.append)
+    bus._dispatch(BusReset())
+    assert received == [BusReset()]
+
+
+def test_user_updates_drop_cached_entitlements():
+    entitlement_cache.set(Entitlements(7, True, frozenset()))
+    invalidation_bus._dispatch(UserUpdated(7))
+    assert entitlement_cache.get(7) is None
@@ -0,0 +1,135 @@
+from datetime import datetime
+import pytest
+from src import metrics
+from src.enums.enums import ProgressScope, QuestionStatus
+from src.services.progress_writer import ProgressWriteBuffer, build_rollup_rows
+
+
+class _Session:
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    async def __aenter__(self):
+        if self.buffer.fail:
+            raise ConnectionError
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def commit(self):
+        pass
+
+
+class _Buffer(ProgressWriteBuffer):
+    """
+    Records the written batches instead of writing them.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(session_factory=lambda: _Session(self), **kwargs)
+        self.fail = False
+        self.batches = []
+
+    async def _write(self, db, batch):
+        self.batches.append({key: row for key, (row, _) in batch.items()})
+
+
+def _read(user_id, question_id, status=QuestionStatus.READ):
+    return {"user_id": user_id, "question_id": question_id, "status": status}
+
+
+@pytest.mark.anyio
+async def test_coalesces_events_per_user_and_question():
+    buffer = _Buffer(batch_size=2)
+    await buffer.start()
+    await buffer.enqueue(_read(1, 10))
+    await buffer.enqueue(_read(1, 10, QuestionStatus.SUBMITTED))
+    await buffer.enqueue(_read(2, 10))
+    await buffer.stop()
+
+    assert buffer.batches == [
+        {(1, 10): _read(1, 10, QuestionStatus.SUBMITTED), (2, 10): _read(2, 10)}
+    ]
+    assert len(buffer) == 0
+
+
+@pytest.mark.anyio
+async def test_writes_through_without_the_background_task():
+    buffer = _Buffer()
+    await buffer.enqueue(_read(1, 10))
+    assert buffer.batches == [{(1, 10): _read(1, 10)}]
+
+
+@pytest.mark.anyio
+async def test_failed_flush_keeps_the_batch():
+    buffer = _Buffer()
+    await buffer.start()
+    await buffer.enqueue(_read(1, 10))
+    buffer.fail = True
+    with pytest.raises(ConnectionError):
+        await buffer.flush()
+    assert len(buffer) == 1
+
+    buffer.fail = False
+    await buffer.stop()
+    assert buffer.batches == [{(1, 10): _read(1, 10)}]
+
+
+@pytest.mark.anyio
+async def test_drops_events_when_full_and_unflushable(caplog):
+    dropped = metrics.progress_events_dropped_total.value()
+    buffer = _Buffer(max_pending=2)
+    await buffer.start()
+    buffer.fail = True
+    for question_id in range(4):
+        await buffer.enqueue(_read(1, question_id))
+    # Events already pending are still updated
+    await buffer.enqueue(_read(1, 0, QuestionStatus.SUBMITTED))
+
+    assert len(buffer) == 2
+    assert buffer.dropped == 2
+    assert metrics.progress_events_dropped_total.value() == dropped + 2
+    # Only the first drop is logged within the interval
+    warnings = [r for r in caplog.records if r.message.startswith("Progress buffer")]
+    assert len(warnings) == 1
+
+    buffer.fail = False
+    await buffer.stop()
+    assert buffer.batches == [
+        {(1, 0): _read(1, 0, QuestionStatus.SUBMITTED), (1, 1): _read(1, 1)}
+    ]
+
+
+def _event(question_id, sub_unit_id, touched_at, attempted=1, correct=0):
+    return {
+        "user_id": 1,
+        "book_id": 1,
+        "unit_id": 2,
+        "sub_unit_id": sub_unit_id,
+        "question_id": question_id,
+        "status": QuestionStatus.SUBMITTED,
+        "touched_at": datetime(2024, 1, 1, touched_at),
+        "attempted": attempted,
+        "correct": correct,
+    }
+
+
+def test_build_rollup_rows():
+    rows = build_rollup_rows(
+        [_event(10, 3, 2, correct=1), _event(11, 4, 1), _event(12, 3, 0)]
+    )
+    rollups = {(row["scope_type"], row["scope_id"]): row for row in rows}
+
+    assert [(row["scope_type"], row["scope_id"]) for row in rows] == sorted(
+        rollups, key=lambda key: (key[0].value, key[1])
+    )
+    assert len(rows) == 4
+    book = rollups[(ProgressScope.BOOK, 1)]
+    assert (book["total_attempted"], book["total_correct"]) == (3, 1)
+    # The latest event is the last touched question
+    assert book["last_question_id"] == 10
+    assert rollups[(ProgressScope.UNIT, 2)]["last_question_id"] == 10
+    assert rollups[(ProgressScope.SUBUNIT, 4)]["last_question_id"] == 11
+    subunit = rollups[(ProgressScope.SUBUNIT, 3)]
+    assert (subunit["total_attempted"], subunit["last_question_id"]) == (2, 10)
@@ -0,0 +1,16 @@
+import pytest
+from tests.conftest import requires_database
+
+
+@requires_database
+@pytest.mark.anyio
+async def test_no_sequential_scans_of_large_tables(database):
+    # Imported here: the module installs the Firebase stand-in
+    from benchmarks.query_plans import check
+    from benchmarks.seed import SeedConfig, seed
+
+    await seed(SeedConfig(books=8, questions=60, users=5000))
+    findings, explained = await check(min_rows=1000)
+
+    assert explained
+    assert findings == []
@@ -0,0 +1,34 @@
+import uuid
+import pytest
+from sqlalchemy import delete
+from src.cache import Entitlements, RequestMemo
+from src.db.database import async_session
+from src.models import User
+from src.services import UserService
+from src.services.subscription import entitlement_cache
+from tests.conftest import requires_database
+
+
+@requires_database
+@pytest.mark.anyio
+async def test_updates_replace_the_memoized_user(database):
+    email = f"{uuid.uuid4().hex}@example.com"
+    memo = RequestMemo()
+    async with async_session() as db:
+        service = UserService(db, memo)
+        user = await service.create_user(
+            first_name="A", last_name="B", email=email, phone="1"
+        )
+        try:
+            assert await service.get_user_by_email(email) is user
+            entitlement_cache.set(Entitlements(user.id))
+
+            updated = await service.update_user(user.id, email=f"new-{email}")
+
+            assert memo.get("user_email", email) is None
+            assert memo.get("user", user.id) is updated
+            assert await service.get_user_by_email(f"new-{email}") is updated
+            assert entitlement_cache.get(user.id) is None
+        finally:
+            await db.execute(delete(User).filter(User.id == user.id))
+            await db.commit()